@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Startup benchmark: enforce import-time budgets for ADW entry points."""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from utils.config import load_config
+
+ADWS_DIR = Path(__file__).parent
+
+# Entry points checked against the CLI budget (the listener has its own)
+CLI_MODULES = ["orchestrator", "full_cycle", "plan", "build", "test", "commit", "worker"]
+LISTENER_MODULE = "webhook_listener"
+
+
+def measure_import_ms(module: str) -> float:
+    """Measure cumulative import time of a module in a fresh interpreter.
+
+    Args:
+        module: Module name importable from adws/
+
+    Returns:
+        Cumulative import time in milliseconds (from ``-X importtime``)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=str(ADWS_DIR)
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    for line in result.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"No importtime entry for {module}")
+
+
+def measure_help_ms(script: str) -> float:
+    """Measure wall time of ``<script> --help`` in a fresh interpreter.
+
+    Args:
+        script: Script filename inside adws/
+
+    Returns:
+        Wall time in milliseconds
+    """
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(ADWS_DIR / script), "--help"],
+        capture_output=True,
+        check=True,
+        cwd=str(ADWS_DIR)
+    )
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Check ADW entry point startup time against configured budgets"
+    )
+    parser.add_argument("--runs", type=int, help="Runs per measurement (median is used)")
+    args = parser.parse_args()
+
+    budgets = load_config()["startup"]
+    runs = args.runs or budgets["runs"]
+
+    checks = []
+    for module in CLI_MODULES + [LISTENER_MODULE]:
+        budget = (
+            budgets["listener_import_budget_ms"] if module == LISTENER_MODULE
+            else budgets["import_budget_ms"]
+        )
+        value = statistics.median(measure_import_ms(module) for _ in range(runs))
+        checks.append((f"import {module}", value, budget))
+
+    for module in CLI_MODULES:
+        value = statistics.median(measure_help_ms(f"{module}.py") for _ in range(runs))
+        checks.append((f"{module}.py --help", value, budgets["help_budget_ms"]))
+
+    failed = 0
+    print(f"{'Check':<32} {'Median ms':>10} {'Budget ms':>10}")
+    for name, value, budget in checks:
+        ok = value <= budget
+        failed += not ok
+        print(f"{name:<32} {value:>10.1f} {budget:>10.1f}  {'✅' if ok else '❌'}")
+
+    if failed:
+        print(f"\n❌ {failed} startup check(s) over budget", file=sys.stderr)
+        sys.exit(1)
+
+    print("\n✅ All startup checks within budget")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
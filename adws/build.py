@@ -2,41 +2,96 @@
 """BUILD phase: Implement code from specification."""
 import argparse
 import logging
+import subprocess
 import sys
 from pathlib import Path
+from typing import Optional
 
+from utils.logs import setup_logging
 from utils.config import load_config, get_repo_root
 from utils.github import add_comment, GitHubError
-from utils.claude import invoke_claude_with_retry, ClaudeError
+from utils.claude import get_session, spec_reference, ClaudeError
+from utils.deadline import Deadline, call_timeout
 from utils.prompts import render_prompt, PromptError
+from utils.governor import RESOURCE_NODE, get_governor
+from utils.repo_context import render_repo_context
+from utils.deps import ensure_dependencies, DependencyError
+from utils.cassette import recorded
+from utils.git import GitSession, create_git_session, save_baseline
+from utils.capture import artifact_path, run_captured
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler(Path(__file__).parent / "logs" / "workflow.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
-def run_build_phase(issue_number: int, spec_path: Path) -> None:
+@recorded("npm_type_check", describe=lambda repo_root, deadline=None, issue_number=None: {}, decode=tuple)
+def run_type_check(
+    repo_root: Path,
+    deadline: Optional[Deadline] = None,
+    issue_number: Optional[int] = None
+) -> tuple[bool, str]:
+    """Run npm type-check and return result.
+
+    Args:
+        repo_root: Repository root path
+        deadline: Run deadline; the check gets at most the time left
+        issue_number: Issue the run belongs to (names the output artifact)
+
+    Returns:
+        Tuple of (success: bool, output: str); success is True when npm is
+        not installed, as the check is skipped
+
+    Raises:
+        RuntimeError: If the type check times out
+        RunCancelledError: If the run is cancelled or out of time
+    """
+    logger.info("Verifying TypeScript compilation...")
+    timeout = call_timeout(deadline, 120)
+    try:
+        with get_governor().slot(RESOURCE_NODE):
+            result = run_captured(
+                ["npm", "run", "type-check"],
+                artifact_path("npm-type-check", issue_number),
+                cwd=str(repo_root),
+                timeout=timeout,
+                deadline=deadline,
+                limits=True
+            )
+        return result.returncode == 0, result.stderr
+    except subprocess.TimeoutExpired:
+        logger.error("Type check timed out")
+        raise RuntimeError("Type check timed out")
+    except FileNotFoundError:
+        logger.warning("npm not found, skipping type check")
+        return True, "npm not found"
+
+
+def run_build_phase(
+    issue_number: int,
+    spec_path: Path,
+    deadline: Optional[Deadline] = None,
+    git: Optional[GitSession] = None
+) -> None:
     """Execute BUILD phase for a GitHub issue.
 
     Args:
         issue_number: GitHub issue number
         spec_path: Path to specification file
+        deadline: Run deadline bounding every call of the phase
+        git: Git session of the run; BUILD starts its change set (default:
+            a new session, with the baseline kept in the state directory)
 
     Raises:
         GitHubError: If GitHub operations fail
         ClaudeError: If Claude invocation fails
         PromptError: If prompt template issues
+        RunCancelledError: If the run is cancelled or out of time
     """
     config = load_config()
     repo_root = get_repo_root()
 
     logger.info(f"=== BUILD PHASE: Issue #{issue_number} ===")
+    if deadline is not None:
+        deadline.check()
 
     # 1. Read spec file
     if not spec_path.exists():
@@ -45,20 +100,39 @@ def run_build_phase(issue_number: int, spec_path: Path) -> None:
     logger.info(f"Reading spec from: {spec_path}")
     spec_content = spec_path.read_text()
 
+    # Files changed from here on make up the run's commit
+    git = git or create_git_session(repo_root)
+    save_baseline(issue_number, git.start_change_set())
+
     # 2. Render prompt template
     logger.info("Rendering BUILD prompt template...")
-    prompt = render_prompt("build", {
+    variables = {
         "ISSUE_NUMBER": issue_number,
         "SPEC_PATH": str(spec_path),
         "SPEC_CONTENT": spec_content
-    })
+    }
+    prompt = render_prompt("build", variables)
+
+    # The PLAN session already holds the spec, so a resumed session only
+    # gets a reference to it
+    session = get_session(issue_number)
+    resume_prompt = render_prompt("build", {**variables, "SPEC_CONTENT": spec_reference(spec_path)})
+
+    repo_map = render_repo_context(repo_root)
+    if repo_map:
+        prompt = f"{prompt}\n\n{repo_map}"
+        if not session.has_seen("repo_map"):
+            resume_prompt = f"{resume_prompt}\n\n{repo_map}"
 
     # 3. Invoke Claude to implement code
     logger.info("Invoking Claude to implement code...")
     try:
         # Claude will create/modify files directly
         # The response will contain a summary of changes
-        response = invoke_claude_with_retry(prompt)
+        response = session.invoke(
+            "BUILD", prompt, resume_prompt, context=["repo_map"] if repo_map else [],
+            deadline=deadline
+        )
         logger.info("Build completed")
         logger.debug(f"Response: {response[:200]}...")
     except ClaudeError as e:
@@ -66,25 +140,16 @@ def run_build_phase(issue_number: int, spec_path: Path) -> None:
         raise
 
     # 4. Verify compilation (for TypeScript/Next.js)
-    logger.info("Verifying TypeScript compilation...")
-    import subprocess
     try:
-        result = subprocess.run(
-            ["npm", "run", "type-check"],
-            capture_output=True,
-            text=True,
-            cwd=str(repo_root),
-            timeout=120
-        )
-        if result.returncode != 0:
-            logger.error(f"Type check failed:\n{result.stderr}")
-            raise RuntimeError("TypeScript compilation failed")
-        logger.info("Type check passed ✅")
-    except subprocess.TimeoutExpired:
-        logger.error("Type check timed out")
-        raise RuntimeError("Type check timed out")
-    except FileNotFoundError:
-        logger.warning("npm not found, skipping type check")
+        ensure_dependencies(repo_root, deadline=deadline)
+    except DependencyError as e:
+        logger.warning(f"Dependency hydration failed (non-critical): {e}")
+
+    passed, output = run_type_check(repo_root, deadline=deadline, issue_number=issue_number)
+    if not passed:
+        logger.error(f"Type check failed:\n{output}")
+        raise RuntimeError("TypeScript compilation failed")
+    logger.info("Type check passed ✅")
 
     # 5. Add comment to GitHub issue
     logger.info("Adding comment to GitHub issue...")
@@ -98,7 +163,8 @@ def run_build_phase(issue_number: int, spec_path: Path) -> None:
             f"- ✓ Verified TypeScript compilation\n"
             f"- ✓ All type checks passed\n\n"
             f"**Next:** Phase 3/4 - TEST (write and run tests)\n\n"
-            f"_Agent is continuing autonomously..._"
+            f"_Agent is continuing autonomously..._",
+            deadline=deadline
         )
     except GitHubError as e:
         logger.warning(f"Failed to add comment (non-critical): {e}")
@@ -112,6 +178,7 @@ def main():
     parser.add_argument("issue_number", type=int, help="GitHub issue number")
     parser.add_argument("spec_path", type=Path, help="Path to spec file")
     args = parser.parse_args()
+    setup_logging()
 
     try:
         run_build_phase(args.issue_number, args.spec_path)
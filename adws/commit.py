@@ -2,94 +2,78 @@
 """COMMIT phase: Stage, commit, push changes and close issue."""
 import argparse
 import logging
+import os
 import sys
-from pathlib import Path
-import subprocess
 import json
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Optional
 
+from utils.logs import setup_logging
 from utils.config import load_config, get_repo_root
 from utils.github import get_issue, close_issue, GitHubError
+from utils.git import GitSession, GitError, create_git_session, load_baseline, baseline_path
+from utils.deadline import Deadline
+from utils.push import get_push_coordinator
+from utils.issues import get_commit_type
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler(Path(__file__).parent / "logs" / "workflow.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
-def get_commit_type(issue: dict) -> str:
-    """Determine conventional commit type from issue labels/title.
-
-    Args:
-        issue: GitHub issue dict
-
-    Returns:
-        Commit type (feat, fix, docs, etc.)
-    """
-    labels = [label["name"].lower() for label in issue.get("labels", [])]
-
-    # Check labels first
-    if "bug" in labels or "fix" in labels:
-        return "fix"
-    if "documentation" in labels or "docs" in labels:
-        return "docs"
-    if "test" in labels or "testing" in labels:
-        return "test"
-    if "refactor" in labels or "refactoring" in labels:
-        return "refactor"
-    if "chore" in labels:
-        return "chore"
-
-    # Check title
-    title_lower = issue["title"].lower()
-    if any(word in title_lower for word in ["fix", "bug", "error", "issue"]):
-        return "fix"
-    if any(word in title_lower for word in ["doc", "readme"]):
-        return "docs"
-    if any(word in title_lower for word in ["test"]):
-        return "test"
-    if any(word in title_lower for word in ["refactor", "clean"]):
-        return "refactor"
-
-    # Default to feat for new features
-    return "feat"
-
-
-def run_commit_phase(issue_number: int, test_results: dict) -> dict:
+def run_commit_phase(
+    issue_number: int,
+    test_results: dict,
+    git: Optional[GitSession] = None,
+    issue: Optional[dict] = None,
+    deadline: Optional[Deadline] = None
+) -> dict:
     """Execute COMMIT phase for a GitHub issue.
 
     Args:
         issue_number: GitHub issue number
         test_results: Results from TEST phase
+        git: Git session of the run (default: a new session)
+        issue: Issue data already fetched by the caller (default: fetch it)
+        deadline: Run deadline, checked until the commit is created; a
+            created commit is always pushed and the issue closed
 
     Returns:
-        Dict with commit info: {"success": bool, "sha": str, "message": str}
+        Dict with commit info: {"success": bool, "sha": str, "message": str,
+        "files": list of staged paths, or None if all changes were staged}
 
     Raises:
         GitHubError: If GitHub operations fail
+        RunCancelledError: If the run is cancelled or out of time before committing
     """
     config = load_config()
     repo_root = get_repo_root()
 
     logger.info(f"=== COMMIT PHASE: Issue #{issue_number} ===")
+    if deadline is not None:
+        deadline.check()
 
     # 1. Fetch issue for commit message
-    logger.info("Fetching issue from GitHub...")
-    issue = get_issue(issue_number)
+    if issue is None:
+        logger.info("Fetching issue from GitHub...")
+        issue = get_issue(issue_number, deadline=deadline)
 
-    # 2. Stage all changes
+    # 2. Stage the files changed since BUILD started
+    git = git or create_git_session(repo_root)
+    baseline = git.baseline if git.baseline is not None else load_baseline(issue_number)
     logger.info("Staging changes...")
     try:
-        subprocess.run(
-            ["git", "add", "."],
-            check=True,
-            cwd=str(repo_root)
-        )
-    except subprocess.CalledProcessError as e:
+        if baseline is None:
+            logger.warning("No change-set baseline from BUILD, staging all changes")
+            git.add_all()
+            files = None
+        else:
+            files = git.add_changes(baseline)
+            logger.info(f"Staged {len(files)} changed file(s)")
+            # A spec PLAN staged (git.fold_spec_commit) predates the baseline
+            specs_dir = os.path.relpath(config["paths"]["specs"], git.repo_root)
+            spec_pattern = (Path(specs_dir) / f"issue-{issue_number}-*.md").as_posix()
+            spec_files = [path for path in git.status() if fnmatch(path, spec_pattern)]
+    except GitError as e:
         raise RuntimeError(f"Failed to stage changes: {e}")
 
     # 3. Create commit message
@@ -98,52 +82,35 @@ def run_commit_phase(issue_number: int, test_results: dict) -> dict:
 
     logger.info(f"Commit message: {commit_message}")
 
-    # 4. Commit changes
+    # 4. Commit changes (SHA is read from the ref files, no extra process)
     logger.info("Creating commit...")
     try:
-        result = subprocess.run(
-            ["git", "commit", "-m", commit_message],
-            capture_output=True,
-            text=True,
-            check=True,
-            cwd=str(repo_root)
-        )
-        logger.info("Commit created successfully")
-    except subprocess.CalledProcessError as e:
-        if "nothing to commit" in e.stdout + e.stderr:
-            logger.warning("Nothing to commit (changes were already committed in PLAN phase)")
+        # With a baseline only the change set (and the issue's staged spec) is
+        # committed: files staged in the checkout by others stay out
+        commit_sha = git.commit(commit_message, paths=None if files is None else files + spec_files)
+        if commit_sha:
+            logger.info("Commit created successfully")
         else:
-            raise RuntimeError(f"Failed to commit: {e.stderr}")
-
-    # 5. Get commit SHA
-    try:
-        result = subprocess.run(
-            ["git", "rev-parse", "HEAD"],
-            capture_output=True,
-            text=True,
-            check=True,
-            cwd=str(repo_root)
-        )
-        commit_sha = result.stdout.strip()
+            logger.warning("Nothing to commit (changes were already committed in PLAN phase)")
+            commit_sha = git.head_sha()
         logger.info(f"Commit SHA: {commit_sha}")
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Failed to get commit SHA: {e}")
+    except GitError as e:
+        raise RuntimeError(f"Failed to commit: {e}")
+    baseline_path(issue_number).unlink(missing_ok=True)
 
-    # 6. Push to remote
+    # 5. Push to remote (PLAN's spec commit, if any, goes out in the same push).
+    # The coordinator batches with other finished runs and rebases on
+    # non-fast-forward, so the pushed SHA may differ from the local one.
     logger.info("Pushing to remote...")
     try:
-        subprocess.run(
-            ["git", "push"],
-            capture_output=True,
-            text=True,
-            check=True,
-            cwd=str(repo_root)
+        commit_sha = get_push_coordinator(git).submit(
+            issue_number, commit_sha, commit_message
         )
-        logger.info("Pushed to remote successfully")
-    except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Failed to push: {e.stderr}")
+        logger.info(f"Pushed to remote successfully ({commit_sha[:7]})")
+    except GitError as e:
+        raise RuntimeError(f"Failed to push: {e}")
 
-    # 7. Close issue
+    # 6. Close issue
     logger.info("Closing GitHub issue...")
     repo_name = config["github"]["repo"]
     closing_comment = f"""✅ **Phase 4/4: COMMIT - Completed**
@@ -151,7 +118,7 @@ def run_commit_phase(issue_number: int, test_results: dict) -> dict:
 🎉 **Issue Resolved Autonomously by AI Agent**
 
 **Final Actions:**
-- ✓ Staged all changes
+- ✓ Staged {"all changes" if files is None else f"{len(files)} changed file(s)"}
 - ✓ Created conventional commit: `{commit_message}`
 - ✓ Pushed to remote: [{commit_sha[:7]}](https://github.com/{repo_name}/commit/{commit_sha})
 - ✓ Closing issue automatically
@@ -184,7 +151,8 @@ _This issue was processed end-to-end by an autonomous AI agent without human int
     return {
         "success": True,
         "sha": commit_sha,
-        "message": commit_message
+        "message": commit_message,
+        "files": files
     }
 
 
@@ -194,6 +162,7 @@ def main():
     parser.add_argument("issue_number", type=int, help="GitHub issue number")
     parser.add_argument("--test-results", type=str, help="JSON string with test results")
     args = parser.parse_args()
+    setup_logging()
 
     # Parse test results if provided
     test_results = {}
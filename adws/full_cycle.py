@@ -3,31 +3,51 @@
 import argparse
 import logging
 import sys
+import threading
 from pathlib import Path
-import json
-
-from utils.config import get_repo_root
-from plan import run_plan_phase
-from build import run_build_phase
-from test import run_test_phase
-from commit import run_commit_phase
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler(Path(__file__).parent / "logs" / "workflow.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+from typing import Any, Callable, Optional
+
+from utils.logs import setup_logging
+from utils.config import load_config, get_repo_root
+from utils.pipeline import Pipeline, Stage
+from utils.fileio import atomic_write_json, read_json
+from utils.git import create_git_session
+from utils.cassette import record_run
+from utils.claude import get_session
+from utils.process import process_metrics, release_process_metrics
+from utils.deadline import Deadline, create_deadline, release_deadline, install_cancel_handler
+
 logger = logging.getLogger(__name__)
 
+# Bump when the state file layout changes; older files are ignored on load
+STATE_SCHEMA_VERSION = 1
+
+# Required state keys and their accepted types
+STATE_FIELDS = {
+    "success": (bool,),
+    "phase": (str, type(None)),
+    "error": (str, type(None)),
+    "spec_path": (str, type(None)),
+    "commit_sha": (str, type(None)),
+    "test_attempts": (int,),
+}
 
-def run_full_cycle(issue_number: int) -> dict:
+
+def run_full_cycle(
+    issue_number: int,
+    resume: bool = False,
+    issue: Optional[dict] = None,
+    deadline: Optional[Deadline] = None
+) -> dict:
     """Execute full workflow cycle for a GitHub issue.
 
     Args:
         issue_number: GitHub issue number
+        resume: Reuse the spec from a valid saved state instead of re-planning
+        issue: Issue data already fetched by the caller, shared by PLAN and
+            COMMIT (default: each phase fetches it)
+        deadline: Run deadline passed to every phase (default: a new one
+            of ``budgets.max_run_seconds``)
 
     Returns:
         Dict with results: {
@@ -48,13 +68,34 @@ def run_full_cycle(issue_number: int) -> dict:
         "test_attempts": 0
     }
 
+    # Phase modules are imported on first use to keep CLI startup fast
+    from plan import run_plan_phase
+    from build import run_build_phase
+    from test import run_test_phase
+    from commit import run_commit_phase
+
+    # One git session for the whole run: spec commit, final commit and push
+    git = create_git_session()
+    session = get_session(issue_number)
+    session.start_run()
+    owns_deadline = deadline is None
+    if owns_deadline:
+        deadline = create_deadline(issue_number)
+
     try:
         # Phase 1: PLAN
         logger.info(f"Starting full cycle for issue #{issue_number}")
         logger.info("=" * 60)
 
         logger.info("Phase 1/4: PLAN")
-        spec_path = run_plan_phase(issue_number)
+        spec_path = find_resumable_spec(issue_number) if resume else None
+        if spec_path:
+            logger.info(f"Reusing spec from saved state: {spec_path}")
+            # As when PLAN reuses a spec: BUILD must not resume the earlier
+            # run's conversation (and its failed attempts)
+            session.reset()
+        else:
+            spec_path = run_plan_phase(issue_number, git=git, issue=issue, deadline=deadline)
         result["phase"] = "PLAN"
         result["spec_path"] = str(spec_path)
         logger.info(f"PLAN complete: {spec_path}")
@@ -62,19 +103,21 @@ def run_full_cycle(issue_number: int) -> dict:
         # Phase 2: BUILD
         logger.info("=" * 60)
         logger.info("Phase 2/4: BUILD")
-        run_build_phase(issue_number, spec_path)
+        run_build_phase(issue_number, spec_path, deadline=deadline, git=git)
         result["phase"] = "BUILD"
         logger.info("BUILD complete")
 
         # Phase 3: TEST
         logger.info("=" * 60)
         logger.info("Phase 3/4: TEST")
-        test_results = run_test_phase(issue_number, spec_path)
+        test_results = run_test_phase(issue_number, spec_path, deadline=deadline)
         result["phase"] = "TEST"
         result["test_attempts"] = test_results["attempts"]
 
         if not test_results["success"]:
             result["error"] = f"Tests failed after {test_results['attempts']} attempts"
+            if test_results.get("budget_exceeded"):
+                result["error"] += f" ({test_results['budget_exceeded']})"
             logger.error(result["error"])
             return result
 
@@ -83,7 +126,9 @@ def run_full_cycle(issue_number: int) -> dict:
         # Phase 4: COMMIT
         logger.info("=" * 60)
         logger.info("Phase 4/4: COMMIT")
-        commit_result = run_commit_phase(issue_number, test_results)
+        commit_result = run_commit_phase(
+            issue_number, test_results, git=git, issue=issue, deadline=deadline
+        )
         result["phase"] = "COMMIT"
         result["commit_sha"] = commit_result["sha"]
         logger.info("COMMIT complete")
@@ -102,6 +147,160 @@ def run_full_cycle(issue_number: int) -> dict:
         logger.error(f"Full cycle failed at {result['phase']} phase: {e}", exc_info=True)
         return result
 
+    finally:
+        # Prompt characters saved per phase by resuming the issue's Claude
+        # session, token/cost/model-time totals per call, phase and run, and
+        # tool process counts (timeouts, killed trees, orphans)
+        result["prompt_savings"] = session.metrics
+        result["usage"] = session.usage.to_dict()
+        result["processes"] = process_metrics(issue_number)
+        if owns_deadline:
+            release_deadline(issue_number)
+            release_process_metrics(issue_number)
+
+
+def run_pipeline(
+    issue_numbers: list[int],
+    issues: Optional[dict[int, dict]] = None,
+    plan_workers: Optional[int] = None,
+    start_issue: Optional[Callable[[int], tuple[Optional[dict], str]]] = None
+) -> list[dict]:
+    """Execute the workflow for several issues as a staged pipeline.
+
+    Every phase is a pipeline stage with its own workers. PLAN only needs the
+    checkout briefly to write and commit its spec, so PLAN for the next issues
+    runs while the current issue is in BUILD/TEST. BUILD through COMMIT of one
+    issue hold the shared checkout exclusively.
+
+    Args:
+        issue_numbers: GitHub issue numbers, in submission order
+        issues: Issue data already fetched, by number, shared by PLAN and
+            COMMIT (others are fetched by each phase)
+        plan_workers: Override ``pipeline.plan_workers``
+        start_issue: Called with each issue number as it enters PLAN, to
+            validate and mark it (see orchestrator.start_issue); returns
+            (issue, reason), an issue of None skipping it with the reason
+
+    Returns:
+        List of result dicts (as from run_full_cycle, plus "issue_number"),
+        in completion order; a skipped issue's has "skipped" (the reason),
+        and "started" is set once start_issue accepted the issue
+    """
+    from plan import run_plan_phase
+    from build import run_build_phase
+    from test import run_test_phase
+    from commit import run_commit_phase
+
+    settings = load_config()["pipeline"]
+    issues = issues or {}
+    checkout = threading.Semaphore(1)
+
+    def plan_stage(item: dict) -> None:
+        # Marked as processing only now: a batch interrupted before reaching
+        # an issue leaves it unlabeled, for reconciliation to pick up
+        if start_issue is not None:
+            issue, reason = start_issue(item["issue_number"])
+            if issue is None:
+                item["skipped"] = reason
+                item["error"] = reason
+                return
+            issues[item["issue_number"]] = issue
+        item["started"] = True
+        # Specs are committed right away: a staged spec would otherwise be
+        # swept into whichever issue commits next in the shared checkout
+        item["git"] = create_git_session(fold_spec_commit=False)
+        get_session(item["issue_number"]).start_run()
+        item["deadline"] = create_deadline(item["issue_number"])
+        spec_path = run_plan_phase(
+            item["issue_number"], checkout_lock=checkout, git=item["git"],
+            issue=issues.get(item["issue_number"]), deadline=item["deadline"]
+        )
+        item["phase"] = "PLAN"
+        item["spec_path"] = str(spec_path)
+        # Queued for BUILD behind earlier issues: the clock restarts when
+        # build_stage gets the checkout
+        item["deadline"].pause()
+
+    def build_stage(item: dict) -> None:
+        # Waiting behind earlier issues' BUILD..COMMIT is not charged to
+        # the run deadline; a cancelled run stops waiting
+        item["deadline"].acquire(checkout)
+        item["holds_checkout"] = True
+        run_build_phase(
+            item["issue_number"], Path(item["spec_path"]),
+            deadline=item["deadline"], git=item["git"]
+        )
+        item["phase"] = "BUILD"
+
+    def test_stage(item: dict) -> None:
+        test_results = run_test_phase(
+            item["issue_number"], Path(item["spec_path"]), deadline=item["deadline"]
+        )
+        item["phase"] = "TEST"
+        item["test_attempts"] = test_results["attempts"]
+        item["test_results"] = test_results
+        if not test_results["success"]:
+            error = f"Tests failed after {test_results['attempts']} attempts"
+            if test_results.get("budget_exceeded"):
+                error += f" ({test_results['budget_exceeded']})"
+            raise RuntimeError(error)
+
+    def commit_stage(item: dict) -> None:
+        commit_result = run_commit_phase(
+            item["issue_number"], item.pop("test_results"), git=item["git"],
+            issue=issues.get(item["issue_number"]), deadline=item["deadline"]
+        )
+        item["phase"] = "COMMIT"
+        item["commit_sha"] = commit_result["sha"]
+        item["success"] = True
+
+    def finish(item: dict) -> None:
+        session = get_session(item["issue_number"])
+        item["prompt_savings"] = session.metrics
+        item["usage"] = session.usage.to_dict()
+        item["processes"] = process_metrics(item["issue_number"])
+        item.pop("test_results", None)
+        item.pop("git", None)
+        if item.pop("deadline", None) is not None:
+            release_deadline(item["issue_number"])
+            release_process_metrics(item["issue_number"])
+        if item.pop("holds_checkout", False):
+            checkout.release()
+        status = "✅" if item["success"] else f"❌ ({item['error']})"
+        logger.info(f"Pipeline finished issue #{item['issue_number']}: {status}")
+
+    pipeline = Pipeline(
+        [
+            Stage("PLAN", plan_stage, workers=plan_workers or settings["plan_workers"]),
+            Stage("BUILD", build_stage),
+            Stage("TEST", test_stage),
+            Stage("COMMIT", commit_stage),
+        ],
+        queue_size=settings["queue_size"],
+        on_item_done=finish
+    )
+
+    items = [
+        {
+            "issue_number": n,
+            "success": False,
+            "phase": None,
+            "error": None,
+            "spec_path": None,
+            "commit_sha": None,
+            "test_attempts": 0
+        }
+        for n in issue_numbers
+    ]
+
+    logger.info(f"Starting pipeline for issues: {issue_numbers}")
+    return pipeline.run(items)
+
+
+def get_state_path(issue_number: int) -> Path:
+    """Return the state file path for an issue (under ``paths.state``)."""
+    return Path(load_config()["paths"]["state"]) / f"issue-{issue_number}.json"
+
 
 def save_state(issue_number: int, result: dict) -> None:
     """Save workflow state to file.
@@ -110,28 +309,117 @@ def save_state(issue_number: int, result: dict) -> None:
         issue_number: GitHub issue number
         result: Result dict from run_full_cycle
     """
-    state_dir = Path(__file__).parent / "state"
-    state_dir.mkdir(exist_ok=True)
+    state_file = get_state_path(issue_number)
+    state_file.parent.mkdir(parents=True, exist_ok=True)
 
-    state_file = state_dir / f"issue-{issue_number}.json"
-
-    with open(state_file, "w") as f:
-        json.dump(result, f, indent=2)
+    state = {"schema_version": STATE_SCHEMA_VERSION, "issue_number": issue_number}
+    state.update(result)
+    atomic_write_json(state_file, state)
 
     logger.info(f"State saved to: {state_file}")
 
 
+def is_valid_state(state: Any, issue_number: int) -> bool:
+    """Check that a loaded state matches the current schema.
+
+    Args:
+        state: Parsed state file content
+        issue_number: Issue the state is expected to belong to
+
+    Returns:
+        True if the state can be trusted
+    """
+    if not isinstance(state, dict):
+        return False
+    if state.get("schema_version") != STATE_SCHEMA_VERSION:
+        return False
+    if state.get("issue_number") != issue_number:
+        return False
+    return all(
+        key in state and isinstance(state[key], types)
+        for key, types in STATE_FIELDS.items()
+    )
+
+
+def load_state(issue_number: int) -> Optional[dict]:
+    """Load saved workflow state for an issue.
+
+    Args:
+        issue_number: GitHub issue number
+
+    Returns:
+        State dict, or None if missing, corrupt or from another schema version
+    """
+    state = read_json(get_state_path(issue_number))
+    if state is None:
+        return None
+    if not is_valid_state(state, issue_number):
+        logger.warning(f"Ignoring invalid state file for issue #{issue_number}")
+        return None
+    return state
+
+
+def find_resumable_spec(issue_number: int) -> Optional[Path]:
+    """Return the spec of a previous run that got past PLAN, if still present.
+
+    Args:
+        issue_number: GitHub issue number
+
+    Returns:
+        Path to the existing spec, or None if PLAN has to run again
+    """
+    state = load_state(issue_number)
+    if not state or state["phase"] is None or not state["spec_path"]:
+        return None
+    spec_path = Path(state["spec_path"])
+    if not spec_path.is_file() or spec_path.stat().st_size == 0:
+        return None
+    return spec_path
+
+
 def main():
     """CLI entry point."""
     parser = argparse.ArgumentParser(description="Execute full workflow cycle")
-    parser.add_argument("issue_number", type=int, help="GitHub issue number")
+    parser.add_argument(
+        "issue_numbers", type=int, nargs="+",
+        help="GitHub issue number(s); several issues run as a pipeline"
+    )
     parser.add_argument("--save-state", action="store_true", help="Save state to file")
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Reuse the spec from a valid saved state instead of re-planning"
+    )
+    parser.add_argument(
+        "--record", type=Path, metavar="CASSETTE",
+        help="Record the run's Claude/gh/npm calls for replay.py (single issue)"
+    )
     args = parser.parse_args()
+    setup_logging()
+    install_cancel_handler()
+
+    if len(args.issue_numbers) > 1:
+        results = run_pipeline(args.issue_numbers)
+        failed = 0
+        for result in results:
+            if args.save_state:
+                save_state(result["issue_number"], result)
+            if result["success"]:
+                print(f"✅ #{result['issue_number']}: {result['commit_sha'][:7]}")
+            else:
+                failed += 1
+                print(
+                    f"❌ #{result['issue_number']}: failed at {result['phase']} phase: "
+                    f"{result['error']}",
+                    file=sys.stderr
+                )
+        sys.exit(1 if failed else 0)
 
-    result = run_full_cycle(args.issue_number)
+    issue_number = args.issue_numbers[0]
+    with record_run(issue_number, args.record):
+        result = run_full_cycle(issue_number, resume=args.resume)
 
     if args.save_state:
-        save_state(args.issue_number, result)
+        save_state(issue_number, result)
 
     if result["success"]:
         print(f"\n✅ Full cycle complete!")
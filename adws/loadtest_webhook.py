@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Load test for the webhook listener: sustained signed events per second."""
+import argparse
+import hashlib
+import hmac
+import http.client
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+
+def build_event(action: str, issue_number: int) -> bytes:
+    """Build an ``issues`` event payload.
+
+    Args:
+        action: Issue action (use a non-"opened" action to avoid starting runs)
+        issue_number: Issue number to put in the payload
+
+    Returns:
+        JSON payload as bytes
+    """
+    return json.dumps({
+        "action": action,
+        "issue": {
+            "number": issue_number,
+            "title": f"Load test issue {issue_number}",
+            "body": "Synthetic event sent by loadtest_webhook.py",
+            "state": "open",
+            "labels": [],
+        },
+    }).encode()
+
+
+def sign(secret: bytes, body: bytes) -> str:
+    """Return the X-Hub-Signature-256 header value for a body."""
+    return "sha256=" + hmac.new(secret, msg=body, digestmod=hashlib.sha256).hexdigest()
+
+
+def run_client(
+    url: str,
+    secret: bytes,
+    action: str,
+    stop_at: float,
+    latencies: list,
+    statuses: dict,
+    lock: threading.Lock
+) -> None:
+    """Send events over one keep-alive connection until stop_at."""
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=10)
+    local_latencies = []
+    local_statuses: dict = {}
+    issue_number = 1
+
+    while time.monotonic() < stop_at:
+        body = build_event(action, issue_number)
+        headers = {
+            "Content-Type": "application/json",
+            "X-GitHub-Event": "issues",
+            "X-GitHub-Delivery": str(uuid.uuid4()),
+        }
+        if secret:
+            headers["X-Hub-Signature-256"] = sign(secret, body)
+
+        started = time.perf_counter()
+        try:
+            conn.request("POST", parsed.path or "/webhook", body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            status = "error"
+            conn.close()
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=10)
+        local_latencies.append(time.perf_counter() - started)
+        local_statuses[status] = local_statuses.get(status, 0) + 1
+        issue_number += 1
+
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        for status, count in local_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Load test the webhook listener")
+    parser.add_argument("--url", default="http://127.0.0.1:5555/webhook", help="Webhook URL")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="Test duration in seconds")
+    parser.add_argument(
+        "--action", default="edited",
+        help='Issue action to send ("opened" starts real runs)'
+    )
+    args = parser.parse_args()
+
+    secret = os.environ.get("GITHUB_WEBHOOK_SECRET", "").encode()
+    latencies: list = []
+    statuses: dict = {}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + args.duration
+
+    threads = [
+        threading.Thread(
+            target=run_client,
+            args=(args.url, secret, args.action, stop_at, latencies, statuses, lock)
+        )
+        for _ in range(args.clients)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    if not latencies:
+        print("❌ No requests completed", file=sys.stderr)
+        sys.exit(1)
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"Requests:     {len(latencies)} in {elapsed:.1f}s ({args.clients} clients)")
+    print(f"Throughput:   {len(latencies) / elapsed:.0f} events/s")
+    print(f"Latency p50:  {statistics.median(latencies) * 1000:.2f} ms")
+    print(f"Latency p99:  {p99 * 1000:.2f} ms")
+    print(f"Statuses:     {dict(sorted(statuses.items(), key=str))}")
+
+    ok = statuses.get(202, 0)
+    sys.exit(0 if ok == len(latencies) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,136 +3,177 @@
 import argparse
 import logging
 import sys
+import time
 from pathlib import Path
+from typing import Optional
 
+from utils.logs import setup_logging
 from utils.config import load_config
-from utils.github import get_issue, add_label, remove_label, add_comment, GitHubError
-from full_cycle import run_full_cycle, save_state
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler(Path(__file__).parent / "logs" / "workflow.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
+from utils.github import (
+    get_issue, list_open_issues, add_label, remove_label, add_comment, GitHubError
 )
+from utils.issues import is_issue_processable
+from utils.fileio import read_json
+from utils.cassette import record_run
+from utils.capture import prune_artifacts
+from utils.deadline import cancel_requested, create_deadline, release_deadline, install_cancel_handler
+from utils.workspace import adopt_workspace
+
 logger = logging.getLogger(__name__)
 
 
-def is_issue_processable(issue: dict) -> tuple[bool, str]:
-    """Check if issue can be processed by the agent.
+def start_issue(issue_number: int, issue: Optional[dict] = None) -> tuple[Optional[dict], str]:
+    """Fetch and validate an issue, then mark it as being processed.
 
     Args:
-        issue: GitHub issue dict
+        issue_number: GitHub issue number
+        issue: Issue data already known to the caller; when given, the issue
+            is not fetched from GitHub
 
     Returns:
-        Tuple of (processable: bool, reason: str)
-    """
-    # Check if issue is open
-    if issue["state"].lower() != "open":
-        return False, "Issue is not open"
+        Tuple of (issue dict, or None if it is not processable, reason)
 
-    # Check if already being processed
-    labels = [label["name"] for label in issue.get("labels", [])]
+    Raises:
+        GitHubError: If the issue cannot be fetched
+    """
     config = load_config()
 
-    if config["labels"]["processing"] in labels:
-        return False, "Issue is already being processed"
+    # 1. Fetch and validate issue
+    if issue is None:
+        logger.info("Fetching issue from GitHub...")
+        issue = get_issue(issue_number)
+    else:
+        logger.info("Using provided issue data (not fetched from GitHub)")
+
+    logger.info(f"Issue: {issue['title']}")
+    logger.info(f"State: {issue['state']}")
+    logger.info(f"Labels: {[l['name'] for l in issue.get('labels', [])]}")
+
+    # 2. Check if processable
+    processable, reason = is_issue_processable(issue)
+
+    if not processable:
+        logger.warning(f"Issue #{issue_number} not processable: {reason}")
+        return None, reason
+
+    # 3. Add processing label and initial comment
+    logger.info("Adding processing label...")
+    try:
+        add_label(issue_number, config["labels"]["processing"])
+    except GitHubError as e:
+        logger.warning(f"Failed to add label (non-critical): {e}")
+
+    # Always add initial comment (even if label fails)
+    try:
+        add_comment(
+            issue_number,
+            "🤖 **Agentic AI Workflow Started**\n\n"
+            "An autonomous agent is now processing this issue end-to-end.\n\n"
+            "**Planned phases:**\n"
+            "1. 📝 PLAN - Generate specification\n"
+            "2. 🔨 BUILD - Implement code\n"
+            "3. ✅ TEST - Write and run tests\n"
+            "4. 🚀 COMMIT - Commit and close issue\n\n"
+            "_This issue will be resolved automatically without human intervention._"
+        )
+    except GitHubError as e:
+        logger.warning(f"Failed to add comment (non-critical): {e}")
+
+    return issue, reason
+
+
+def finish_issue(issue_number: int, result: dict) -> None:
+    """Save a run's state and update the issue's labels from its result.
+
+    Args:
+        issue_number: GitHub issue number
+        result: Result dict from run_full_cycle
+    """
+    from full_cycle import save_state
+
+    config = load_config()
+    save_state(issue_number, result)
 
-    if config["labels"]["completed"] in labels:
-        return False, "Issue was already completed"
+    try:
+        remove_label(issue_number, config["labels"]["processing"])
 
-    # Check if issue has enough information
-    if not issue.get("body") or len(issue["body"].strip()) < 10:
-        return False, "Issue body is too short or empty"
+        if result["success"]:
+            add_label(issue_number, config["labels"]["completed"])
+            logger.info("Added completion label")
+        else:
+            add_label(issue_number, config["labels"]["needs_review"])
+            add_comment(
+                issue_number,
+                f"❌ **Workflow failed at {result['phase']} phase**\n\n"
+                f"Error: {result['error']}\n\n"
+                f"Please review and fix manually."
+            )
+            logger.error("Added needs-review label")
 
-    return True, "OK"
+    except GitHubError as e:
+        logger.warning(f"Failed to update labels (non-critical): {e}")
 
 
-def orchestrate(issue_number: int) -> int:
+def report_orchestrator_error(issue_number: int, error: Exception) -> None:
+    """Label and comment on an issue whose run crashed (best effort)."""
+    config = load_config()
+    try:
+        add_label(issue_number, config["labels"]["needs_review"])
+        add_comment(
+            issue_number,
+            f"❌ **Orchestrator error**\n\n```\n{str(error)}\n```\n\nPlease review manually."
+        )
+    except Exception:
+        pass
+
+
+def orchestrate(
+    issue_number: int,
+    issue: Optional[dict] = None,
+    record: Optional[Path] = None,
+    workspace: Optional[Path] = None
+) -> int:
     """Orchestrate full workflow for an issue.
 
     Args:
         issue_number: GitHub issue number
+        issue: Issue data already known to the caller (e.g. from the webhook
+            payload); when given, the issue is not fetched from GitHub
+        record: Cassette file recording the full cycle's external calls
+            (default: ``$ADW_CASSETTE_DIR`` if set)
+        workspace: Workspace the listener is warming for the issue; the run
+            waits for it after the pre-flight calls and runs in it
 
     Returns:
         Exit code (0 = success, 1 = failure)
     """
-    config = load_config()
+    from full_cycle import run_full_cycle
 
     logger.info(f"{'=' * 60}")
     logger.info(f"ORCHESTRATOR: Issue #{issue_number}")
     logger.info(f"{'=' * 60}")
 
     try:
-        # 1. Fetch and validate issue
-        logger.info("Fetching issue from GitHub...")
-        issue = get_issue(issue_number)
-
-        logger.info(f"Issue: {issue['title']}")
-        logger.info(f"State: {issue['state']}")
-        logger.info(f"Labels: {[l['name'] for l in issue.get('labels', [])]}")
-
-        # 2. Check if processable
-        processable, reason = is_issue_processable(issue)
-
-        if not processable:
-            logger.warning(f"Issue not processable: {reason}")
+        issue, reason = start_issue(issue_number, issue)
+        if issue is None:
             print(f"⚠️  Issue not processable: {reason}")
             return 0  # Not an error, just skip
 
-        # 3. Add processing label and initial comment
-        logger.info("Adding processing label...")
-        try:
-            add_label(issue_number, config["labels"]["processing"])
-        except GitHubError as e:
-            logger.warning(f"Failed to add label (non-critical): {e}")
-
-        # Always add initial comment (even if label fails)
-        try:
-            add_comment(
-                issue_number,
-                "🤖 **Agentic AI Workflow Started**\n\n"
-                "An autonomous agent is now processing this issue end-to-end.\n\n"
-                "**Planned phases:**\n"
-                "1. 📝 PLAN - Generate specification\n"
-                "2. 🔨 BUILD - Implement code\n"
-                "3. ✅ TEST - Write and run tests\n"
-                "4. 🚀 COMMIT - Commit and close issue\n\n"
-                "_This issue will be resolved automatically without human intervention._"
-            )
-        except GitHubError as e:
-            logger.warning(f"Failed to add comment (non-critical): {e}")
-
-        # 4. Run full cycle
+        # 4. Run full cycle against one deadline for the whole run
         logger.info("Starting full cycle...")
-        result = run_full_cycle(issue_number)
-
-        # 5. Save state
-        save_state(issue_number, result)
-
-        # 6. Update labels based on result
+        deadline = create_deadline(issue_number)
         try:
-            remove_label(issue_number, config["labels"]["processing"])
-
-            if result["success"]:
-                add_label(issue_number, config["labels"]["completed"])
-                logger.info("Added completion label")
-            else:
-                add_label(issue_number, config["labels"]["needs_review"])
-                add_comment(
-                    issue_number,
-                    f"❌ **Workflow failed at {result['phase']} phase**\n\n"
-                    f"Error: {result['error']}\n\n"
-                    f"Please review and fix manually."
-                )
-                logger.error("Added needs-review label")
+            if workspace is not None:
+                adopt_workspace(issue_number, workspace, deadline=deadline)
+            with record_run(issue_number, record, issue=issue):
+                result = run_full_cycle(issue_number, issue=issue, deadline=deadline)
+        finally:
+            release_deadline(issue_number)
 
-        except GitHubError as e:
-            logger.warning(f"Failed to update labels (non-critical): {e}")
+        # 5. Save state and update labels based on result
+        finish_issue(issue_number, result)
 
-        # 7. Return appropriate exit code
+        # 6. Return appropriate exit code
         if result["success"]:
             logger.info(f"{'=' * 60}")
             logger.info(f"✅ ORCHESTRATION COMPLETE")
@@ -146,30 +187,206 @@ def orchestrate(issue_number: int) -> int:
 
     except Exception as e:
         logger.error(f"Orchestrator error: {e}", exc_info=True)
+        report_orchestrator_error(issue_number, e)
+        return 1
 
-        # Try to add error label/comment
-        try:
-            add_label(issue_number, config["labels"]["needs_review"])
-            add_comment(
-                issue_number,
-                f"❌ **Orchestrator error**\n\n```\n{str(e)}\n```\n\nPlease review manually."
-            )
-        except:
-            pass
 
-        return 1
+def orchestrate_batch(
+    issue_numbers: list[int],
+    issues: Optional[dict[int, dict]] = None,
+    parallelism: Optional[int] = None
+) -> list[dict]:
+    """Orchestrate several issues in this process as one staged pipeline.
+
+    Config, prompt templates, the dependency snapshot and git/push state are
+    loaded once and shared by all runs. PLAN runs ``parallelism`` issues
+    ahead; BUILD through COMMIT still take the shared checkout one issue at
+    a time. Each issue is validated and labeled as processing when it
+    enters PLAN, so an interrupted batch leaves the rest unlabeled.
+
+    Args:
+        issue_numbers: GitHub issue numbers, in processing order
+        issues: Issue data already fetched, by number (others are fetched)
+        parallelism: PLAN workers (default: ``batch.parallelism``)
+
+    Returns:
+        One summary dict per issue, in the order given: {"issue_number",
+        "title", "outcome" ("completed", "failed", "skipped" or "error"),
+        "phase", "seconds", "detail"}
+    """
+    from full_cycle import run_pipeline
+
+    issues = issues or {}
+    if parallelism is None:
+        parallelism = load_config()["batch"]["parallelism"]
+
+    summaries = {
+        issue_number: {
+            "issue_number": issue_number, "title": "", "outcome": "skipped",
+            "phase": None, "seconds": 0.0, "detail": "",
+        }
+        for issue_number in issue_numbers
+    }
+
+    def start(issue_number: int) -> tuple[Optional[dict], str]:
+        # Issues are started as they enter the pipeline, not all up front;
+        # after SIGTERM the rest of the batch is left alone
+        cancelled = cancel_requested()
+        if cancelled is not None:
+            return None, f"Batch cancelled: {cancelled}"
+        issue, reason = start_issue(issue_number, issues.get(issue_number))
+        if issue is not None:
+            summaries[issue_number]["title"] = issue["title"]
+        return issue, reason
+
+    logger.info(f"{'=' * 60}")
+    logger.info(f"ORCHESTRATOR: {len(issue_numbers)} issue(s), parallelism {parallelism}")
+    logger.info(f"{'=' * 60}")
+
+    for result in run_pipeline(issue_numbers, issues=dict(issues), plan_workers=parallelism, start_issue=start):
+        issue_number = result["issue_number"]
+        summary = summaries[issue_number]
+        if result.get("skipped") is not None:
+            summary["detail"] = result["skipped"]
+            continue
+        if not result.get("started"):
+            logger.error(f"Could not start issue #{issue_number}: {result['error']}")
+            summary.update(outcome="error", detail=result["error"])
+            continue
+        summary.update(
+            outcome="completed" if result["success"] else "failed",
+            phase=result["phase"],
+            seconds=round(sum(result.get("stage_seconds", {}).values()), 1),
+            detail=(result["commit_sha"] or "")[:7] if result["success"] else result["error"],
+        )
+        state = {key: result.get(key) for key in (
+            "success", "phase", "error", "spec_path", "commit_sha", "test_attempts",
+            "prompt_savings", "usage", "processes"
+        )}
+        try:
+            finish_issue(issue_number, state)
+        except Exception as e:
+            logger.error(f"Orchestrator error for issue #{issue_number}: {e}", exc_info=True)
+            report_orchestrator_error(issue_number, e)
+            summary.update(outcome="error", detail=str(e))
+
+    return [summaries[n] for n in issue_numbers]
+
+
+def print_summary(summaries: list[dict], elapsed: float) -> None:
+    """Print a table of batch outcomes and durations."""
+    icons = {"completed": "✅", "failed": "❌", "error": "❌", "skipped": "⚠️ "}
+    print(f"\n{'Issue':>7}  {'Outcome':<12} {'Phase':<7} {'Time':>8}  Detail")
+    print(f"{'-' * 7}  {'-' * 12} {'-' * 7} {'-' * 8}  {'-' * 30}")
+    for s in summaries:
+        detail = f"{s['title'][:40]} {s['detail']}".strip() if s["title"] else s["detail"]
+        print(
+            f"{'#' + str(s['issue_number']):>7}  "
+            f"{icons[s['outcome']]} {s['outcome']:<9} {s['phase'] or '-':<7} "
+            f"{s['seconds']:>7.1f}s  {detail}"
+        )
+    counts = {}
+    for s in summaries:
+        counts[s["outcome"]] = counts.get(s["outcome"], 0) + 1
+    totals = ", ".join(f"{count} {outcome}" for outcome, count in sorted(counts.items()))
+    print(f"\n{len(summaries)} issue(s) in {elapsed:.1f}s: {totals}")
+
+
+def parse_issue_targets(targets: list[str]) -> list[int]:
+    """Expand issue numbers and ranges ("12", "20-25") in order, without duplicates.
+
+    Raises:
+        ValueError: If a target is not a number or an ascending range
+    """
+    numbers = []
+    for target in targets:
+        if "-" in target:
+            first, last = (int(part) for part in target.split("-", 1))
+            if first > last:
+                raise ValueError(f"Invalid issue range: {target}")
+            numbers += range(first, last + 1)
+        else:
+            numbers.append(int(target))
+    return list(dict.fromkeys(numbers))
 
 
 def main():
     """CLI entry point."""
     parser = argparse.ArgumentParser(
-        description="Orchestrate agentic workflow for GitHub issue"
+        description="Orchestrate agentic workflow for GitHub issue(s)"
+    )
+    parser.add_argument(
+        "issues", nargs="*", metavar="issue",
+        help="GitHub issue number or range (e.g. 42 or 40-45)"
+    )
+    parser.add_argument(
+        "--label",
+        help="Also process open issues with this label (one paginated query)"
+    )
+    parser.add_argument(
+        "--parallelism", type=int,
+        help="Issues planned ahead of the one in BUILD/TEST (default: batch.parallelism)"
+    )
+    parser.add_argument(
+        "--issue-file",
+        type=Path,
+        help="JSON file with the issue data (single issue; skips fetching it from GitHub)"
+    )
+    parser.add_argument(
+        "--record", type=Path, metavar="CASSETTE",
+        help="Record the run's Claude/gh/npm calls for replay.py (single issue)"
+    )
+    parser.add_argument(
+        "--workspace", type=Path,
+        help="Warm workspace the listener is preparing for the issue (single issue)"
     )
-    parser.add_argument("issue_number", type=int, help="GitHub issue number")
     args = parser.parse_args()
 
-    exit_code = orchestrate(args.issue_number)
-    sys.exit(exit_code)
+    try:
+        issue_numbers = parse_issue_targets(args.issues)
+    except ValueError as e:
+        parser.error(str(e))
+    if not issue_numbers and not args.label:
+        parser.error("give at least one issue number, range or --label")
+
+    setup_logging()
+    install_cancel_handler()
+    prune_artifacts()
+
+    issues = {}
+    if args.label:
+        config = load_config()
+        try:
+            labeled = list_open_issues(
+                config["github"]["repo"], labels=args.label,
+                page_size=config["reconcile"]["page_size"]
+            )
+        except GitHubError as e:
+            print(f"❌ Could not list issues labeled {args.label!r}: {e}", file=sys.stderr)
+            sys.exit(1)
+        issues = {issue["number"]: issue for issue in labeled}
+        issue_numbers = list(dict.fromkeys(issue_numbers + list(issues)))
+
+    if len(issue_numbers) == 1 and not args.label:
+        issue = None
+        if args.issue_file:
+            issue = read_json(args.issue_file)
+            if not isinstance(issue, dict) or issue.get("number") != issue_numbers[0]:
+                logger.warning(f"Ignoring unusable issue file: {args.issue_file}")
+                issue = None
+
+        sys.exit(orchestrate(
+            issue_numbers[0], issue=issue, record=args.record, workspace=args.workspace
+        ))
+
+    if not issue_numbers:
+        print(f"✅ No open issues labeled {args.label!r}")
+        sys.exit(0)
+
+    started = time.monotonic()
+    summaries = orchestrate_batch(issue_numbers, issues=issues, parallelism=args.parallelism)
+    print_summary(summaries, time.monotonic() - started)
+    sys.exit(1 if any(s["outcome"] in ("failed", "error") for s in summaries) else 0)
 
 
 if __name__ == "__main__":
@@ -3,22 +3,23 @@
 import argparse
 import logging
 import sys
+import threading
+from contextlib import nullcontext
 from pathlib import Path
 import re
+from typing import Optional
 
+from utils.logs import setup_logging
 from utils.config import load_config, get_repo_root
 from utils.github import get_issue, add_comment, GitHubError
-from utils.claude import invoke_claude_with_retry, ClaudeError
+from utils.claude import get_session, ClaudeError
+from utils.deadline import Deadline, holding
 from utils.prompts import render_prompt, PromptError
+from utils.git import GitSession, GitError, create_git_session
+from utils.fileio import atomic_write_text
+from utils.spec_index import get_spec_index, render_similar_specs
+from utils.spec_registry import get_spec_registry, issue_hash, stale_specs
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler(Path(__file__).parent / "logs" / "workflow.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
@@ -55,86 +56,141 @@ def generate_spec_filename(issue_number: int, title: str) -> str:
     return f"issue-{issue_number}-{slug}.md"
 
 
-def run_plan_phase(issue_number: int) -> Path:
+def run_plan_phase(
+    issue_number: int,
+    checkout_lock: Optional[threading.Semaphore] = None,
+    git: Optional[GitSession] = None,
+    issue: Optional[dict] = None,
+    deadline: Optional[Deadline] = None,
+    force: bool = False
+) -> Path:
     """Execute PLAN phase for a GitHub issue.
 
+    If the issue's title and body are unchanged since its registered spec was
+    written, that spec is reused without calling Claude.
+
     Args:
         issue_number: GitHub issue number
+        checkout_lock: Held while writing and committing the spec, so PLAN
+            can run while another issue is using the shared checkout (the
+            wait for it is not charged to the deadline)
+        git: Git session of the run (default: a new session)
+        issue: Issue data already fetched by the caller (default: fetch it)
+        deadline: Run deadline bounding every call of the phase
+        force: Generate a new spec even if the issue is unchanged
 
     Returns:
-        Path to generated spec file
+        Path to generated (or reused) spec file
 
     Raises:
         GitHubError: If GitHub operations fail
         ClaudeError: If Claude invocation fails
         PromptError: If prompt template issues
+        RunCancelledError: If the run is cancelled or out of time
     """
     config = load_config()
     repo_root = get_repo_root()
 
     logger.info(f"=== PLAN PHASE: Issue #{issue_number} ===")
+    if deadline is not None:
+        deadline.check()
 
     # 1. Fetch issue from GitHub
-    logger.info("Fetching issue from GitHub...")
-    issue = get_issue(issue_number)
+    if issue is None:
+        logger.info("Fetching issue from GitHub...")
+        issue = get_issue(issue_number, deadline=deadline)
 
     logger.info(f"Issue title: {issue['title']}")
     logger.info(f"Issue body preview: {issue['body'][:100]}...")
 
-    # 2. Render prompt template
-    logger.info("Rendering PLAN prompt template...")
-    prompt = render_prompt("plan", {
-        "ISSUE_NUMBER": issue_number,
-        "ISSUE_TITLE": issue['title'],
-        "ISSUE_BODY": issue['body']
-    })
-
-    # 3. Invoke Claude to generate spec
-    logger.info("Invoking Claude to generate specification...")
-    try:
-        spec_content = invoke_claude_with_retry(prompt)
-    except ClaudeError as e:
-        logger.error(f"Claude invocation failed: {e}")
-        raise
-
-    # 4. Write spec to file
-    spec_filename = generate_spec_filename(issue_number, issue['title'])
-    spec_path = repo_root / config["paths"]["specs"] / spec_filename
-
-    logger.info(f"Writing spec to: {spec_path}")
-    spec_path.write_text(spec_content)
-
-    # 5. Commit the spec
-    logger.info("Committing spec file...")
-    import subprocess
-    try:
-        subprocess.run(
-            ["git", "add", str(spec_path)],
-            check=True,
-            cwd=str(repo_root)
-        )
-        subprocess.run(
-            ["git", "commit", "-m", f"docs: Add spec for issue #{issue_number} (PLAN)"],
-            check=True,
-            cwd=str(repo_root)
-        )
-        logger.info("Spec committed successfully")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Git commit failed: {e}")
-        raise
+    specs_dir = repo_root / config["paths"]["specs"]
+    registry = get_spec_registry()
+    content_hash = issue_hash(issue['title'], issue['body'])
+
+    # Reuse the registered spec if the issue has not changed since
+    spec_path = None
+    if not force:
+        registered = registry.lookup(issue_number, content_hash)
+        if registered and (specs_dir / registered).is_file():
+            spec_path = specs_dir / registered
+    reused = spec_path is not None
+
+    if reused:
+        logger.info(f"Issue unchanged since {spec_path.name} was written, reusing it")
+        # The run's phases must not resume an earlier run's conversation
+        get_session(issue_number).reset()
+    else:
+        # 2. Render prompt template
+        logger.info("Rendering PLAN prompt template...")
+        prompt = render_prompt("plan", {
+            "ISSUE_NUMBER": issue_number,
+            "ISSUE_TITLE": issue['title'],
+            "ISSUE_BODY": issue['body']
+        })
+
+        # Point Claude at the most similar existing specs
+        references = render_similar_specs(issue_number, issue['title'], issue['body'] or "")
+        if references:
+            prompt = f"{prompt}\n\n{references}"
+
+        # 3. Invoke Claude to generate spec
+        logger.info("Invoking Claude to generate specification...")
+        try:
+            # PLAN starts the issue's Claude session; later phases resume it
+            spec_content = get_session(issue_number).invoke("PLAN", prompt, new=True, deadline=deadline)
+        except ClaudeError as e:
+            logger.error(f"Claude invocation failed: {e}")
+            raise
+
+        # Not for a run cancelled during the Claude call
+        if deadline is not None:
+            deadline.check()
+        spec_path = specs_dir / generate_spec_filename(issue_number, issue['title'])
+    spec_filename = spec_path.name
+
+    with holding(checkout_lock, deadline) if checkout_lock else nullcontext():
+        # 4. Write spec to file, replacing older specs of the issue
+        index = get_spec_index()
+        if not reused:
+            logger.info(f"Writing spec to: {spec_path}")
+            atomic_write_text(spec_path, spec_content)
+            index.add(spec_path)
+        replaced = stale_specs(specs_dir, issue_number, spec_path)
+        for stale in replaced:
+            logger.info(f"Removing stale spec: {stale.name}")
+            stale.unlink()
+            index.remove(stale.name)
+
+        # 5. Commit the spec (or stage it for the final commit)
+        logger.info("Committing spec file...")
+        git = git or create_git_session(repo_root)
+        try:
+            spec_committed = git.record_spec(spec_path, issue_number, replaced=replaced)
+            if spec_committed:
+                logger.info("Spec committed successfully")
+        except GitError as e:
+            logger.error(f"Git commit failed: {e}")
+            raise
+        registry.register(issue_number, spec_path, content_hash)
 
     # 6. Add comment to GitHub issue
     logger.info("Adding comment to GitHub issue...")
+    if reused:
+        actions = "- ✓ Issue unchanged since the last plan: reused its specification\n"
+    else:
+        actions = "- ✓ Analyzed issue requirements\n- ✓ Generated specification document\n"
+    replaced_note = "".join(f"- ✓ Replaced stale spec: `{p.name}`\n" for p in replaced)
     try:
         add_comment(
             issue_number,
             f"✅ **Phase 1/4: PLAN - Completed**\n\n"
             f"**Agent Actions:**\n"
-            f"- ✓ Analyzed issue requirements\n"
-            f"- ✓ Generated specification document\n"
-            f"- ✓ Committed spec: `{spec_filename}`\n\n"
+            f"{actions}"
+            f"- ✓ {'Committed' if spec_committed else 'Staged'} spec: `{spec_filename}`\n"
+            f"{replaced_note}\n"
             f"**Next:** Phase 2/4 - BUILD (implement code)\n\n"
-            f"_Agent is continuing autonomously..._"
+            f"_Agent is continuing autonomously..._",
+            deadline=deadline
         )
     except GitHubError as e:
         logger.warning(f"Failed to add comment (non-critical): {e}")
@@ -147,10 +203,17 @@ def main():
     """CLI entry point."""
     parser = argparse.ArgumentParser(description="PLAN phase: Generate spec from issue")
     parser.add_argument("issue_number", type=int, help="GitHub issue number")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Generate a new spec even if the issue is unchanged since the last one"
+    )
     args = parser.parse_args()
+    setup_logging()
 
     try:
-        spec_path = run_plan_phase(args.issue_number)
+        get_session(args.issue_number).start_run()
+        spec_path = run_plan_phase(args.issue_number, force=args.force)
         print(f"✅ Spec generated: {spec_path}")
         sys.exit(0)
     except Exception as e:
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Find (and optionally process) open issues that were never picked up."""
+import argparse
+import logging
+import sys
+
+from utils.logs import setup_logging
+from utils.github import GitHubError
+from utils.reconcile import create_reconciler
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="List open issues without processing/completed labels"
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Scan all open issues instead of those updated since the last poll"
+    )
+    parser.add_argument(
+        "--run", action="store_true",
+        help="Orchestrate the issues found, oldest first, and advance the cursor"
+    )
+    args = parser.parse_args()
+    setup_logging()
+
+    reconciler = create_reconciler()
+    try:
+        issues = reconciler.find_pending(full=args.full)
+    except GitHubError as e:
+        print(f"❌ Reconcile failed: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if not issues:
+        if args.run:
+            reconciler.advance()
+        print("✅ No issues waiting for a run")
+        sys.exit(0)
+
+    for issue in issues:
+        print(f"#{issue['number']}: {issue['title']}")
+
+    if not args.run:
+        sys.exit(0)
+
+    from orchestrator import orchestrate
+
+    failed = 0
+    for issue in issues:
+        if orchestrate(issue["number"], issue=issue) != 0:
+            failed += 1
+    # Only once every issue was run: if this process dies partway, the next
+    # poll lists the rest again (those already run carry a label by then)
+    reconciler.advance()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Replay a recorded run cassette through run_full_cycle, offline."""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from utils.logs import setup_logging
+from utils.config import get_repo_root
+from utils.cassette import Cassette, CassetteError, MODE_REPLAY, use_cassette
+
+logger = logging.getLogger(__name__)
+
+
+def create_worktree(base_sha: str) -> Path:
+    """Check out ``base_sha`` in a detached scratch worktree.
+
+    Args:
+        base_sha: Commit the recorded run started from
+
+    Returns:
+        Worktree path
+
+    Raises:
+        RuntimeError: If the worktree cannot be created
+    """
+    path = Path(tempfile.mkdtemp(prefix="adw-replay-"))
+    result = subprocess.run(
+        ["git", "worktree", "add", "--detach", str(path), base_sha],
+        capture_output=True, text=True, cwd=str(get_repo_root())
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"git worktree add failed: {result.stderr.strip()}")
+    return path
+
+
+def remove_worktree(path: Path) -> None:
+    """Remove a scratch worktree created by create_worktree."""
+    subprocess.run(
+        ["git", "worktree", "remove", "--force", str(path)],
+        capture_output=True, text=True, cwd=str(get_repo_root())
+    )
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Replay a cassette recorded with --record through run_full_cycle"
+    )
+    parser.add_argument("cassette", type=Path, help="Cassette file (.jsonl)")
+    parser.add_argument(
+        "--time-scale", type=float, default=1.0,
+        help="Multiplier for recorded call durations (0 = no waiting, default: 1)"
+    )
+    parser.add_argument(
+        "--keep-worktree", action="store_true",
+        help="Keep the scratch worktree the run was replayed in"
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    try:
+        header = Cassette(args.cassette, MODE_REPLAY).header
+    except CassetteError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    issue_number = header.get("issue_number")
+    if issue_number is None:
+        print("❌ Cassette has no header with the issue number", file=sys.stderr)
+        sys.exit(1)
+
+    # Commits made by the replayed run must not land in the real checkout
+    worktree = create_worktree(header.get("base_sha") or "HEAD")
+    os.environ["ADW_REPO_ROOT"] = str(worktree)
+    setup_logging()
+    logger.info(f"Replaying issue #{issue_number} in {worktree}")
+
+    from full_cycle import run_full_cycle
+
+    try:
+        with use_cassette(args.cassette, MODE_REPLAY, args.time_scale) as cassette:
+            started = time.monotonic()
+            result = run_full_cycle(issue_number, issue=header.get("issue"))
+            elapsed = time.monotonic() - started
+    finally:
+        if not args.keep_worktree:
+            remove_worktree(worktree)
+
+    stats = cassette.stats()
+    replayed = sum(s["seconds"] for s in stats.values())
+    report = {
+        "issue_number": issue_number,
+        "success": result["success"],
+        "phase": result["phase"],
+        "error": result["error"],
+        "wall_seconds": round(elapsed, 3),
+        "replayed_call_seconds": round(replayed, 3),
+        "orchestration_seconds": round(elapsed - replayed, 3),
+        "calls": stats,
+        "unused_calls": cassette.remaining(),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        status = "✅" if result["success"] else f"❌ failed at {result['phase']}: {result['error']}"
+        print(f"\nReplay of issue #{issue_number}: {status}")
+        print(f"  Wall time:      {report['wall_seconds']:.3f}s (time scale {args.time_scale})")
+        print(f"  Replayed calls: {report['replayed_call_seconds']:.3f}s")
+        print(f"  Orchestration:  {report['orchestration_seconds']:.3f}s")
+        print(f"\n  {'Kind':<16} {'Calls':>5} {'Recorded':>10} {'Replayed':>10} {'Mismatch':>8}")
+        for kind, s in sorted(stats.items()):
+            print(
+                f"  {kind:<16} {s['calls']:>5} {s['recorded_seconds']:>9.3f}s "
+                f"{s['seconds']:>9.3f}s {s['mismatches']:>8}"
+            )
+        if report["unused_calls"]:
+            print(f"\n  ⚠️  Recorded calls not replayed: {report['unused_calls']}")
+        if args.keep_worktree:
+            print(f"\n  Worktree kept at {worktree}")
+
+    sys.exit(0 if result["success"] else 1)
+
+
+if __name__ == "__main__":
+    main()
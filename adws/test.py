@@ -5,44 +5,61 @@ import logging
 import sys
 from pathlib import Path
 import subprocess
+from typing import Optional
 
+from utils.logs import setup_logging
 from utils.config import load_config, get_repo_root
 from utils.github import add_comment, GitHubError
-from utils.claude import invoke_claude_with_retry, ClaudeError
+from utils.claude import get_session, spec_reference, ClaudeError
+from utils.usage import BudgetExceededError
+from utils.deadline import Deadline, call_timeout
 from utils.prompts import render_prompt, PromptError
+from utils.governor import RESOURCE_NODE, get_governor
+from utils.repo_context import render_repo_context
+from utils.cassette import recorded
+from utils.capture import artifact_path, run_captured
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler(Path(__file__).parent / "logs" / "workflow.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
-def run_tests(repo_root: Path) -> tuple[bool, str]:
+@recorded("npm_test", describe=lambda repo_root, deadline=None, issue_number=None: {}, decode=tuple)
+def run_tests(
+    repo_root: Path,
+    deadline: Optional[Deadline] = None,
+    issue_number: Optional[int] = None
+) -> tuple[bool, str]:
     """Run npm test and return result.
 
     Args:
         repo_root: Repository root path
+        deadline: Run deadline; the test run gets at most the time left
+        issue_number: Issue the run belongs to (names the output artifact)
 
     Returns:
-        Tuple of (success: bool, output: str)
+        Tuple of (success: bool, output: str); output is the tail of the
+        combined stdout/stderr, pointing to the full log when truncated
+
+    Raises:
+        RunCancelledError: If the run is cancelled or out of time
     """
     logger.info("Running npm test...")
+    timeout = call_timeout(deadline, 300)  # 5 minutes
     try:
-        result = subprocess.run(
-            ["npm", "test", "--", "--passWithNoTests"],
-            capture_output=True,
-            text=True,
-            cwd=str(repo_root),
-            timeout=300  # 5 minutes
-        )
+        with get_governor().slot(RESOURCE_NODE):
+            result = run_captured(
+                ["npm", "test", "--", "--passWithNoTests"],
+                artifact_path("npm-test", issue_number),
+                cwd=str(repo_root),
+                timeout=timeout,
+                merge_stderr=True,
+                deadline=deadline,
+                limits=True
+            )
 
         success = result.returncode == 0
-        output = result.stdout + result.stderr
+        output = result.stdout
+        if result.truncated:
+            output = f"[... earlier output truncated; full log: {result.artifacts['stdout']}]\n{output}"
 
         if success:
             logger.info("Tests passed ✅")
@@ -53,26 +70,33 @@ def run_tests(repo_root: Path) -> tuple[bool, str]:
 
     except subprocess.TimeoutExpired:
         logger.error("Tests timed out")
-        return False, "Tests timed out after 5 minutes"
+        return False, f"Tests timed out after {timeout:.0f}s"
     except FileNotFoundError:
         logger.error("npm not found")
         return False, "npm not found"
 
 
-def run_test_phase(issue_number: int, spec_path: Path) -> dict:
+def run_test_phase(
+    issue_number: int,
+    spec_path: Path,
+    deadline: Optional[Deadline] = None
+) -> dict:
     """Execute TEST phase for a GitHub issue.
 
     Args:
         issue_number: GitHub issue number
         spec_path: Path to specification file
+        deadline: Run deadline bounding every test run and fix attempt
 
     Returns:
-        Dict with test results: {"success": bool, "output": str, "attempts": int}
+        Dict with test results: {"success": bool, "output": str, "attempts": int},
+        plus "budget_exceeded" (reason) if fix attempts stopped on a budget
 
     Raises:
         GitHubError: If GitHub operations fail
         ClaudeError: If Claude invocation fails
         PromptError: If prompt template issues
+        RunCancelledError: If the run is cancelled or out of time
     """
     config = load_config()
     repo_root = get_repo_root()
@@ -87,8 +111,10 @@ def run_test_phase(issue_number: int, spec_path: Path) -> dict:
     logger.info(f"Reading spec from: {spec_path}")
     spec_content = spec_path.read_text()
 
+    session = get_session(issue_number)
+
     # 2. Run tests (attempt 1)
-    success, output = run_tests(repo_root)
+    success, output = run_tests(repo_root, deadline=deadline, issue_number=issue_number)
 
     if success:
         logger.info("Tests passed on first attempt ✅")
@@ -99,27 +125,48 @@ def run_test_phase(issue_number: int, spec_path: Path) -> dict:
         logger.warning(f"Tests failed. Attempt {attempt}/{max_retries + 1}")
         logger.info("Invoking Claude to fix tests...")
 
-        # Render prompt with test failure info
-        prompt = render_prompt("test", {
+        # Re-rendered per attempt; only files changed by the last fix are re-indexed
+        repo_map = render_repo_context(repo_root)
+
+        # Render prompt with test failure info; a resumed session already
+        # holds the spec (and usually the repo map), so it gets only the
+        # new test output
+        variables = {
             "ISSUE_NUMBER": issue_number,
             "SPEC_PATH": str(spec_path),
             "SPEC_CONTENT": spec_content,
             "TEST_OUTPUT": output,
             "ATTEMPT": attempt
-        })
+        }
+        prompt = render_prompt("test", variables)
+        resume_prompt = render_prompt("test", {**variables, "SPEC_CONTENT": spec_reference(spec_path)})
+        if repo_map:
+            prompt = f"{prompt}\n\n{repo_map}"
+            if not session.has_seen("repo_map"):
+                resume_prompt = f"{resume_prompt}\n\n{repo_map}"
 
         try:
             # Ask Claude to fix the tests or implementation
-            response = invoke_claude_with_retry(prompt)
+            response = session.invoke(
+                "TEST", prompt, resume_prompt, context=["repo_map"] if repo_map else [],
+                deadline=deadline
+            )
             logger.info("Claude attempted to fix issues")
             logger.debug(f"Response: {response[:200]}...")
+        except BudgetExceededError as e:
+            # No further fix attempts once the run's budget is spent
+            logger.error(f"Stopping fix attempts: {e}")
+            return {
+                "success": False, "output": output,
+                "attempts": attempt - 1, "budget_exceeded": str(e)
+            }
         except ClaudeError as e:
             logger.error(f"Claude invocation failed: {e}")
             # Continue to run tests anyway - maybe partial fix worked
             pass
 
         # Run tests again
-        success, output = run_tests(repo_root)
+        success, output = run_tests(repo_root, deadline=deadline, issue_number=issue_number)
 
         if success:
             logger.info(f"Tests passed after {attempt} attempts ✅")
@@ -136,6 +183,7 @@ def main():
     parser.add_argument("issue_number", type=int, help="GitHub issue number")
     parser.add_argument("spec_path", type=Path, help="Path to spec file")
     args = parser.parse_args()
+    setup_logging()
 
     try:
         result = run_test_phase(args.issue_number, args.spec_path)
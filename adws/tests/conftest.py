@@ -0,0 +1,54 @@
+"""Shared fixtures: adws/ on sys.path (modules import ``utils.*``) and git repos."""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def git(cwd: Path, *args: str) -> str:
+    """Run git in a directory and return its stdout."""
+    return subprocess.run(
+        ["git", *args], cwd=str(cwd), check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+@pytest.fixture(autouse=True)
+def state_root(tmp_path, monkeypatch):
+    """Keep logs, state and caches of the code under test out of the checkout."""
+    root = tmp_path / "state-root"
+    root.mkdir()
+    monkeypatch.setenv("ADW_STATE_ROOT", str(root))
+    return root
+
+
+@pytest.fixture
+def git_identity(monkeypatch):
+    """Commit identity for test repos, independent of the user's git config."""
+    for role in ("AUTHOR", "COMMITTER"):
+        monkeypatch.setenv(f"GIT_{role}_NAME", "ADW Test")
+        monkeypatch.setenv(f"GIT_{role}_EMAIL", "adw@example.com")
+    for name in ("ADW_PUSH_REMOTE", "ADW_PUSH_BRANCH"):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def remote_repo(tmp_path, git_identity):
+    """A bare remote with one commit on main; returns a function cloning it."""
+    remote = tmp_path / "remote.git"
+    seed = tmp_path / "seed"
+    git(tmp_path, "init", "--quiet", "--bare", "--initial-branch=main", str(remote))
+    git(tmp_path, "clone", "--quiet", str(remote), str(seed))
+    (seed / "README.md").write_text("seed\n")
+    git(seed, "add", "README.md")
+    git(seed, "commit", "--quiet", "-m", "seed")
+    git(seed, "push", "--quiet", "origin", "HEAD:main")
+
+    def clone(name: str) -> Path:
+        path = tmp_path / name
+        git(tmp_path, "clone", "--quiet", str(remote), str(path))
+        return path
+
+    return clone
@@ -0,0 +1,210 @@
+"""Lease claiming, expiry and re-claiming, shared by every broker."""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from utils.broker import Broker, FakeBroker, SqliteBroker
+
+
+class SqliteOnFakeClock(SqliteBroker):
+    """SqliteBroker whose leases run on a manual clock, like FakeBroker."""
+
+    def __init__(self, path, lease_seconds=60, max_attempts=3, class_caps=None):
+        self.now = 1_000_000_000.0
+        super().__init__(path, 600, class_caps or {}, lease_seconds, max_attempts,
+                         poll_seconds=0.01, clock=lambda: self.now)
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture(params=["fake", "sqlite"])
+def make_broker(request, tmp_path):
+    """Factory for a broker of each implementation."""
+    def make(**kwargs):
+        if request.param == "fake":
+            return FakeBroker(**kwargs)
+        return SqliteOnFakeClock(tmp_path / "broker.sqlite3", **kwargs)
+    return make
+
+
+def issue(number, title="feat: thing"):
+    return {"number": number, "title": title, "labels": []}
+
+
+def test_broker_is_abstract():
+    class Incomplete(Broker):
+        def put(self, issue):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_claim_takes_best_issue_and_skips_duplicates(make_broker):
+    broker = make_broker()
+    broker.put(issue(1, "docs: readme"))
+    broker.put(issue(2, "fix: crash"))
+    assert broker.put(issue(2, "fix: crash")) is None
+
+    entry = broker.claim("w1", timeout=0)
+
+    assert entry["issue_number"] == 2
+    assert entry["worker"] == "w1" and entry["attempts"] == 1
+    assert broker.locate(2) == {"state": "running", "worker": "w1"}
+    assert broker.put(issue(2, "fix: crash")) is None
+
+
+def test_heartbeat_keeps_lease_alive(make_broker):
+    broker = make_broker(lease_seconds=10)
+    broker.put(issue(1))
+    broker.claim("w1", timeout=0)
+
+    for _ in range(5):
+        broker.advance(8)
+        assert broker.heartbeat(1, "w1")
+        assert broker.requeue_expired() == 0
+    assert broker.locate(1)["state"] == "running"
+
+
+def test_expired_lease_is_requeued_and_reclaimed(make_broker):
+    broker = make_broker(lease_seconds=10)
+    broker.put(issue(1))
+    broker.claim("w1", timeout=0)
+
+    broker.advance(11)
+    assert broker.requeue_expired() == 1
+    assert broker.locate(1) == {"state": "queued", "worker": None}
+
+    entry = broker.claim("w2", timeout=0)
+    assert entry["issue_number"] == 1 and entry["worker"] == "w2"
+    assert entry["attempts"] == 2
+    # The old worker lost the lease: no renewal, and its completion is ignored
+    assert not broker.heartbeat(1, "w1")
+    broker.complete(1, "w1")
+    assert broker.locate(1) == {"state": "running", "worker": "w2"}
+    broker.complete(1, "w2")
+    assert broker.locate(1) is None
+
+
+def test_claim_requeues_expired_leases_itself(make_broker):
+    broker = make_broker(lease_seconds=10)
+    broker.put(issue(1))
+    broker.claim("w1", timeout=0)
+    assert broker.claim("w2", timeout=0) is None
+
+    broker.advance(11)
+    assert broker.claim("w2", timeout=0)["worker"] == "w2"
+
+
+def test_issue_dropped_after_max_attempts(make_broker):
+    broker = make_broker(lease_seconds=10, max_attempts=2)
+    broker.put(issue(1))
+    for worker in ("w1", "w2"):
+        assert broker.claim(worker, timeout=0) is not None
+        broker.advance(11)
+
+    assert broker.requeue_expired() == 0
+    assert broker.locate(1) is None and broker.depth() == 0
+
+
+def test_cancel_fails_heartbeat_and_is_not_requeued(make_broker):
+    broker = make_broker(lease_seconds=10)
+    broker.put(issue(1))
+    broker.claim("w1", timeout=0)
+
+    assert broker.request_cancel(1)
+    assert not broker.heartbeat(1, "w1")
+    broker.advance(11)
+    assert broker.requeue_expired() == 0
+    assert broker.locate(1) is None
+
+
+def test_class_cap_holds_across_workers(make_broker):
+    broker = make_broker(class_caps={"docs": 1})
+    broker.put(issue(1, "docs: a"))
+    broker.put(issue(2, "docs: b"))
+
+    assert broker.claim("w1", timeout=0)["issue_number"] == 1
+    assert broker.claim("w2", timeout=0) is None
+    broker.complete(1, "w1")
+    assert broker.claim("w2", timeout=0)["issue_number"] == 2
+
+
+def test_concurrent_claims_never_share_an_issue(make_broker):
+    broker = make_broker()
+    for number in range(1, 6):
+        broker.put(issue(number))
+    claimed = []
+    lock = threading.Lock()
+
+    def work(worker):
+        while True:
+            entry = broker.claim(worker, timeout=0)
+            if entry is None:
+                return
+            with lock:
+                claimed.append(entry["issue_number"])
+
+    threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == [1, 2, 3, 4, 5]
+    assert broker.running_count() == 5
+
+
+def _claim_all(path, worker, results):
+    broker = SqliteBroker(path, 600, {}, 60, 3, poll_seconds=0.01)
+    while True:
+        entry = broker.claim(worker, timeout=0)
+        if entry is None:
+            return
+        results.put(entry["issue_number"])
+
+
+def test_sqlite_claims_across_processes_never_share_an_issue(tmp_path):
+    multiprocessing = pytest.importorskip("multiprocessing")
+    path = tmp_path / "broker.sqlite3"
+    broker = SqliteBroker(path, 600, {}, 60, 3, poll_seconds=0.01)
+    for number in range(1, 21):
+        broker.put(issue(number))
+    results = multiprocessing.Queue()
+
+    processes = [
+        multiprocessing.Process(target=_claim_all, args=(path, f"p{i}", results)) for i in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=30)
+
+    claimed = [results.get(timeout=5) for _ in range(20)]
+    assert sorted(claimed) == list(range(1, 21))
+    assert results.empty()
+
+
+def test_sqlite_reads_do_not_wait_for_the_write_lock(tmp_path):
+    path = tmp_path / "broker.sqlite3"
+    broker = SqliteBroker(path, 600, {}, 60, 3, poll_seconds=0.01)
+    broker.put(issue(1))
+    broker.claim("w1", timeout=0)
+    broker.put(issue(2))
+
+    # A claim or heartbeat in another process holding the write lock
+    writer = sqlite3.connect(str(path), isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.monotonic()
+        assert broker.depth() == 1
+        assert broker.running_count() == 1
+        assert broker.locate(1) == {"state": "running", "worker": "w1"}
+        assert [e["issue"] for e in broker.snapshot()["queued"]] == [2]
+        assert time.monotonic() - started < 1
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
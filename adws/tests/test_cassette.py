@@ -0,0 +1,46 @@
+"""Cassettes of concurrent runs stay separate."""
+import json
+import threading
+
+from utils.cassette import MODE_RECORD, recorded, use_cassette
+
+
+@recorded("echo")
+def echo(value):
+    return value
+
+
+def recorded_values(path):
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    return [line["result"] for line in lines if line["type"] == "call"]
+
+
+def test_concurrent_runs_record_into_their_own_cassettes(tmp_path):
+    barrier = threading.Barrier(2)
+
+    def run(name):
+        with use_cassette(tmp_path / f"{name}.jsonl", MODE_RECORD):
+            barrier.wait()
+            for i in range(20):
+                echo(f"{name}-{i}")
+            barrier.wait()
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert recorded_values(tmp_path / "a.jsonl") == [f"a-{i}" for i in range(20)]
+    assert recorded_values(tmp_path / "b.jsonl") == [f"b-{i}" for i in range(20)]
+
+
+def test_calls_outside_a_cassette_run_unchanged(tmp_path):
+    with use_cassette(tmp_path / "run.jsonl", MODE_RECORD):
+        other = threading.Thread(target=echo, args=("other thread",))
+        other.start()
+        other.join()
+        echo("run thread")
+
+    assert recorded_values(tmp_path / "run.jsonl") == ["run thread"]
+    assert echo("no cassette") == "no cassette"
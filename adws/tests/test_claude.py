@@ -0,0 +1,37 @@
+"""Rate-limit detection in Claude CLI output."""
+import json
+
+import pytest
+
+from utils.claude import is_rate_limit_error
+
+
+def error_result(message, **fields):
+    return json.dumps({"type": "result", "is_error": True, "result": message, **fields})
+
+
+@pytest.mark.parametrize("stdout, stderr", [
+    (error_result("API Error: 429 Too Many Requests"), ""),
+    (error_result('API Error: 529 {"type":"error","error":{"type":"overloaded_error"}}'), ""),
+    (error_result("request failed", api_error_status=429), ""),
+    (error_result("request failed", error={"type": "rate_limit_error"}), ""),
+    ("", 'Error: {"status": 429, "message": "slow down"}'),
+    ("", "HTTP/1.1 529 Overloaded"),
+    ("", "Request was rate limited, retry later"),
+    ("", "Rate limit exceeded"),
+])
+def test_rate_limits_are_detected(stdout, stderr):
+    assert is_rate_limit_error(stdout, stderr)
+
+
+@pytest.mark.parametrize("stdout, stderr", [
+    (error_result("Tests failed: 429 passed, 3 failed"), ""),
+    (error_result("Type error in src/app.ts(1529,4)"), ""),
+    (error_result("commit 4295290 not found"), ""),
+    ("", "Error at line 529: unexpected token"),
+    ("", "issue #429 could not be parsed"),
+    (error_result("The server is overloaded with work items"), ""),
+    ("not json 5290", ""),
+])
+def test_digits_and_prose_are_not_rate_limits(stdout, stderr):
+    assert not is_rate_limit_error(stdout, stderr)
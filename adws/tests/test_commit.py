@@ -0,0 +1,35 @@
+"""COMMIT takes only the run's change set and the issue's spec."""
+import commit
+from utils.git import GitSession
+
+from conftest import git
+
+
+class FakeCoordinator:
+    def submit(self, issue_number, commit_sha, commit_message):
+        return commit_sha
+
+
+def test_commit_phase_leaves_out_files_staged_by_others(remote_repo, monkeypatch):
+    checkout = remote_repo("checkout")
+    monkeypatch.setenv("ADW_REPO_ROOT", str(checkout))
+    monkeypatch.setattr(commit, "get_push_coordinator", lambda git: FakeCoordinator())
+    monkeypatch.setattr(commit, "close_issue", lambda issue_number, comment: None)
+
+    session = GitSession(checkout, fold_spec_commit=True)
+    spec = checkout / "specs" / "issue-5-thing.md"
+    spec.parent.mkdir()
+    spec.write_text("# Spec\n")
+    session.record_spec(spec, 5)
+    (checkout / "theirs.txt").write_text("staged by someone else\n")
+    git(checkout, "add", "theirs.txt")
+    session.start_change_set()
+    (checkout / "ours.txt").write_text("the run's change\n")
+
+    issue = {"number": 5, "title": "feat: thing", "labels": []}
+    result = commit.run_commit_phase(5, {"attempts": 1}, git=session, issue=issue)
+
+    assert result["files"] == ["ours.txt"]
+    committed = git(checkout, "show", "--name-only", "--format=", "HEAD").splitlines()
+    assert sorted(committed) == ["ours.txt", "specs/issue-5-thing.md"]
+    assert git(checkout, "diff", "--cached", "--name-only") == "theirs.txt"
@@ -0,0 +1,69 @@
+"""Config caching and path resolution."""
+import logging
+from pathlib import Path
+
+import yaml
+
+from full_cycle import get_state_path
+from utils import config
+from utils.logs import setup_logging
+
+
+def count_parses(monkeypatch):
+    calls = []
+    real = yaml.safe_load
+
+    def counting(stream):
+        calls.append(1)
+        return real(stream)
+
+    monkeypatch.setattr(yaml, "safe_load", counting)
+    monkeypatch.setattr(config, "_cache", None)
+    return calls
+
+
+def test_config_is_parsed_once_per_key(monkeypatch):
+    calls = count_parses(monkeypatch)
+
+    first = config.load_config()
+    second = config.load_config()
+
+    assert len(calls) == 1
+    assert first == second
+    assert config._cache[0][1:] == (config.get_repo_root(), config.get_state_root())
+
+
+def test_callers_get_their_own_copy(monkeypatch):
+    count_parses(monkeypatch)
+
+    config.load_config()["paths"]["state"] = "mutated"
+
+    assert config.load_config()["paths"]["state"] != "mutated"
+
+
+def test_state_root_change_reparses_and_resolves_state_paths(monkeypatch, tmp_path):
+    calls = count_parses(monkeypatch)
+    config.load_config()
+
+    monkeypatch.setenv("ADW_STATE_ROOT", str(tmp_path))
+    loaded = config.load_config()
+
+    assert len(calls) == 2
+    assert Path(loaded["paths"]["state"]).is_relative_to(tmp_path)
+    assert Path(loaded["paths"]["logs"]).is_relative_to(tmp_path)
+    assert not Path(loaded["paths"]["specs"]).is_relative_to(tmp_path)
+
+
+def test_state_files_and_logs_follow_the_state_root(state_root):
+    assert get_state_path(7) == state_root / "adws" / "state" / "issue-7.json"
+
+    root = logging.getLogger()
+    saved = root.handlers[:]
+    root.handlers = []
+    try:
+        setup_logging("test.log")
+        assert (state_root / "adws" / "logs" / "test.log").exists()
+    finally:
+        for handler in root.handlers:
+            handler.close()
+        root.handlers = saved
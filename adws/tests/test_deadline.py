@@ -0,0 +1,42 @@
+"""Waiting for shared locks under a run deadline."""
+import threading
+import time
+
+import pytest
+
+from utils.deadline import Deadline, RunCancelledError, holding
+
+
+def test_lock_wait_is_not_charged_to_the_deadline():
+    lock = threading.Semaphore(1)
+    lock.acquire()
+    threading.Timer(0.7, lock.release).start()
+    deadline = Deadline(1.5, issue_number=1)
+
+    deadline.acquire(lock)
+    lock.release()
+
+    # The wait outlasted the deadline, which still has its time left
+    deadline.check()
+    assert deadline.remaining() > 1.2
+
+
+def test_cancelled_run_stops_waiting():
+    lock = threading.Semaphore(1)
+    lock.acquire()
+    deadline = Deadline(0, issue_number=1)
+    threading.Timer(0.2, deadline.cancel, args=("test",)).start()
+
+    started = time.monotonic()
+    with pytest.raises(RunCancelledError):
+        with holding(lock, deadline):
+            pass
+    assert time.monotonic() - started < 5
+
+
+def test_paused_deadline_does_not_expire():
+    deadline = Deadline(1.5, issue_number=1)
+    deadline.pause()
+    time.sleep(0.7)
+    deadline.resume()
+    deadline.check()
@@ -0,0 +1,122 @@
+"""Dependency snapshot builds under concurrency and hydration isolation."""
+import json
+import os
+import shutil
+import stat
+import threading
+
+import pytest
+
+from utils.deps import SnapshotCache, get_snapshot_cache
+
+FAKE_NPM = """#!/bin/sh
+# npm ci stand-in: slow enough for concurrent builds to overlap
+echo run >> "{counter}"
+sleep 0.3
+mkdir -p node_modules/left-pad
+echo "module.exports = 1" > node_modules/left-pad/index.js
+"""
+
+
+@pytest.fixture
+def fake_npm(tmp_path, monkeypatch):
+    """Put an ``npm`` that counts its runs first on PATH; returns the counter file."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    counter = tmp_path / "npm-runs"
+    npm = bin_dir / "npm"
+    npm.write_text(FAKE_NPM.format(counter=counter))
+    npm.chmod(npm.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return counter
+
+
+def make_workspace(path, lock="{}"):
+    path.mkdir()
+    (path / "package.json").write_text(json.dumps({"name": "app"}))
+    (path / "package-lock.json").write_text(lock)
+    return path
+
+
+def test_concurrent_builds_of_one_key_run_npm_once(tmp_path, fake_npm):
+    cache = SnapshotCache(tmp_path / "cache", 1 << 30, ["copy"], install_timeout=60)
+    workspaces = [make_workspace(tmp_path / f"ws{i}") for i in range(3)]
+    keys, errors = [], []
+
+    def build(workspace):
+        try:
+            keys.append(cache.ensure_snapshot(workspace))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=build, args=(ws,)) for ws in workspaces]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(set(keys)) == 1 and cache.has_snapshot(keys[0])
+    assert fake_npm.read_text().count("run") == 1
+
+
+def test_leftover_partial_snapshot_is_replaced(tmp_path, fake_npm):
+    cache = SnapshotCache(tmp_path / "cache", 1 << 30, ["copy"], install_timeout=60)
+    workspace = make_workspace(tmp_path / "ws")
+    key = cache.ensure_snapshot(workspace)
+    # A build that died after the rename but before writing its metadata
+    (cache.cache_dir / key / "snapshot.json").unlink()
+
+    assert cache.ensure_snapshot(workspace) == key
+    assert cache.has_snapshot(key)
+
+
+def test_default_hydration_does_not_share_files_with_snapshot(tmp_path, fake_npm):
+    cache = get_snapshot_cache()
+    assert "hardlink" not in cache.methods
+
+    workspace = make_workspace(tmp_path / "ws")
+    report = cache.hydrate(workspace)
+    hydrated = workspace / "node_modules" / "left-pad" / "index.js"
+    hydrated.write_text("patched")
+
+    snapshot_file = cache.cache_dir / report["key"] / "node_modules" / "left-pad" / "index.js"
+    assert snapshot_file.read_text() == "module.exports = 1\n"
+
+
+def test_eviction_skips_snapshots_in_use(tmp_path, fake_npm):
+    cache = SnapshotCache(tmp_path / "cache", 1 << 30, ["copy"], install_timeout=60)
+    first = cache.ensure_snapshot(make_workspace(tmp_path / "ws1", '{"v": 1}'))
+    second = cache.ensure_snapshot(make_workspace(tmp_path / "ws2", '{"v": 2}'))
+    cache.max_bytes = 0
+
+    # A hydration from the first snapshot in progress
+    with cache._key_lock(first, shared=True):
+        assert cache.evict(keep=second) == []
+        assert cache.has_snapshot(first)
+
+    assert cache.evict(keep=second) == [first]
+    assert not cache.has_snapshot(first)
+
+
+def test_hydration_rebuilds_a_snapshot_evicted_meanwhile(tmp_path, fake_npm, monkeypatch):
+    cache = SnapshotCache(tmp_path / "cache", 1 << 30, ["copy"], install_timeout=60)
+    workspace = make_workspace(tmp_path / "ws")
+    key = cache.ensure_snapshot(workspace)
+    real_ensure = cache.ensure_snapshot
+    calls = []
+
+    def ensure_then_evict(source_root, deadline=None):
+        result = real_ensure(source_root, deadline)
+        if not calls:
+            # Evicted by another process between the build and the hydration
+            with cache._key_lock(key):
+                shutil.rmtree(cache.cache_dir / key)
+        calls.append(result)
+        return result
+
+    monkeypatch.setattr(cache, "ensure_snapshot", ensure_then_evict)
+    report = cache.hydrate(workspace)
+
+    assert report["key"] == key and len(calls) == 2
+    assert (workspace / "node_modules" / "left-pad" / "index.js").exists()
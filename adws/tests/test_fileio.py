@@ -0,0 +1,27 @@
+"""Permissions of atomically written files."""
+import os
+import stat
+
+from utils import fileio
+from utils.fileio import atomic_write_text
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_file_gets_umask_default(tmp_path):
+    path = tmp_path / "new.json"
+    atomic_write_text(path, "{}")
+    assert mode(path) == 0o666 & ~fileio._UMASK
+
+
+def test_replaced_file_keeps_its_mode(tmp_path):
+    path = tmp_path / "script.sh"
+    path.write_text("#!/bin/sh\n")
+    os.chmod(path, 0o755)
+
+    atomic_write_text(path, "#!/bin/sh\necho hi\n")
+
+    assert mode(path) == 0o755
+    assert path.read_text() == "#!/bin/sh\necho hi\n"
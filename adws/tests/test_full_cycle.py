@@ -0,0 +1,27 @@
+"""Resuming a run from saved state."""
+import build
+import full_cycle
+from utils.claude import get_session
+
+
+def test_resume_does_not_continue_the_previous_conversation(monkeypatch, tmp_path):
+    issue_number = 9201
+    session = get_session(issue_number)
+    session.session_id = "earlier-run"
+    spec = tmp_path / "issue-9201-spec.md"
+    spec.write_text("# Spec\n")
+    monkeypatch.setattr(full_cycle, "find_resumable_spec", lambda n: spec)
+
+    seen = {}
+
+    def fake_build(issue_number, spec_path, deadline=None, git=None):
+        seen["session_id"] = get_session(issue_number).session_id
+        raise RuntimeError("stop after BUILD starts")
+
+    monkeypatch.setattr(build, "run_build_phase", fake_build)
+
+    result = full_cycle.run_full_cycle(issue_number, resume=True)
+
+    assert seen == {"session_id": None}
+    assert result["phase"] == "PLAN"
+    assert result["spec_path"] == str(spec)
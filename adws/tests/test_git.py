@@ -0,0 +1,113 @@
+"""GitSession commands and spec commits."""
+import os
+import threading
+import time
+
+import pytest
+
+from utils.deadline import Deadline, RunCancelledError
+from utils.git import GitError, GitSession
+
+from conftest import git
+
+
+def test_record_spec_reports_whether_it_committed(remote_repo):
+    checkout = remote_repo("checkout")
+    spec = checkout / "specs" / "issue-7-spec.md"
+    spec.parent.mkdir()
+    spec.write_text("# Spec\n")
+    session = GitSession(checkout)
+
+    assert session.record_spec(spec, 7) is True
+    head = git(checkout, "rev-parse", "HEAD")
+
+    # A reused spec that is already committed leaves nothing to commit
+    assert session.record_spec(spec, 7) is False
+    assert git(checkout, "rev-parse", "HEAD") == head
+
+
+def test_record_spec_only_stages_when_folding(remote_repo):
+    checkout = remote_repo("checkout")
+    spec = checkout / "specs" / "issue-8-spec.md"
+    spec.parent.mkdir()
+    spec.write_text("# Spec\n")
+    session = GitSession(checkout, fold_spec_commit=True)
+
+    assert session.record_spec(spec, 8) is False
+    assert session.pending_spec == spec
+    assert git(checkout, "diff", "--cached", "--name-only") == "specs/issue-8-spec.md"
+
+
+@pytest.fixture
+def hanging_git(remote_repo, tmp_path, monkeypatch):
+    """A checkout, with a fake git on PATH whose every command hangs."""
+    checkout = remote_repo("checkout")
+    fake = tmp_path / "bin" / "git"
+    fake.parent.mkdir()
+    fake.write_text("#!/bin/sh\nsleep 60\n")
+    fake.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{fake.parent}:{os.environ['PATH']}")
+    return checkout
+
+
+def test_hung_git_command_is_killed(hanging_git):
+    started = time.monotonic()
+    with pytest.raises(GitError, match="timed out"):
+        GitSession(hanging_git).run(["fetch", "origin"], timeout=0.5)
+    assert time.monotonic() - started < 10
+
+
+def test_cancelled_run_kills_git_command(hanging_git):
+    deadline = Deadline(0, issue_number=1)
+    threading.Timer(0.3, deadline.cancel, args=("test",)).start()
+
+    with pytest.raises(RunCancelledError):
+        GitSession(hanging_git).run(["push", "origin", "HEAD:main"], deadline=deadline)
+
+
+def test_commit_leaves_out_files_staged_by_others(remote_repo):
+    checkout = remote_repo("checkout")
+    (checkout / "theirs.txt").write_text("staged before BUILD\n")
+    git(checkout, "add", "theirs.txt")
+    session = GitSession(checkout)
+    baseline = session.start_change_set()
+
+    (checkout / "ours.txt").write_text("the run's change\n")
+    files = session.add_changes(baseline)
+    assert files == ["ours.txt"]
+    session.commit("feat: ours", paths=files)
+
+    assert git(checkout, "show", "--name-only", "--format=", "HEAD") == "ours.txt"
+    assert git(checkout, "diff", "--cached", "--name-only") == "theirs.txt"
+
+
+def test_commit_with_unchanged_paths_has_nothing_to_commit(remote_repo):
+    checkout = remote_repo("checkout")
+    (checkout / "theirs.txt").write_text("staged\n")
+    git(checkout, "add", "theirs.txt")
+    head = git(checkout, "rev-parse", "HEAD")
+
+    assert GitSession(checkout).commit("feat: nothing", paths=["README.md"]) is None
+    assert GitSession(checkout).commit("feat: nothing", paths=[]) is None
+    assert git(checkout, "rev-parse", "HEAD") == head
+
+
+def test_record_spec_commits_only_the_spec_and_replaced_specs(remote_repo):
+    checkout = remote_repo("checkout")
+    specs = checkout / "specs"
+    specs.mkdir()
+    old = specs / "issue-9-old.md"
+    old.write_text("# Old\n")
+    git(checkout, "add", "specs")
+    git(checkout, "commit", "--quiet", "-m", "old spec")
+    (checkout / "theirs.txt").write_text("staged\n")
+    git(checkout, "add", "theirs.txt")
+
+    new = specs / "issue-9-new.md"
+    new.write_text("# New\n")
+    old.unlink()
+    assert GitSession(checkout).record_spec(new, 9, replaced=[old]) is True
+
+    committed = git(checkout, "show", "--name-status", "--format=", "HEAD").splitlines()
+    assert sorted(committed) == ["A\tspecs/issue-9-new.md", "D\tspecs/issue-9-old.md"]
+    assert git(checkout, "diff", "--cached", "--name-only") == "theirs.txt"
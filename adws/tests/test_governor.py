@@ -0,0 +1,37 @@
+"""Load and memory admission of node work."""
+import threading
+import time
+
+from utils import governor
+from utils.governor import RESOURCE_NODE, ResourceGovernor
+
+
+def make_governor(max_load_wait_seconds):
+    return ResourceGovernor(
+        limits={RESOURCE_NODE: 2},
+        max_load_per_cpu=1.0,
+        min_free_memory_mb=0,
+        rate_limit_backoff_seconds=0,
+        max_load_wait_seconds=max_load_wait_seconds,
+        poll_interval=0.05,
+    )
+
+
+def test_first_node_job_waits_for_load(monkeypatch):
+    load = {"value": 4.0}
+    monkeypatch.setattr(governor, "read_load_per_cpu", lambda: load["value"])
+    threading.Timer(0.3, load.update, kwargs={"value": 0.5}).start()
+
+    started = time.monotonic()
+    with make_governor(max_load_wait_seconds=30).slot(RESOURCE_NODE):
+        waited = time.monotonic() - started
+    assert 0.25 <= waited < 5
+
+
+def test_first_node_job_wait_is_bounded(monkeypatch):
+    monkeypatch.setattr(governor, "read_load_per_cpu", lambda: 4.0)
+
+    started = time.monotonic()
+    with make_governor(max_load_wait_seconds=0.3).slot(RESOURCE_NODE):
+        waited = time.monotonic() - started
+    assert 0.25 <= waited < 5
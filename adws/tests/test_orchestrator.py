@@ -0,0 +1,45 @@
+"""Batches start each issue as it enters the pipeline."""
+import orchestrator
+import plan
+
+
+def test_batch_starts_issues_as_they_enter_the_pipeline(monkeypatch):
+    events = []
+
+    def start_issue(issue_number, issue=None):
+        events.append(("start", issue_number))
+        if issue_number == 2:
+            return None, "closed"
+        return {"number": issue_number, "title": f"feat: {issue_number}"}, ""
+
+    def run_plan_phase(issue_number, **kwargs):
+        events.append(("plan", issue_number))
+        raise RuntimeError("stop after PLAN starts")
+
+    monkeypatch.setattr(orchestrator, "start_issue", start_issue)
+    monkeypatch.setattr(orchestrator, "finish_issue", lambda issue_number, state: None)
+    monkeypatch.setattr(plan, "run_plan_phase", run_plan_phase)
+
+    summaries = orchestrator.orchestrate_batch([1, 2, 3], parallelism=1)
+
+    # One PLAN worker: issue 3 is not started before issue 1 went through PLAN
+    assert events == [("start", 1), ("plan", 1), ("start", 2), ("start", 3), ("plan", 3)]
+    assert [s["outcome"] for s in summaries] == ["failed", "skipped", "failed"]
+    assert summaries[1]["detail"] == "closed"
+
+
+def test_cancelled_batch_does_not_start_more_issues(monkeypatch):
+    started = []
+
+    def start_issue(issue_number, issue=None):
+        started.append(issue_number)
+        return {"number": issue_number, "title": "feat: thing"}, ""
+
+    monkeypatch.setattr(orchestrator, "start_issue", start_issue)
+    monkeypatch.setattr(orchestrator, "cancel_requested", lambda: "received SIGTERM")
+
+    summaries = orchestrator.orchestrate_batch([1, 2], parallelism=1)
+
+    assert started == []
+    assert [s["outcome"] for s in summaries] == ["skipped", "skipped"]
+    assert summaries[0]["detail"] == "Batch cancelled: received SIGTERM"
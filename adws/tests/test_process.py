@@ -0,0 +1,27 @@
+"""Per-issue tool process metrics."""
+import sys
+
+from utils.deadline import Deadline
+from utils.process import process_metrics, release_process_metrics, start_tool, tool_name, wait_tool
+
+
+def run_tool(deadline):
+    command = [sys.executable, "-c", "pass"]
+    wait_tool(start_tool(command, deadline=deadline), command, deadline=deadline)
+
+
+def test_metrics_are_counted_per_issue():
+    first, second = Deadline(issue_number=9101), Deadline(issue_number=9102)
+    tool = tool_name([sys.executable])
+    try:
+        run_tool(first)
+        run_tool(second)
+        run_tool(second)
+
+        assert process_metrics(9101)[tool]["runs"] == 1
+        assert process_metrics(9102)[tool]["runs"] == 2
+        assert process_metrics()[tool]["runs"] >= 3
+    finally:
+        release_process_metrics(9101)
+        release_process_metrics(9102)
+    assert process_metrics(9101) == {}
@@ -0,0 +1,75 @@
+"""Push target resolution and SHA mapping after a rebase."""
+import pytest
+
+from conftest import git
+from utils.git import GitError, GitSession
+from utils.push import PushCoordinator, get_push_target
+
+
+def commit_file(repo, name, content, message):
+    (repo / name).write_text(content)
+    git(repo, "add", name)
+    git(repo, "commit", "--quiet", "-m", message)
+    return git(repo, "rev-parse", "HEAD")
+
+
+def test_push_target_defaults_to_upstream(remote_repo):
+    repo = remote_repo("a")
+    git(repo, "checkout", "--quiet", "-b", "feature")
+    git(repo, "push", "--quiet", "-u", "origin", "feature")
+
+    assert get_push_target(GitSession(repo)) == ("origin", "feature")
+
+
+def test_push_target_without_upstream_fails(remote_repo):
+    repo = remote_repo("a")
+    git(repo, "checkout", "--quiet", "-b", "local-only")
+
+    with pytest.raises(GitError, match="no upstream"):
+        get_push_target(GitSession(repo))
+
+
+def test_push_target_from_environment(remote_repo, monkeypatch):
+    repo = remote_repo("a")
+    git(repo, "checkout", "--quiet", "--detach")
+    monkeypatch.setenv("ADW_PUSH_REMOTE", "origin")
+    monkeypatch.setenv("ADW_PUSH_BRANCH", "main")
+
+    assert get_push_target(GitSession(repo)) == ("origin", "main")
+
+
+def test_push_goes_to_upstream_branch(remote_repo):
+    repo = remote_repo("a")
+    git(repo, "checkout", "--quiet", "-b", "feature")
+    git(repo, "push", "--quiet", "-u", "origin", "feature")
+    sha = commit_file(repo, "a.txt", "a\n", "feat: a (Issue #1)")
+
+    pushed = PushCoordinator(GitSession(repo), max_attempts=3).submit(1, sha, "feat: a (Issue #1)")
+
+    assert pushed == sha
+    assert git(repo, "rev-parse", "origin/feature") == sha
+    assert git(repo, "rev-parse", "origin/main") != sha
+
+
+def test_rejected_push_is_rebased_and_mapped_to_new_sha(remote_repo):
+    a, b = remote_repo("a"), remote_repo("b")
+    commit_file(b, "b.txt", "b\n", "feat: b (Issue #2)")
+    git(b, "push", "--quiet")
+    local_sha = commit_file(a, "a.txt", "a\n", "feat: a (Issue #1)")
+
+    pushed = PushCoordinator(GitSession(a), max_attempts=3).submit(1, local_sha, "feat: a (Issue #1)")
+
+    assert pushed != local_sha
+    assert pushed == git(a, "rev-parse", "origin/main")
+    assert git(a, "log", "-1", "--format=%s", pushed) == "feat: a (Issue #1)"
+
+
+def test_commit_dropped_by_rebase_is_an_error(remote_repo):
+    a, b = remote_repo("a"), remote_repo("b")
+    # The same change lands upstream first, so the rebase drops a's commit
+    commit_file(b, "same.txt", "same\n", "fix: upstream copy")
+    git(b, "push", "--quiet")
+    local_sha = commit_file(a, "same.txt", "same\n", "fix: same (Issue #3)")
+
+    with pytest.raises(GitError, match="not found after rebasing"):
+        PushCoordinator(GitSession(a), max_attempts=3).submit(3, local_sha, "fix: same (Issue #3)")
@@ -0,0 +1,42 @@
+"""The reconcile cursor advances only after issues were handled."""
+import pytest
+
+from utils import reconcile
+from utils.reconcile import Reconciler
+
+LABELS = {"processing": "processing", "completed": "completed", "needs_review": "needs-review"}
+
+
+@pytest.fixture
+def reconciler(tmp_path, monkeypatch):
+    calls = []
+
+    def list_open_issues(repo, since=None, page_size=100):
+        calls.append(since)
+        return [{"number": 1, "title": "feat: thing", "body": "Details", "labels": []}]
+
+    monkeypatch.setattr(reconcile, "list_open_issues", list_open_issues)
+    monkeypatch.setattr(reconcile, "is_issue_processable", lambda issue: (True, ""))
+    reconciler = Reconciler("owner/repo", tmp_path / "reconcile.json", LABELS, 60, 100)
+    reconciler.calls = calls
+    return reconciler
+
+
+def test_cursor_stays_until_advanced(reconciler):
+    assert [i["number"] for i in reconciler.find_pending()] == [1]
+    assert reconciler.load_cursor() is None
+
+    # Queueing failed: the next poll still starts from the old cursor
+    reconciler.find_pending()
+    assert reconciler.calls == [None, None]
+
+    reconciler.advance()
+    since = reconciler.load_cursor()
+    assert since is not None
+    reconciler.find_pending()
+    assert reconciler.calls[-1] == since
+
+
+def test_advance_without_poll_keeps_cursor(reconciler):
+    reconciler.advance()
+    assert reconciler.load_cursor() is None
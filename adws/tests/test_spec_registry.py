@@ -0,0 +1,28 @@
+"""Spec registry updates from concurrent processes."""
+import multiprocessing
+from pathlib import Path
+
+from utils.spec_registry import SpecRegistry
+
+
+def _register_range(path, start, count):
+    registry = SpecRegistry(path)
+    for number in range(start, start + count):
+        registry.register(number, Path(f"issue-{number}-spec.md"), f"hash-{number}")
+
+
+def test_processes_do_not_drop_each_other_entries(tmp_path):
+    path = tmp_path / "spec_registry.json"
+    processes = [
+        multiprocessing.Process(target=_register_range, args=(path, i * 100, 25)) for i in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    registry = SpecRegistry(path)
+    for i in range(4):
+        for number in range(i * 100, i * 100 + 25):
+            assert registry.lookup(number, f"hash-{number}") == f"issue-{number}-spec.md"
@@ -0,0 +1,26 @@
+"""Admin endpoints of the webhook listener."""
+import pytest
+
+webhook_listener = pytest.importorskip("webhook_listener")
+
+
+@pytest.fixture
+def client():
+    return webhook_listener.app.test_client()
+
+
+def test_admin_endpoints_are_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(webhook_listener, "ADMIN_TOKEN", "")
+
+    assert client.get("/admin/queue").status_code == 401
+    assert client.post("/admin/runs/1/cancel").status_code == 401
+
+
+def test_admin_endpoints_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(webhook_listener, "ADMIN_TOKEN", "secret")
+
+    assert client.get("/admin/queue").status_code == 401
+    assert client.get("/admin/queue", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("/admin/queue", headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert "queued" in response.get_json()
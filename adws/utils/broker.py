@@ -0,0 +1,519 @@
+"""Job brokers: where queued issues wait and how workers claim them.
+
+A worker claims an issue with a lease and renews it with heartbeats while
+the run goes on. A lease that is not renewed in time (the worker or its host
+died) expires and the issue is queued again, keeping its age, until it has
+been claimed ``broker.max_attempts`` times. Heartbeats also carry
+cancellation: a heartbeat for an issue whose cancellation was requested
+fails, and the worker stops the run.
+
+The implementations share the priority classes, aging and class caps of
+``scheduler.py``:
+
+- ``MemoryBroker``: in the listener's memory; its workers are the listener's
+  own threads.
+- ``FakeBroker``: a MemoryBroker on a manual clock, for tests of lease
+  expiry and of code using a broker.
+- ``SqliteBroker``: one SQLite file. The listener and ``worker.py``
+  processes that can open the file claim from it, so Jest and tsc runs
+  spread over several processes. Sharing the file across hosts depends on
+  the network filesystem's locking, which SQLite documents as unreliable on
+  many NFS and SMB setups; only do so on a filesystem whose POSIX locks are
+  known to work, with clocks in sync (leases are wall-clock times).
+"""
+import abc
+import json
+import logging
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .config import load_config
+from .scheduler import IssueQueue, effective_priority, queue_entry
+
+logger = logging.getLogger(__name__)
+
+
+class Broker(abc.ABC):
+    """Interface of a job broker (see MemoryBroker and SqliteBroker)."""
+
+    @abc.abstractmethod
+    def put(self, issue: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Queue an issue unless it is already queued or running.
+
+        Returns:
+            The queue entry, or None if the issue was a duplicate
+        """
+
+    def put_many(self, issues: List[Dict[str, Any]]) -> int:
+        """Queue several issues and return how many were new."""
+        return sum(1 for issue in issues if self.put(issue) is not None)
+
+    @abc.abstractmethod
+    def claim(self, worker_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Take the best eligible issue under a lease, waiting for one.
+
+        Args:
+            worker_id: Unique id of the claiming worker (host, pid, thread)
+            timeout: Max seconds to wait (None waits forever)
+
+        Returns:
+            Queue entry with "worker", "lease_expires_at" and "attempts",
+            or None on timeout
+        """
+
+    @abc.abstractmethod
+    def heartbeat(self, issue_number: int, worker_id: str) -> bool:
+        """Renew a worker's lease on an issue.
+
+        Returns:
+            False if the worker no longer holds the lease or cancellation was
+            requested; the worker must then stop the run
+        """
+
+    @abc.abstractmethod
+    def complete(self, issue_number: int, worker_id: str) -> None:
+        """Remove a finished issue, if the worker still holds its lease."""
+
+    @abc.abstractmethod
+    def remove(self, issue_number: int) -> bool:
+        """Drop a queued (not yet claimed) issue and return whether it was queued."""
+
+    @abc.abstractmethod
+    def request_cancel(self, issue_number: int) -> bool:
+        """Ask the worker running an issue to stop it (at its next heartbeat).
+
+        Returns:
+            True if the issue is running
+        """
+
+    @abc.abstractmethod
+    def requeue_expired(self) -> int:
+        """Queue issues whose lease expired again and return how many."""
+
+    @abc.abstractmethod
+    def locate(self, issue_number: int) -> Optional[Dict[str, Any]]:
+        """Return {"state": "queued"|"running", "worker"} of an issue, or None."""
+
+    @abc.abstractmethod
+    def depth(self) -> int:
+        """Return the number of queued (not yet claimed) issues."""
+
+    @abc.abstractmethod
+    def running_count(self) -> int:
+        """Return the number of claimed issues, on all workers."""
+
+    @abc.abstractmethod
+    def snapshot(self) -> Dict[str, Any]:
+        """Return queued issues in dispatch order plus running issues."""
+
+
+def _requeue_or_drop(entry: Dict[str, Any], max_attempts: int) -> bool:
+    """Log an expired lease; return whether the issue gets another attempt."""
+    if entry["cancel_requested"]:
+        logger.warning(f"Lease of {entry['worker']} on cancelled issue #{entry['issue_number']} expired, dropping it")
+        return False
+    if entry["attempts"] >= max_attempts:
+        logger.error(f"Lease of {entry['worker']} on issue #{entry['issue_number']} expired; "
+                     f"dropping it after {entry['attempts']} attempt(s)")
+        return False
+    logger.warning(f"Lease of {entry['worker']} on issue #{entry['issue_number']} expired, re-queueing")
+    return True
+
+
+class MemoryBroker(IssueQueue, Broker):
+    """In-process broker: an IssueQueue whose running issues hold leases."""
+
+    def __init__(
+        self,
+        aging_seconds: float,
+        class_caps: Dict[str, int],
+        lease_seconds: float,
+        max_attempts: int,
+        clock: Callable[[], float] = time.time
+    ):
+        """Create a broker.
+
+        Args:
+            aging_seconds: Waiting time that raises an issue by one priority class
+            class_caps: Max concurrently running issues per commit type
+            lease_seconds: Lease granted by a claim or heartbeat
+            max_attempts: Claims of one issue before an expired lease drops it
+            clock: Wall-clock time source for leases
+        """
+        super().__init__(aging_seconds, class_caps)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._clock = clock
+
+    def claim(self, worker_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        stop = None if timeout is None else time.monotonic() + timeout
+        while True:
+            self.requeue_expired()
+            wait = 1.0 if stop is None else min(1.0, max(0.0, stop - time.monotonic()))
+            entry = self.get(timeout=wait)
+            if entry is not None:
+                with self._cond:
+                    entry["worker"] = worker_id
+                    entry["lease_expires_at"] = self._clock() + self.lease_seconds
+                    entry["attempts"] = entry.get("attempts", 0) + 1
+                    entry["cancel_requested"] = False
+                return entry
+            if stop is not None and time.monotonic() >= stop:
+                return None
+
+    def heartbeat(self, issue_number: int, worker_id: str) -> bool:
+        with self._cond:
+            entry = self._running.get(issue_number)
+            if entry is None or entry.get("worker") != worker_id or entry["cancel_requested"]:
+                return False
+            entry["lease_expires_at"] = self._clock() + self.lease_seconds
+            return True
+
+    def complete(self, issue_number: int, worker_id: str) -> None:
+        with self._cond:
+            entry = self._running.get(issue_number)
+            if entry is not None and entry.get("worker") == worker_id:
+                del self._running[issue_number]
+                self._cond.notify_all()
+
+    def request_cancel(self, issue_number: int) -> bool:
+        with self._cond:
+            entry = self._running.get(issue_number)
+            if entry is None:
+                return False
+            entry["cancel_requested"] = True
+            return True
+
+    def requeue_expired(self) -> int:
+        now = self._clock()
+        requeued = 0
+        with self._cond:
+            for issue_number, entry in list(self._running.items()):
+                if entry.get("lease_expires_at", now) >= now:
+                    continue
+                del self._running[issue_number]
+                if _requeue_or_drop(entry, self.max_attempts):
+                    self._queued[issue_number] = entry
+                    requeued += 1
+            if requeued:
+                self._cond.notify_all()
+        return requeued
+
+    def locate(self, issue_number: int) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            if issue_number in self._queued:
+                return {"state": "queued", "worker": None}
+            entry = self._running.get(issue_number)
+            if entry is not None:
+                return {"state": "running", "worker": entry.get("worker")}
+        return None
+
+
+class FakeBroker(MemoryBroker):
+    """In-memory broker on a manual clock, for tests.
+
+    Leases expire only when the test moves the clock with advance(), so
+    expiry and re-claiming are tested without sleeping.
+    """
+
+    def __init__(
+        self,
+        lease_seconds: float = 60,
+        max_attempts: int = 3,
+        class_caps: Optional[Dict[str, int]] = None,
+        aging_seconds: float = 600
+    ):
+        """Create a fake broker whose clock starts at the current time.
+
+        Args:
+            lease_seconds: Lease granted by a claim or heartbeat
+            max_attempts: Claims of one issue before an expired lease drops it
+            class_caps: Max concurrently running issues per commit type
+            aging_seconds: Waiting time that raises an issue by one priority class
+        """
+        self.now = time.time()
+        super().__init__(aging_seconds, class_caps or {}, lease_seconds, max_attempts,
+                         clock=lambda: self.now)
+
+    def advance(self, seconds: float) -> None:
+        """Move the lease clock forward."""
+        self.now += seconds
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    issue_number INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    class TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    enqueued_at REAL NOT NULL,
+    issue TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    started_at REAL,
+    lease_expires_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cancel_requested INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+class SqliteBroker(Broker):
+    """Broker in a SQLite file shared by the workers of several processes or hosts."""
+
+    def __init__(
+        self,
+        path: Path,
+        aging_seconds: float,
+        class_caps: Dict[str, int],
+        lease_seconds: float,
+        max_attempts: int,
+        poll_seconds: float,
+        clock: Callable[[], float] = time.time
+    ):
+        """Open (or create) the broker database.
+
+        Args:
+            path: SQLite database file
+            aging_seconds: Waiting time that raises an issue by one priority class
+            class_caps: Max concurrently running issues per commit type
+            lease_seconds: Lease granted by a claim or heartbeat
+            max_attempts: Claims of one issue before an expired lease drops it
+            poll_seconds: How often a waiting claim looks for work
+            clock: Wall-clock time source for leases
+        """
+        self.path = path
+        self.aging_seconds = aging_seconds
+        self.class_caps = dict(class_caps)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self._clock = clock
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # A connection per call: connections are not shared between threads,
+        # and BEGIN IMMEDIATE makes each call one writer-exclusive step
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        # Read-only queries (depth() runs on every webhook) take only a shared
+        # lock, so they do not queue behind claims and heartbeats for the
+        # write lock
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("BEGIN DEFERRED")
+            try:
+                yield conn
+            finally:
+                conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _entry(row: sqlite3.Row) -> Dict[str, Any]:
+        entry = dict(row)
+        entry["issue"] = json.loads(entry["issue"])
+        entry["cancel_requested"] = bool(entry["cancel_requested"])
+        return entry
+
+    def put(self, issue: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        entry = queue_entry(issue)
+        with self._transaction() as conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO jobs (issue_number, title, class, priority, enqueued_at, issue) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (entry["issue_number"], entry["title"], entry["class"], entry["priority"],
+                 entry["enqueued_at"], json.dumps(issue))
+            ).rowcount
+        if not inserted:
+            logger.info(f"Issue #{entry['issue_number']} already queued or running")
+            return None
+        logger.info(f"Queued issue #{entry['issue_number']} (class={entry['class']}, "
+                    f"priority={entry['priority']})")
+        return entry
+
+    def _requeue_expired(self, conn: sqlite3.Connection) -> int:
+        now = self._clock()
+        expired = conn.execute(
+            "SELECT * FROM jobs WHERE state = 'running' AND lease_expires_at < ?", (now,)
+        ).fetchall()
+        requeued = 0
+        for row in expired:
+            if _requeue_or_drop(dict(row), self.max_attempts):
+                conn.execute(
+                    "UPDATE jobs SET state = 'queued', worker = NULL, started_at = NULL, "
+                    "lease_expires_at = NULL, cancel_requested = 0 WHERE issue_number = ?",
+                    (row["issue_number"],)
+                )
+                requeued += 1
+            else:
+                conn.execute("DELETE FROM jobs WHERE issue_number = ?", (row["issue_number"],))
+        return requeued
+
+    def _claim_one(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        with self._transaction() as conn:
+            self._requeue_expired(conn)
+            running = dict(conn.execute(
+                "SELECT class, COUNT(*) FROM jobs WHERE state = 'running' GROUP BY class"
+            ).fetchall())
+            now = self._clock()
+            queued = sorted(
+                (dict(row) for row in conn.execute(
+                    "SELECT issue_number, class, priority, enqueued_at FROM jobs WHERE state = 'queued'"
+                )),
+                key=lambda e: (effective_priority(e, now, self.aging_seconds), e["enqueued_at"])
+            )
+            for candidate in queued:
+                cap = self.class_caps.get(candidate["class"])
+                if cap is not None and running.get(candidate["class"], 0) >= cap:
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET state = 'running', worker = ?, started_at = ?, "
+                    "lease_expires_at = ?, attempts = attempts + 1 WHERE issue_number = ?",
+                    (worker_id, now, now + self.lease_seconds, candidate["issue_number"])
+                )
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE issue_number = ?", (candidate["issue_number"],)
+                ).fetchone()
+                return self._entry(row)
+        return None
+
+    def claim(self, worker_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        stop = None if timeout is None else time.monotonic() + timeout
+        while True:
+            entry = self._claim_one(worker_id)
+            if entry is not None:
+                return entry
+            if stop is not None and time.monotonic() >= stop:
+                return None
+            wait = self.poll_seconds if stop is None else min(self.poll_seconds, stop - time.monotonic())
+            time.sleep(max(0.0, wait))
+
+    def heartbeat(self, issue_number: int, worker_id: str) -> bool:
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE issue_number = ? AND state = 'running' "
+                "AND worker = ? AND cancel_requested = 0",
+                (self._clock() + self.lease_seconds, issue_number, worker_id)
+            ).rowcount == 1
+
+    def complete(self, issue_number: int, worker_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE issue_number = ? AND state = 'running' AND worker = ?",
+                (issue_number, worker_id)
+            )
+
+    def remove(self, issue_number: int) -> bool:
+        with self._transaction() as conn:
+            removed = conn.execute(
+                "DELETE FROM jobs WHERE issue_number = ? AND state = 'queued'", (issue_number,)
+            ).rowcount == 1
+        if removed:
+            logger.info(f"Removed issue #{issue_number} from the queue")
+        return removed
+
+    def request_cancel(self, issue_number: int) -> bool:
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE issue_number = ? AND state = 'running'",
+                (issue_number,)
+            ).rowcount == 1
+
+    def requeue_expired(self) -> int:
+        with self._transaction() as conn:
+            return self._requeue_expired(conn)
+
+    def locate(self, issue_number: int) -> Optional[Dict[str, Any]]:
+        with self._read() as conn:
+            row = conn.execute(
+                "SELECT state, worker FROM jobs WHERE issue_number = ?", (issue_number,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def depth(self) -> int:
+        with self._read() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE state = 'queued'").fetchone()[0]
+
+    def running_count(self) -> int:
+        with self._read() as conn:
+            return conn.execute("SELECT COUNT(*) FROM jobs WHERE state = 'running'").fetchone()[0]
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = self._clock()
+        with self._read() as conn:
+            rows = [self._entry(row) for row in conn.execute("SELECT * FROM jobs")]
+        running_by_class: Dict[str, int] = {}
+        for e in rows:
+            if e["state"] == "running":
+                running_by_class[e["class"]] = running_by_class.get(e["class"], 0) + 1
+
+        queued = [
+            {
+                "issue": e["issue_number"],
+                "title": e["title"],
+                "class": e["class"],
+                "priority": e["priority"],
+                "effective_priority": round(effective_priority(e, now, self.aging_seconds), 3),
+                "waiting_seconds": round(now - e["enqueued_at"], 1),
+                "capped": running_by_class.get(e["class"], 0) >= self.class_caps.get(e["class"], float("inf")),
+            }
+            for e in sorted(
+                (e for e in rows if e["state"] == "queued"),
+                key=lambda e: (effective_priority(e, now, self.aging_seconds), e["enqueued_at"])
+            )
+        ]
+        running = [
+            {
+                "issue": e["issue_number"],
+                "title": e["title"],
+                "class": e["class"],
+                "running_seconds": round(now - e["started_at"], 1),
+                "worker": e["worker"],
+                "lease_seconds_left": round(e["lease_expires_at"] - now, 1),
+            }
+            for e in rows if e["state"] == "running"
+        ]
+        return {"queued": queued, "running": running, "caps": dict(self.class_caps)}
+
+
+def create_broker() -> Broker:
+    """Create the broker selected by ``broker.backend``.
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    config = load_config()
+    settings = config["broker"]
+    scheduling = config["scheduling"]
+    common = {
+        "aging_seconds": scheduling["aging_seconds"],
+        "class_caps": scheduling.get("class_caps") or {},
+        "lease_seconds": settings["lease_seconds"],
+        "max_attempts": settings["max_attempts"],
+    }
+    if settings["backend"] == "memory":
+        return MemoryBroker(**common)
+    if settings["backend"] == "sqlite":
+        return SqliteBroker(Path(config["paths"]["broker_db"]), poll_seconds=settings["poll_seconds"], **common)
+    raise ValueError(f"Unknown broker backend: {settings['backend']}")
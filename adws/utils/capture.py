@@ -0,0 +1,237 @@
+"""Bounded capture of child process output.
+
+``subprocess.run(capture_output=True)`` keeps everything a child writes in
+memory until it exits. ``run_captured`` streams each pipe instead: the full
+output goes to an artifact file under ``logs/artifacts/`` and only a tail of
+each stream (at most twice ``capture.max_bytes``) stays in memory, so memory
+per call is constant however verbose the child is (Jest, a long orchestrator
+run). The
+result has the same shape as ``subprocess.run``'s, with the tails as
+``stdout``/``stderr``.
+"""
+import logging
+import subprocess
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+from .config import load_config
+from .deadline import Deadline, RunCancelledError
+from .process import interrupt_tool, start_tool, wait_tool
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class CapturedProcess(subprocess.CompletedProcess):
+    """CompletedProcess whose output is a bounded tail of the full output."""
+
+    def __init__(
+        self,
+        args: Any,
+        returncode: int,
+        stdout: str,
+        stderr: str,
+        artifacts: Dict[str, Path],
+        truncated: bool
+    ):
+        super().__init__(args, returncode, stdout, stderr)
+        self.artifacts = artifacts
+        self.truncated = truncated
+
+    def full_stdout(self) -> str:
+        """Return the complete stdout, read back from its artifact if truncated."""
+        if not self.truncated or "stdout" not in self.artifacts:
+            return self.stdout
+        return self.artifacts["stdout"].read_text(errors="replace")
+
+
+class _StreamTail(threading.Thread):
+    """Copy a pipe to a file, keeping the last ``max_bytes`` in memory."""
+
+    def __init__(self, pipe: BinaryIO, path: Path, max_bytes: int):
+        super().__init__(daemon=True)
+        self.pipe = pipe
+        self.path = path
+        self.max_bytes = max_bytes
+        self.tail = bytearray()
+        self.total = 0
+
+    def run(self) -> None:
+        spill = None  # Opened on the first chunk: silent streams leave no file
+        try:
+            while True:
+                chunk = self.pipe.read1(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if spill is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    spill = open(self.path, "wb")
+                spill.write(chunk)
+                self.total += len(chunk)
+                self.tail += chunk
+                # Trimmed in amortized steps: many small writes (unbuffered
+                # stderr) would otherwise shift the whole tail per chunk
+                if len(self.tail) > 2 * self.max_bytes:
+                    del self.tail[:len(self.tail) - self.max_bytes]
+        finally:
+            if spill is not None:
+                spill.close()
+            self.pipe.close()
+
+    def text(self) -> str:
+        return self.tail[-self.max_bytes:].decode(errors="replace")
+
+
+def artifact_path(name: str, issue_number: Optional[int] = None) -> Path:
+    """Return a new artifact path for one captured call.
+
+    Args:
+        name: Kind of call (e.g. "npm-test")
+        issue_number: Issue of the run (groups its artifacts in one directory)
+
+    Returns:
+        ``logs/artifacts/[issue-N/]<name>-<time>-<id>`` (streams add a suffix)
+    """
+    directory = Path(load_config()["paths"]["logs"]) / "artifacts"
+    if issue_number is not None:
+        directory /= f"issue-{issue_number}"
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return directory / f"{name}-{stamp}-{uuid.uuid4().hex[:6]}"
+
+
+def run_captured(
+    command: List[str],
+    artifact: Path,
+    cwd: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+    check: bool = False,
+    merge_stderr: bool = False,
+    max_bytes: Optional[int] = None,
+    on_start: Optional[Callable[[subprocess.Popen], None]] = None,
+    deadline: Optional[Deadline] = None,
+    limits: bool = False
+) -> CapturedProcess:
+    """Run a command like ``subprocess.run(capture_output=True, text=True)``
+    with bounded memory.
+
+    The command runs in its own process group (see process.py): a timeout or
+    cancelled run kills its whole tree, and processes it leaves behind are
+    reaped.
+
+    Args:
+        command: Command and arguments
+        artifact: Base path from artifact_path; stdout is written to
+            ``<artifact>.log`` and stderr to ``<artifact>.stderr.log``
+            (only streams with output get a file)
+        cwd: Working directory
+        env: Environment (default: inherited)
+        timeout: Seconds before the child is killed
+        check: Raise CalledProcessError on a non-zero exit code
+        merge_stderr: Send stderr into the stdout stream (one ordered log)
+        max_bytes: In-memory tail per stream (default: ``capture.max_bytes``)
+        on_start: Called with the Popen once the child runs (e.g. to
+            register it for cancellation)
+        deadline: Run deadline; cancelling the run kills the tree
+        limits: Apply the ``processes`` niceness and rlimits
+
+    Returns:
+        CapturedProcess with the output tails and artifact paths
+
+    Raises:
+        FileNotFoundError: If the command does not exist
+        subprocess.TimeoutExpired: If the timeout expires (output holds the tails)
+        subprocess.CalledProcessError: If check is set and the command fails
+        RunCancelledError: If the run is cancelled while the command runs
+    """
+    if max_bytes is None:
+        max_bytes = load_config()["capture"]["max_bytes"]
+
+    process = start_tool(
+        command,
+        limits=limits,
+        deadline=deadline,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT if merge_stderr else subprocess.PIPE,
+        cwd=cwd,
+        env=env
+    )
+    if on_start:
+        on_start(process)
+
+    artifacts = {"stdout": artifact.with_name(f"{artifact.name}.log")}
+    readers = {"stdout": _StreamTail(process.stdout, artifacts["stdout"], max_bytes)}
+    if not merge_stderr:
+        artifacts["stderr"] = artifact.with_name(f"{artifact.name}.stderr.log")
+        readers["stderr"] = _StreamTail(process.stderr, artifacts["stderr"], max_bytes)
+    for reader in readers.values():
+        reader.start()
+
+    try:
+        returncode = wait_tool(process, command, timeout=timeout, deadline=deadline)
+    except subprocess.TimeoutExpired:
+        for reader in readers.values():
+            reader.join()
+        raise subprocess.TimeoutExpired(
+            command, timeout,
+            output=readers["stdout"].text(),
+            stderr=readers["stderr"].text() if "stderr" in readers else None
+        )
+    except RunCancelledError:
+        for reader in readers.values():
+            reader.join()
+        raise
+    except BaseException:
+        # Interrupted (e.g. KeyboardInterrupt): do not leave the tree behind
+        interrupt_tool(process)
+        raise
+    for reader in readers.values():
+        reader.join()
+
+    result = CapturedProcess(
+        command, returncode,
+        stdout=readers["stdout"].text(),
+        stderr=readers["stderr"].text() if "stderr" in readers else "",
+        artifacts={name: path for name, path in artifacts.items() if readers[name].total},
+        truncated=any(r.total > max_bytes for r in readers.values())
+    )
+    if result.truncated:
+        logger.info(f"Output of {command[0]} truncated in memory; full output in {artifact}.*")
+    if check and returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command, result.stdout, result.stderr)
+    return result
+
+
+def prune_artifacts(max_age_days: Optional[float] = None) -> int:
+    """Delete artifacts older than ``capture.retention_days``.
+
+    Returns:
+        Number of files removed
+    """
+    if max_age_days is None:
+        max_age_days = load_config()["capture"]["retention_days"]
+    root = Path(load_config()["paths"]["logs"]) / "artifacts"
+    if not root.exists():
+        return 0
+
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for path in root.rglob("*.log"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError:
+            continue
+    for directory in root.iterdir():
+        try:
+            if (directory.is_dir() and directory.stat().st_mtime < cutoff
+                    and not any(directory.iterdir())):
+                directory.rmdir()
+        except OSError:
+            continue
+    return removed
@@ -0,0 +1,288 @@
+"""Record and replay the external calls of a workflow run.
+
+A cassette is a JSON-lines file holding one interaction per line: which
+call was made (Claude, gh, npm test, ...), its arguments, its result or
+exception and how long it took. While recording, every function decorated
+with ``@recorded`` is executed and logged. While replaying, it is not
+executed: the next recorded interaction of the same kind is returned (or
+its exception re-raised) after sleeping the recorded duration times
+``time_scale``. Orchestration code between the calls runs for real, so its
+cost can be profiled and bisected without Claude, GitHub or npm.
+
+The active cassette is per thread: runs executing concurrently in one
+process (pipeline or batch mode) each record into their own cassette, and
+calls made on other threads are not routed through it.
+"""
+import functools
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+# The cassette of the current thread's run (attribute "cassette")
+_active = threading.local()
+
+
+class CassetteError(Exception):
+    """Raised when a cassette cannot be read or has no matching interaction."""
+    pass
+
+
+def _to_json(value: Any) -> Any:
+    """Round-trip a value through JSON (tuples become lists, paths strings)."""
+    return json.loads(json.dumps(value, default=str))
+
+
+def _exception_type(name: str) -> type:
+    module_name, _, class_name = name.rpartition(".")
+    try:
+        exc_type = getattr(importlib.import_module(module_name or "builtins"), class_name)
+    except (ImportError, AttributeError):
+        return RuntimeError
+    return exc_type if isinstance(exc_type, type) and issubclass(exc_type, Exception) else RuntimeError
+
+
+class Cassette:
+    """One run's recorded interactions."""
+
+    def __init__(self, path: Path, mode: str, time_scale: float = 1.0):
+        """Open a cassette.
+
+        Args:
+            path: JSON-lines cassette file
+            mode: MODE_RECORD (truncates the file) or MODE_REPLAY
+            time_scale: Replay only; multiplier for recorded call durations
+                (0 replays without waiting)
+
+        Raises:
+            CassetteError: If a cassette to replay is missing or empty
+        """
+        self.path = path
+        self.mode = mode
+        self.time_scale = time_scale
+        self.header: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+        if mode == MODE_RECORD:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("")
+        elif mode == MODE_REPLAY:
+            self._load()
+        else:
+            raise CassetteError(f"Unknown cassette mode: {mode}")
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            raise CassetteError(f"Cassette not found: {self.path}")
+        for line in self.path.read_text().splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Truncated last line of a killed recording
+            if record.get("type") == "header":
+                self.header = record
+            elif record.get("type") == "call":
+                self._pending.setdefault(record["kind"], []).append(record)
+        if not self._pending:
+            raise CassetteError(f"Cassette has no recorded calls: {self.path}")
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    def write_header(self, **fields: Any) -> None:
+        """Record run metadata (issue number, base SHA, ...) in the cassette."""
+        self.header = {"type": "header", "version": CASSETTE_VERSION,
+                       "recorded_at": time.time(), **fields}
+        self._append(self.header)
+
+    def _count(self, kind: str, recorded: float, actual: float, mismatch: bool) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                kind, {"calls": 0, "recorded_seconds": 0.0, "seconds": 0.0, "mismatches": 0}
+            )
+            stats["calls"] += 1
+            stats["recorded_seconds"] += recorded
+            stats["seconds"] += actual
+            stats["mismatches"] += int(mismatch)
+
+    def call(
+        self,
+        kind: str,
+        func: Callable,
+        request: Any,
+        args: tuple,
+        kwargs: dict,
+        decode: Optional[Callable[[Any], Any]]
+    ) -> Any:
+        """Execute and record, or replay, one call.
+
+        Args:
+            kind: Interaction kind (e.g. "claude")
+            func: The real function
+            request: JSON-able description of the arguments
+            args: Positional arguments for func
+            kwargs: Keyword arguments for func
+            decode: Converts a recorded result back to the function's type
+
+        Returns:
+            The function's (or recorded) result
+
+        Raises:
+            CassetteError: If replaying and no interaction of this kind is left
+        """
+        request = _to_json(request)
+        if self.mode == MODE_REPLAY:
+            return self._replay(kind, request, decode)
+
+        started = time.monotonic()
+        record = {"type": "call", "kind": kind, "request": request}
+        try:
+            result = func(*args, **kwargs)
+            record["result"] = _to_json(result)
+            return result
+        except Exception as e:
+            record["error"] = {
+                "type": f"{type(e).__module__}.{type(e).__qualname__}",
+                "message": str(e),
+            }
+            raise
+        finally:
+            record["seconds"] = round(time.monotonic() - started, 4)
+            self._append(record)
+            self._count(kind, record["seconds"], record["seconds"], False)
+
+    def _replay(self, kind: str, request: Any, decode: Optional[Callable[[Any], Any]]) -> Any:
+        with self._lock:
+            queue = self._pending.get(kind)
+            if not queue:
+                raise CassetteError(f"No recorded {kind} call left in {self.path}")
+            record = queue.pop(0)
+
+        mismatch = record["request"] != request
+        if mismatch:
+            logger.warning(f"Cassette: {kind} call differs from the recording")
+
+        started = time.monotonic()
+        if self.time_scale > 0:
+            time.sleep(record["seconds"] * self.time_scale)
+        self._count(kind, record["seconds"], time.monotonic() - started, mismatch)
+
+        if "error" in record:
+            raise _exception_type(record["error"]["type"])(record["error"]["message"])
+        result = record.get("result")
+        return decode(result) if decode else result
+
+    def remaining(self) -> Dict[str, int]:
+        """Return the number of recorded calls not yet replayed, by kind."""
+        with self._lock:
+            return {kind: len(q) for kind, q in self._pending.items() if q}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return calls, recorded/actual seconds and mismatches by kind."""
+        with self._lock:
+            return {
+                kind: {**s, "recorded_seconds": round(s["recorded_seconds"], 3),
+                       "seconds": round(s["seconds"], 3)}
+                for kind, s in self._stats.items()
+            }
+
+
+@contextmanager
+def use_cassette(path: Path, mode: str, time_scale: float = 1.0) -> Iterator[Cassette]:
+    """Route the current thread's ``@recorded`` calls through a cassette for the block's duration.
+
+    Args:
+        path: Cassette file
+        mode: MODE_RECORD or MODE_REPLAY
+        time_scale: Replay only; multiplier for recorded durations
+
+    Yields:
+        The active Cassette
+    """
+    cassette = Cassette(path, mode, time_scale)
+    previous = getattr(_active, "cassette", None)
+    _active.cassette = cassette
+    logger.info(f"Cassette {mode}: {path}")
+    try:
+        yield cassette
+    finally:
+        _active.cassette = previous
+
+
+def recorded(
+    kind: str,
+    describe: Optional[Callable[..., Any]] = None,
+    decode: Optional[Callable[[Any], Any]] = None
+) -> Callable:
+    """Decorate an external call so an active cassette records or replays it.
+
+    Without an active cassette on the calling thread the function runs unchanged.
+
+    Args:
+        kind: Interaction kind stored in the cassette
+        describe: Builds the recorded request from the call's arguments
+            (default: the positional and keyword arguments)
+        decode: Converts a replayed JSON result back (e.g. list -> tuple)
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cassette = getattr(_active, "cassette", None)
+            if cassette is None:
+                return func(*args, **kwargs)
+            request = describe(*args, **kwargs) if describe else {"args": args, "kwargs": kwargs}
+            return cassette.call(kind, func, request, args, kwargs, decode)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def record_run(
+    issue_number: int,
+    path: Optional[Path] = None,
+    issue: Optional[Dict[str, Any]] = None
+) -> Iterator[Optional[Cassette]]:
+    """Record one run's calls, to ``path`` or into ``$ADW_CASSETTE_DIR``.
+
+    Args:
+        issue_number: Issue being run (stored in the cassette header)
+        path: Cassette file (default: ``$ADW_CASSETTE_DIR/issue-N-<time>.jsonl``
+            when that variable is set, else nothing is recorded)
+        issue: Issue data the run was seeded with, so a replay is seeded the
+            same way instead of expecting a recorded fetch
+
+    Yields:
+        The recording Cassette, or None when not recording
+    """
+    if path is None:
+        directory = os.environ.get("ADW_CASSETTE_DIR")
+        if not directory:
+            yield None
+            return
+        path = Path(directory) / f"issue-{issue_number}-{int(time.time())}.jsonl"
+
+    from .config import get_repo_root
+    from .git import read_head_sha
+
+    with use_cassette(path, MODE_RECORD) as cassette:
+        cassette.write_header(
+            issue_number=issue_number,
+            base_sha=read_head_sha(get_repo_root()),
+            issue=issue
+        )
+        yield cassette
@@ -1,44 +1,174 @@
 """Claude CLI wrapper for invoking the agent."""
+import json
 import logging
 import os
+import re
 import subprocess
+import threading
+import time
 from pathlib import Path
-from typing import Optional
-
-from dotenv import load_dotenv
+from typing import Any, Callable, Dict, Iterable, Optional
 
+from .cassette import recorded
 from .config import load_config
-
-# Load environment variables from .env file
-env_path = Path(__file__).parent.parent / ".env"
-if env_path.exists():
-    load_dotenv(env_path)
+from .fileio import atomic_write_json, read_json
+from .usage import RunUsage, parse_usage
+from .deadline import Deadline, call_timeout
+from .capture import artifact_path, run_captured
+from .governor import (
+    RESOURCE_MODEL,
+    SIGNAL_OK,
+    SIGNAL_RATE_LIMIT,
+    SIGNAL_TIMEOUT,
+    get_governor,
+)
 
 logger = logging.getLogger(__name__)
 
+_env_loaded = False
+
+
+# Provider-side throttling: HTTP statuses and API error types
+RATE_LIMIT_STATUSES = (429, 529)
+RATE_LIMIT_ERROR_TYPES = ("rate_limit_error", "overloaded_error")
+# The same in error text; status codes only next to "status", "HTTP" or
+# "API Error", so ids, line numbers or test counts containing 429 do not match
+RATE_LIMIT_PATTERN = re.compile(
+    r"\b(?:rate_limit_error|overloaded_error)\b"
+    r"|\brate limit(?:ed| exceeded)\b"
+    r"|(?:\bstatus(?:[ _]code)?\"?\s*[:=]?\s*|\bHTTP(?:/[\d.]+)?\s+|\bAPI Error:\s*)(?:429|529)\b",
+    re.IGNORECASE
+)
+
 
 class ClaudeError(Exception):
     """Raised when Claude CLI operations fail."""
     pass
 
 
-def invoke_claude(
+def _has_rate_limit_fields(data: Dict[str, Any]) -> bool:
+    """Check the structured status/error fields of a JSON error result."""
+    for key in ("status", "status_code", "api_error_status"):
+        if data.get(key) in RATE_LIMIT_STATUSES:
+            return True
+    error = data.get("error")
+    if isinstance(error, dict):
+        return error.get("type") in RATE_LIMIT_ERROR_TYPES or _has_rate_limit_fields(error)
+    return error in RATE_LIMIT_ERROR_TYPES
+
+
+def is_rate_limit_error(stdout: str, stderr: str = "") -> bool:
+    """Check whether a failed CLI call was throttled by the provider.
+
+    The structured fields of the CLI's JSON output are checked first; error
+    text (the JSON result message, or plain output) only matches anchored
+    patterns such as ``rate_limit_error``, ``"status": 429`` or ``API Error:
+    529``, never a bare number.
+
+    Args:
+        stdout: stdout of the failed call (JSON or plain text)
+        stderr: stderr of the failed call
+
+    Returns:
+        True if the output is a rate-limit or overload response
+    """
+    text = stdout or ""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        if _has_rate_limit_fields(data):
+            return True
+        text = str(data.get("result") or "")
+    return RATE_LIMIT_PATTERN.search(f"{text}\n{stderr or ''}") is not None
+
+
+def load_env() -> None:
+    """Load environment variables from adws/.env once, on first Claude call."""
+    global _env_loaded
+
+    if _env_loaded:
+        return
+    _env_loaded = True
+
+    env_path = Path(__file__).parent.parent / ".env"
+    if env_path.exists():
+        from dotenv import load_dotenv
+        load_dotenv(env_path)
+
+
+def _decode_result(recorded: Any) -> Dict[str, Any]:
+    """Turn a cassette result into a run_claude result (old cassettes hold text)."""
+    if isinstance(recorded, dict):
+        return recorded
+    return {"text": recorded, "session_id": None, "usage": {}, "seconds": 0.0}
+
+
+def parse_cli_output(stdout: str) -> Dict[str, Any]:
+    """Parse ``claude -p --output-format json`` output.
+
+    Args:
+        stdout: CLI standard output
+
+    Returns:
+        Dict with "text" (the response), "session_id" and "usage" (see
+        usage.parse_usage); plain-text output (older CLIs) is returned as
+        text without a session or usage
+
+    Raises:
+        ClaudeError: If the CLI reports an error result
+    """
+    try:
+        data = json.loads(stdout)
+    except ValueError:
+        return {"text": stdout.strip(), "session_id": None, "usage": {}}
+    if not isinstance(data, dict):
+        return {"text": stdout.strip(), "session_id": None, "usage": {}}
+    if data.get("is_error"):
+        raise ClaudeError(f"Claude CLI returned an error: {data.get('result')}")
+    return {
+        "text": (data.get("result") or "").strip(),
+        "session_id": data.get("session_id"),
+        "usage": parse_usage(data),
+    }
+
+
+@recorded(
+    "claude",
+    describe=lambda prompt, timeout=None, cwd=None, resume=None, issue_number=None, deadline=None: {
+        "prompt": prompt, "resume": resume
+    },
+    decode=_decode_result
+)
+def run_claude(
     prompt: str,
     timeout: Optional[int] = None,
-    cwd: Optional[Path] = None
-) -> str:
-    """Invoke Claude CLI with a prompt.
+    cwd: Optional[Path] = None,
+    resume: Optional[str] = None,
+    issue_number: Optional[int] = None,
+    deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
+    """Invoke Claude CLI with a prompt, optionally continuing a session.
+
+    The CLI's output is captured with bounded memory; the full output is
+    kept as an artifact of the issue's run.
 
     Args:
         prompt: The prompt to send to Claude
         timeout: Timeout in seconds (default from config)
         cwd: Working directory (default: repo root)
+        resume: Session ID to resume instead of starting a new session
+        issue_number: Issue the call belongs to (names its artifact)
+        deadline: Run deadline; cancelling the run kills the CLI
 
     Returns:
-        Claude's response
+        Dict with "text" (Claude's response), "session_id", "usage" (token
+        counts and cost) and "seconds" (wall time of the call)
 
     Raises:
         ClaudeError: If Claude invocation fails
+        RunCancelledError: If the run is cancelled during the call
     """
     config = load_config()
 
@@ -49,32 +179,49 @@ def invoke_claude(
         from .config import get_repo_root
         cwd = get_repo_root()
 
+    governor = get_governor()
+
     try:
         logger.info("Invoking Claude CLI...")
         logger.debug(f"Prompt preview: {prompt[:200]}...")
 
         # Prepare environment with API key
+        load_env()
         env = os.environ.copy()
 
         # Ensure ANTHROPIC_API_KEY is available
         if not env.get('ANTHROPIC_API_KEY'):
             logger.warning("ANTHROPIC_API_KEY not found in environment")
 
-        result = subprocess.run(
-            ["claude", "-p", prompt],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=timeout,
-            cwd=str(cwd),
-            env=env  # Pass environment variables explicitly
-        )
+        command = ["claude", "-p", prompt, "--output-format", "json"]
+        if resume:
+            command += ["--resume", resume]
+
+        with governor.slot(RESOURCE_MODEL):
+            started = time.monotonic()
+            result = run_captured(
+                command,
+                artifact_path("claude", issue_number),
+                check=True,
+                timeout=timeout,
+                cwd=str(cwd),
+                env=env,  # Pass environment variables explicitly
+                deadline=deadline
+            )
+        stdout = result.full_stdout()
+        try:
+            response = parse_cli_output(stdout)
+        except ClaudeError:
+            if is_rate_limit_error(stdout):
+                governor.record_model_signal(SIGNAL_RATE_LIMIT)
+            raise
+        governor.record_model_signal(SIGNAL_OK)
+        response["seconds"] = round(time.monotonic() - started, 3)
 
-        output = result.stdout.strip()
-        logger.info(f"Claude response received ({len(output)} chars)")
-        logger.debug(f"Response preview: {output[:200]}...")
+        logger.info(f"Claude response received ({len(response['text'])} chars)")
+        logger.debug(f"Response preview: {response['text'][:200]}...")
 
-        return output
+        return response
 
     except subprocess.CalledProcessError as e:
         error_msg = f"Claude CLI failed with exit code {e.returncode}"
@@ -82,11 +229,14 @@ def invoke_claude(
         logger.error(f"STDERR: {e.stderr}")
         if e.stderr:
             error_msg += f": {e.stderr}"
+        if is_rate_limit_error(e.stdout, e.stderr):
+            governor.record_model_signal(SIGNAL_RATE_LIMIT)
         logger.error(error_msg)
         raise ClaudeError(error_msg) from e
 
     except subprocess.TimeoutExpired as e:
-        error_msg = f"Claude CLI timed out after {timeout}s"
+        error_msg = f"Claude CLI timed out after {timeout:.0f}s"
+        governor.record_model_signal(SIGNAL_TIMEOUT)
         logger.error(error_msg)
         raise ClaudeError(error_msg) from e
 
@@ -96,34 +246,70 @@ def invoke_claude(
         raise ClaudeError(error_msg) from e
 
 
-def invoke_claude_with_retry(
+def invoke_claude(
     prompt: str,
-    max_retries: Optional[int] = None,
-    timeout: Optional[int] = None
+    timeout: Optional[int] = None,
+    cwd: Optional[Path] = None
 ) -> str:
-    """Invoke Claude with retry logic.
+    """Invoke Claude CLI with a prompt in a new session.
 
     Args:
         prompt: The prompt to send to Claude
-        max_retries: Max retry attempts (default from config)
         timeout: Timeout in seconds (default from config)
+        cwd: Working directory (default: repo root)
 
     Returns:
         Claude's response
 
+    Raises:
+        ClaudeError: If Claude invocation fails
+    """
+    return run_claude(prompt, timeout=timeout, cwd=cwd)["text"]
+
+
+def run_claude_with_retry(
+    prompt: str,
+    max_retries: Optional[int] = None,
+    timeout: Optional[int] = None,
+    before_attempt: Optional[Callable[[], None]] = None,
+    deadline: Optional[Deadline] = None,
+    issue_number: Optional[int] = None
+) -> Dict[str, Any]:
+    """Invoke Claude in a new session with retry logic.
+
+    Args:
+        prompt: The prompt to send to Claude
+        max_retries: Max retry attempts (default from config)
+        timeout: Timeout in seconds per attempt (default from config)
+        before_attempt: Called before every attempt; may raise to stop
+            retrying (e.g. RunUsage.check)
+        deadline: Run deadline; each attempt gets at most the time left
+        issue_number: Issue the call belongs to (names its artifacts)
+
+    Returns:
+        Dict as from run_claude
+
     Raises:
         ClaudeError: If all retries fail
+        RunCancelledError: If the run is cancelled or out of time
     """
     config = load_config()
 
     if max_retries is None:
         max_retries = config["timeouts"]["max_retries"]
+    if timeout is None:
+        timeout = config["timeouts"]["claude_timeout_seconds"]
 
     last_error = None
 
     for attempt in range(max_retries):
+        if before_attempt:
+            before_attempt()
+        attempt_timeout = call_timeout(deadline, timeout)
         try:
-            return invoke_claude(prompt, timeout=timeout)
+            return run_claude(
+                prompt, timeout=attempt_timeout, issue_number=issue_number, deadline=deadline
+            )
         except ClaudeError as e:
             last_error = e
             logger.warning(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
@@ -131,3 +317,213 @@ def invoke_claude_with_retry(
                 logger.info("Retrying...")
 
     raise ClaudeError(f"All {max_retries} attempts failed. Last error: {last_error}")
+
+
+def invoke_claude_with_retry(
+    prompt: str,
+    max_retries: Optional[int] = None,
+    timeout: Optional[int] = None
+) -> str:
+    """Invoke Claude with retry logic.
+
+    Args:
+        prompt: The prompt to send to Claude
+        max_retries: Max retry attempts (default from config)
+        timeout: Timeout in seconds (default from config)
+
+    Returns:
+        Claude's response
+
+    Raises:
+        ClaudeError: If all retries fail
+    """
+    return run_claude_with_retry(prompt, max_retries=max_retries, timeout=timeout)["text"]
+
+
+def spec_reference(spec_path: Path) -> str:
+    """Stand-in for SPEC_CONTENT in prompts sent to a resumed session."""
+    return (
+        f"(The specification is the one written earlier in this conversation; "
+        f"it is saved at {spec_path}. Re-read that file only if you need it.)"
+    )
+
+
+class ClaudeSession:
+    """One Claude conversation continued across the phases of an issue.
+
+    Phases pass both their full prompt and a shorter prompt for a resumed
+    conversation (without context the session has already seen). The first
+    call, or any call after a failed resume, starts a new session with the
+    full prompt; per-phase metrics record how many prompt characters
+    resuming saved. Token usage of every call is accounted in ``usage`` and
+    checked against the run's token budget before each call.
+    """
+
+    def __init__(
+        self,
+        issue_number: int,
+        path: Path,
+        enabled: bool = True,
+        max_tokens: int = 0
+    ):
+        """Load (or start) the session of an issue.
+
+        Args:
+            issue_number: GitHub issue number
+            path: JSON file persisting the session between processes
+            enabled: Resume sessions; when False every call starts a new one
+            max_tokens: Token budget of a run (0 = unlimited)
+        """
+        self.issue_number = issue_number
+        self.path = path
+        self.enabled = enabled
+        self.max_tokens = max_tokens
+        self.session_id: Optional[str] = None
+        self.seen: set = set()
+        self.metrics: Dict[str, Dict[str, int]] = {}
+        self.usage = RunUsage(max_tokens)
+        self._lock = threading.Lock()
+
+        stored = read_json(path)
+        if isinstance(stored, dict):
+            self.session_id = stored.get("session_id")
+            self.seen = set(stored.get("seen") or [])
+            self.metrics = stored.get("metrics") or {}
+            if isinstance(stored.get("usage"), dict):
+                self.usage = RunUsage.from_dict(stored["usage"])
+
+    def start_run(self) -> None:
+        """Reset prompt metrics and usage for a new run of the issue."""
+        with self._lock:
+            self.metrics = {}
+            self.usage = RunUsage(self.max_tokens)
+            self._save()
+
+    def reset(self) -> None:
+        """Forget the issue's conversation; the next call starts a new session."""
+        with self._lock:
+            self.session_id = None
+            self.seen = set()
+            self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(self.path, {
+            "issue_number": self.issue_number,
+            "session_id": self.session_id,
+            "seen": sorted(self.seen),
+            "metrics": self.metrics,
+            "usage": self.usage.to_dict(),
+            "updated_at": time.time(),
+        })
+
+    def has_seen(self, context: str) -> bool:
+        """Check whether the current session already received a context block."""
+        return self.enabled and self.session_id is not None and context in self.seen
+
+    def _count(self, phase: str, full_prompt: str, sent_prompt: str, resumed: bool, fallback: bool) -> None:
+        stats = self.metrics.setdefault(phase, {
+            "calls": 0, "resumed": 0, "fallbacks": 0,
+            "prompt_chars": 0, "full_prompt_chars": 0, "saved_chars": 0,
+        })
+        stats["calls"] += 1
+        stats["resumed"] += int(resumed)
+        stats["fallbacks"] += int(fallback)
+        stats["prompt_chars"] += len(sent_prompt)
+        stats["full_prompt_chars"] += len(full_prompt)
+        stats["saved_chars"] += len(full_prompt) - len(sent_prompt)
+
+    def invoke(
+        self,
+        phase: str,
+        prompt: str,
+        resume_prompt: Optional[str] = None,
+        context: Iterable[str] = (),
+        new: bool = False,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """Send a phase's prompt, resuming the issue's session when possible.
+
+        Args:
+            phase: Phase name for metrics (e.g. "BUILD")
+            prompt: Full prompt for a new session
+            resume_prompt: Prompt for a resumed session (None: always new)
+            context: Context blocks (e.g. "repo_map") the prompt carries
+            new: Start a new session even if one exists (e.g. in PLAN)
+            deadline: Run deadline bounding every call and retry
+
+        Returns:
+            Claude's response
+
+        Raises:
+            ClaudeError: If the new-session call fails after all retries
+            BudgetExceededError: If the run's token budget is used up
+            RunCancelledError: If the run is cancelled or out of time
+        """
+        with self._lock:
+            fallback = False
+            if new:
+                self.session_id = None
+                self.seen = set()
+
+            self.usage.check()
+
+            if self.enabled and self.session_id and resume_prompt is not None:
+                try:
+                    timeout = call_timeout(deadline, load_config()["timeouts"]["claude_timeout_seconds"])
+                    response = run_claude(
+                        resume_prompt, timeout=timeout, resume=self.session_id,
+                        issue_number=self.issue_number, deadline=deadline
+                    )
+                    self.session_id = response["session_id"] or self.session_id
+                    self.seen.update(context)
+                    self.usage.record(phase, response.get("usage") or {},
+                                      response.get("seconds", 0.0), resumed=True)
+                    self._count(phase, prompt, resume_prompt, resumed=True, fallback=False)
+                    logger.info(
+                        f"{phase}: resumed session {self.session_id} "
+                        f"({len(prompt) - len(resume_prompt)} prompt chars saved)"
+                    )
+                    self._save()
+                    return response["text"]
+                except ClaudeError as e:
+                    logger.warning(f"{phase}: resuming session {self.session_id} failed, "
+                                   f"starting a new one: {e}")
+                    fallback = True
+
+            response = run_claude_with_retry(
+                prompt, before_attempt=self.usage.check, deadline=deadline,
+                issue_number=self.issue_number
+            )
+            self.session_id = response["session_id"]
+            self.seen = set(context)
+            self.usage.record(phase, response.get("usage") or {},
+                              response.get("seconds", 0.0), resumed=False)
+            self._count(phase, prompt, prompt, resumed=False, fallback=fallback)
+            self._save()
+            return response["text"]
+
+
+_sessions: Dict[int, ClaudeSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(issue_number: int) -> ClaudeSession:
+    """Return the process-wide Claude session of an issue.
+
+    Args:
+        issue_number: GitHub issue number
+
+    Returns:
+        ClaudeSession, loaded from ``state/sessions/`` on first use
+    """
+    with _sessions_lock:
+        if issue_number not in _sessions:
+            config = load_config()
+            _sessions[issue_number] = ClaudeSession(
+                issue_number,
+                Path(config["paths"]["state"]) / "sessions" / f"issue-{issue_number}.json",
+                enabled=config["sessions"]["resume"],
+                max_tokens=config["budgets"]["max_run_tokens"],
+            )
+        return _sessions[issue_number]
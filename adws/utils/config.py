@@ -1,14 +1,26 @@
 """Configuration loader for ADW orchestration."""
+import copy
 import os
+import threading
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 
-import yaml
+# Parsed config keyed by config.yaml's mtime, the repo root and the state
+# root, so a process running many issues parses the file once but still sees
+# edits and root overrides
+_cache: Optional[Tuple[Tuple[int, Path, Path], Dict[str, Any]]] = None
+_cache_lock = threading.Lock()
+
+# Paths resolved against the state root instead of the repo root
+STATE_PATHS = ("logs", "state", "deps_cache", "workspaces", "broker_db")
 
 
 def load_config() -> Dict[str, Any]:
     """Load configuration from config.yaml.
 
+    The parsed file is cached until its modification time changes; every
+    call returns its own copy.
+
     Returns:
         Dict containing configuration values
 
@@ -16,29 +28,63 @@ def load_config() -> Dict[str, Any]:
         FileNotFoundError: If config.yaml doesn't exist
         yaml.YAMLError: If config.yaml is malformed
     """
+    global _cache
+
     config_path = Path(__file__).parent.parent / "config.yaml"
 
     if not config_path.exists():
         raise FileNotFoundError(f"Config file not found: {config_path}")
 
+    # Relative paths are resolved against the project root (workflow state
+    # against the state root, which is the same unless overridden)
+    project_root = get_repo_root()
+    state_root = get_state_root()
+    key = (config_path.stat().st_mtime_ns, project_root, state_root)
+    with _cache_lock:
+        if _cache is not None and _cache[0] == key:
+            return copy.deepcopy(_cache[1])
+
+    import yaml  # Deferred: only needed once config is actually read
+
     with open(config_path, "r") as f:
         config = yaml.safe_load(f)
 
     # Resolve relative paths to absolute paths from project root
-    project_root = Path(__file__).parent.parent.parent
-
-    for key in ["specs", "commands", "logs", "state"]:
-        if key in config["paths"]:
-            rel_path = config["paths"][key]
-            config["paths"][key] = str(project_root / rel_path)
+    for name in ["specs", "commands", *STATE_PATHS]:
+        if name in config["paths"]:
+            rel_path = config["paths"][name]
+            root = state_root if name in STATE_PATHS else project_root
+            config["paths"][name] = str(root / rel_path)
 
-    return config
+    with _cache_lock:
+        _cache = (key, config)
+    return copy.deepcopy(config)
 
 
 def get_repo_root() -> Path:
     """Get the repository root directory.
 
+    ``ADW_REPO_ROOT`` overrides it, e.g. to replay a run in a scratch worktree.
+
     Returns:
         Path to repository root
     """
+    override = os.environ.get("ADW_REPO_ROOT")
+    if override:
+        return Path(override)
     return Path(__file__).parent.parent.parent
+
+
+def get_state_root() -> Path:
+    """Get the directory logs, state and caches are resolved against.
+
+    ``ADW_STATE_ROOT`` overrides it, so a run moved into a warm workspace
+    (see utils/workspace.py) keeps its state in the listener's checkout.
+
+    Returns:
+        Path to the state root (default: get_repo_root())
+    """
+    override = os.environ.get("ADW_STATE_ROOT")
+    if override:
+        return Path(override)
+    return get_repo_root()
@@ -0,0 +1,219 @@
+"""Run-level deadline and cooperative cancellation.
+
+A run gets one Deadline when it starts. Phases check it between steps and
+every subprocess helper (Claude, npm, gh, dependency install) bounds its
+call by ``min(remaining, per-call cap)``, so retries can no longer add up to
+``retries × timeouts``. Cancelling (SIGTERM, or the listener's cancel
+endpoint, which sends SIGTERM to the run) marks the deadline: a Claude or
+npm call in flight is killed with its process tree (see process.py), other
+calls finish or time out, and the run stops before its next step.
+
+Time a run spends waiting for a resource shared with other runs (the
+pipeline's checkout) is not charged to its deadline, so issues late in a
+batch do not run out of time before doing any work.
+"""
+import logging
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from .config import load_config
+
+logger = logging.getLogger(__name__)
+
+# Calls are not started with less time than this left
+MIN_CALL_SECONDS = 1.0
+
+# How often a run waiting for a shared lock checks for cancellation
+LOCK_POLL_SECONDS = 0.5
+
+_active: Dict[int, "Deadline"] = {}
+# Set by cancel_all, so runs not started yet (a batch's later issues) are not
+_cancelled: Optional[str] = None
+# Reentrant: the SIGTERM handler may run while the main thread holds it
+_active_lock = threading.RLock()
+
+
+class RunCancelledError(Exception):
+    """Raised when a run was cancelled or ran past its deadline."""
+    pass
+
+
+class Deadline:
+    """Time left for one run, and whether it was cancelled."""
+
+    def __init__(self, seconds: float = 0, issue_number: Optional[int] = None):
+        """Start the deadline clock.
+
+        Args:
+            seconds: Time allowed for the run (0 = no deadline, cancellation only)
+            issue_number: Issue of the run (for messages)
+        """
+        self.seconds = seconds
+        self.issue_number = issue_number
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        self.cancel_reason: Optional[str] = None
+        self._paused_at: Optional[float] = None
+
+    def remaining(self) -> Optional[float]:
+        """Return seconds left, or None without a deadline."""
+        if self.expires_at is None:
+            return None
+        now = self._paused_at if self._paused_at is not None else time.monotonic()
+        return max(0.0, self.expires_at - now)
+
+    def pause(self) -> None:
+        """Stop the clock while the run waits for other runs (see resume())."""
+        if self._paused_at is None:
+            self._paused_at = time.monotonic()
+
+    def resume(self) -> None:
+        """Restart the clock stopped by pause(), adding the pause to the time left."""
+        if self._paused_at is not None:
+            if self.expires_at is not None:
+                self.expires_at += time.monotonic() - self._paused_at
+            self._paused_at = None
+
+    def cancel(self, reason: str) -> None:
+        """Stop the run before its next step."""
+        if self.cancel_reason is None:
+            self.cancel_reason = reason
+            logger.warning(f"Run for issue #{self.issue_number} cancelled: {reason}")
+
+    def check(self) -> None:
+        """Raise if the run was cancelled or has too little time left.
+
+        Raises:
+            RunCancelledError: If cancelled or past the deadline
+        """
+        if self.cancel_reason is not None:
+            raise RunCancelledError(f"Run cancelled: {self.cancel_reason}")
+        remaining = self.remaining()
+        if remaining is not None and remaining < MIN_CALL_SECONDS:
+            raise RunCancelledError(f"Run deadline of {self.seconds}s exceeded")
+
+    def acquire(self, lock: threading.Semaphore) -> None:
+        """Acquire a lock shared with other runs, without charging the wait
+        to the deadline.
+
+        Args:
+            lock: Lock or semaphore to acquire
+
+        Raises:
+            RunCancelledError: If the run is cancelled while waiting (the
+                lock is not held then)
+        """
+        self.pause()
+        try:
+            while not lock.acquire(timeout=LOCK_POLL_SECONDS):
+                if self.cancel_reason is not None:
+                    raise RunCancelledError(f"Run cancelled: {self.cancel_reason}")
+        finally:
+            self.resume()
+
+    def timeout(self, cap: Optional[float] = None) -> Optional[float]:
+        """Return the timeout for the next call: ``min(remaining, cap)``.
+
+        Args:
+            cap: The call's own timeout (None = no cap)
+
+        Returns:
+            Seconds, or None when neither a deadline nor a cap applies
+
+        Raises:
+            RunCancelledError: If cancelled or past the deadline
+        """
+        self.check()
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        return remaining if cap is None else min(remaining, cap)
+
+
+def call_timeout(deadline: Optional[Deadline], cap: Optional[float]) -> Optional[float]:
+    """Timeout for a call with an optional deadline (the cap alone without one).
+
+    Raises:
+        RunCancelledError: If the deadline was cancelled or has passed
+    """
+    return cap if deadline is None else deadline.timeout(cap)
+
+
+@contextmanager
+def holding(lock: threading.Semaphore, deadline: Optional[Deadline]) -> Iterator[None]:
+    """Hold a shared lock, waiting for it as Deadline.acquire does.
+
+    Args:
+        lock: Lock or semaphore to hold
+        deadline: Run deadline (None waits without cancellation)
+
+    Raises:
+        RunCancelledError: If the run is cancelled while waiting
+    """
+    if deadline is None:
+        lock.acquire()
+    else:
+        deadline.acquire(lock)
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def create_deadline(issue_number: int, seconds: Optional[float] = None) -> Deadline:
+    """Start the deadline of an issue's run and register it for cancellation.
+
+    Args:
+        issue_number: GitHub issue number
+        seconds: Time allowed (default: ``budgets.max_run_seconds``)
+
+    Returns:
+        The registered Deadline
+    """
+    if seconds is None:
+        seconds = load_config()["budgets"]["max_run_seconds"]
+    deadline = Deadline(seconds, issue_number)
+    with _active_lock:
+        _active[issue_number] = deadline
+    return deadline
+
+
+def release_deadline(issue_number: int) -> None:
+    """Unregister the deadline of a finished run."""
+    with _active_lock:
+        _active.pop(issue_number, None)
+
+
+def cancel_all(reason: str) -> int:
+    """Cancel every run in this process and return how many there were.
+
+    Runs are not started afterwards either (see cancel_requested()).
+    """
+    global _cancelled
+
+    with _active_lock:
+        _cancelled = _cancelled or reason
+        deadlines = list(_active.values())
+    for deadline in deadlines:
+        deadline.cancel(reason)
+    return len(deadlines)
+
+
+def cancel_requested() -> Optional[str]:
+    """Return why this process's runs were cancelled, or None if they were not."""
+    return _cancelled
+
+
+def install_cancel_handler() -> None:
+    """Cancel all runs of this process on SIGTERM instead of dying mid-step.
+
+    Without a run in progress the process exits as it would by default.
+    Must be called from the main thread.
+    """
+    def handle(signum, frame):
+        if not cancel_all(f"received {signal.Signals(signum).name}"):
+            raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, handle)
@@ -0,0 +1,349 @@
+"""node_modules snapshots keyed by package-lock.json hash.
+
+A snapshot is built once per lockfile (``npm ci`` in a scratch directory,
+under a per-key lock file so concurrent runs build it once) and then
+hydrated into workspaces by reflink or plain copy, whichever the filesystem
+supports first. Hardlinks are opt-in: a hardlinked node_modules shares its
+files with the snapshot, so any in-place write to it (postinstall,
+patch-package, an agent edit) changes the snapshot for every later run.
+Snapshots are evicted least-recently-used when the cache grows past its disk
+budget. Hydration holds the key's lock shared, and eviction skips snapshots
+whose lock it cannot take at once, so a snapshot being built or copied is
+never deleted underneath it.
+"""
+import fcntl
+import hashlib
+import logging
+import shutil
+import subprocess
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .cassette import recorded
+from .capture import artifact_path, run_captured
+from .config import load_config
+from .deadline import Deadline, call_timeout
+from .fileio import atomic_write_json, atomic_write_text, read_json
+from .governor import RESOURCE_NODE, get_governor
+
+logger = logging.getLogger(__name__)
+
+LOCKFILE = "package-lock.json"
+MANIFEST = "package.json"
+# Written inside a hydrated node_modules to record which snapshot it came from
+WORKSPACE_MARKER = ".adw-snapshot"
+SNAPSHOT_META = "snapshot.json"
+LAST_USED = ".last-used"
+
+
+class DependencyError(Exception):
+    """Raised when a dependency snapshot cannot be built or hydrated."""
+    pass
+
+
+def lockfile_hash(root: Path) -> str:
+    """Return the snapshot key for a workspace's lockfile.
+
+    Args:
+        root: Directory containing package-lock.json
+
+    Returns:
+        Hex digest prefix of the lockfile contents
+
+    Raises:
+        DependencyError: If the lockfile is missing
+    """
+    lockfile = root / LOCKFILE
+    if not lockfile.exists():
+        raise DependencyError(f"Lockfile not found: {lockfile}")
+    return hashlib.sha256(lockfile.read_bytes()).hexdigest()[:16]
+
+
+def _tree_size(path: Path) -> int:
+    total = 0
+    for item in path.rglob("*"):
+        try:
+            if item.is_file() and not item.is_symlink():
+                total += item.stat().st_size
+        except OSError:
+            continue
+    return total
+
+
+class SnapshotCache:
+    """Build, hydrate and evict node_modules snapshots."""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int,
+        methods: List[str],
+        install_timeout: int
+    ):
+        """Create a snapshot cache.
+
+        Args:
+            cache_dir: Directory holding one subdirectory per lockfile hash
+            max_bytes: Disk budget for all snapshots
+            methods: Hydration methods to try, in order (reflink, copy; hardlink
+                only if nothing writes into node_modules)
+            install_timeout: Timeout in seconds for building a snapshot
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.methods = methods
+        self.install_timeout = install_timeout
+
+    def _snapshot_dir(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    def has_snapshot(self, key: str) -> bool:
+        """Check whether a complete snapshot exists for a key."""
+        return (self._snapshot_dir(key) / SNAPSHOT_META).exists()
+
+    @contextmanager
+    def _key_lock(self, key: str, shared: bool = False, wait: bool = True) -> Iterator[bool]:
+        # Exclusive for a build or eviction, shared while hydrating; across
+        # threads and processes. Yields False if wait is off and it is busy.
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_dir / f".lock-{key}", "w") as lock_file:
+            mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+            try:
+                fcntl.flock(lock_file, mode if wait else mode | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def ensure_snapshot(self, source_root: Path, deadline: Optional[Deadline] = None) -> str:
+        """Build the snapshot for a workspace's lockfile if it is missing.
+
+        Args:
+            source_root: Directory with package.json and package-lock.json
+            deadline: Run deadline bounding npm ci
+
+        Returns:
+            Snapshot key
+
+        Raises:
+            DependencyError: If npm ci fails or times out
+            RunCancelledError: If the run is cancelled or out of time
+        """
+        key = lockfile_hash(source_root)
+        if self.has_snapshot(key):
+            return key
+        with self._key_lock(key):
+            # Built by another run while we waited for the lock
+            if not self.has_snapshot(key):
+                self._build_snapshot(source_root, key, deadline)
+        self.evict(keep=key)
+        return key
+
+    def _build_snapshot(self, source_root: Path, key: str, deadline: Optional[Deadline]) -> None:
+        timeout = call_timeout(deadline, self.install_timeout)
+
+        snapshot_dir = self._snapshot_dir(key)
+        build_dir = self.cache_dir / f".build-{key}-{int(time.time() * 1000)}"
+        build_dir.mkdir(parents=True)
+
+        try:
+            for name in (MANIFEST, LOCKFILE):
+                shutil.copy2(source_root / name, build_dir / name)
+
+            logger.info(f"Building dependency snapshot {key} (npm ci)...")
+            started = time.monotonic()
+            try:
+                with get_governor().slot(RESOURCE_NODE):
+                    run_captured(
+                        ["npm", "ci", "--no-audit", "--no-fund"],
+                        artifact_path("npm-ci"),
+                        check=True,
+                        cwd=str(build_dir),
+                        timeout=timeout,
+                        deadline=deadline,
+                        limits=True
+                    )
+            except subprocess.CalledProcessError as e:
+                raise DependencyError(f"npm ci failed: {e.stderr}") from e
+            except subprocess.TimeoutExpired as e:
+                raise DependencyError(f"npm ci timed out after {timeout:.0f}s") from e
+            except FileNotFoundError as e:
+                raise DependencyError("npm not found") from e
+
+            # npm ci creates no node_modules for a lockfile without dependencies
+            (build_dir / "node_modules").mkdir(exist_ok=True)
+            # Left by a build that died before writing its metadata
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+            snapshot_dir.mkdir(parents=True)
+            (build_dir / "node_modules").rename(snapshot_dir / "node_modules")
+            meta = {
+                "key": key,
+                "created_at": time.time(),
+                "build_seconds": round(time.monotonic() - started, 2),
+                "size_bytes": _tree_size(snapshot_dir / "node_modules"),
+            }
+            atomic_write_json(snapshot_dir / SNAPSHOT_META, meta)
+            (snapshot_dir / LAST_USED).touch()
+            logger.info(
+                f"Snapshot {key} built in {meta['build_seconds']}s "
+                f"({meta['size_bytes'] // (1024 * 1024)}MB)"
+            )
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+    def _link_tree(self, method: str, source: Path, target: Path) -> None:
+        if method == "reflink":
+            subprocess.run(
+                ["cp", "-a", "--reflink=always", str(source), str(target)],
+                capture_output=True, check=True
+            )
+        elif method == "hardlink":
+            subprocess.run(
+                ["cp", "-al", str(source), str(target)],
+                capture_output=True, check=True
+            )
+            logger.warning("node_modules hardlinked to its snapshot: writes to files in it "
+                           "change the snapshot for every later run")
+        elif method == "copy":
+            shutil.copytree(source, target, symlinks=True)
+        else:
+            raise DependencyError(f"Unknown hydration method: {method}")
+
+    def hydrate(self, workspace: Path, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Populate ``workspace/node_modules`` from the matching snapshot.
+
+        A node_modules that was already hydrated from the same snapshot is
+        left in place; one installed by other means is never touched.
+
+        Args:
+            workspace: Checkout containing package-lock.json
+            deadline: Run deadline bounding a snapshot build
+
+        Returns:
+            Dict with "key", "method" and "seconds" of the hydration
+
+        Raises:
+            DependencyError: If no hydration method succeeds
+            RunCancelledError: If the run is cancelled or out of time
+        """
+        started = time.monotonic()
+        key = lockfile_hash(workspace)
+        target = workspace / "node_modules"
+        marker = target / WORKSPACE_MARKER
+
+        if target.exists():
+            current = marker.read_text().strip() if marker.exists() else None
+            if current == key:
+                return {"key": key, "method": "present", "seconds": 0.0}
+            if current is None:
+                logger.info("node_modules not managed by snapshots, leaving it alone")
+                return {"key": key, "method": "unmanaged", "seconds": 0.0}
+            logger.info(f"Replacing node_modules from stale snapshot {current}")
+            shutil.rmtree(target)
+
+        source = self._snapshot_dir(key) / "node_modules"
+        method = None
+        while method is None:
+            self.ensure_snapshot(workspace, deadline)
+            # Shared: other hydrations go on, eviction leaves the snapshot alone
+            with self._key_lock(key, shared=True):
+                if not self.has_snapshot(key):
+                    continue  # Evicted before we got the lock: build it again
+                for method in self.methods:
+                    try:
+                        self._link_tree(method, source, target)
+                        break
+                    except (subprocess.CalledProcessError, OSError) as e:
+                        logger.info(f"Hydration by {method} unavailable: {e}")
+                        shutil.rmtree(target, ignore_errors=True)
+                else:
+                    raise DependencyError(f"Could not hydrate node_modules using {self.methods}")
+                (self._snapshot_dir(key) / LAST_USED).touch()
+
+        atomic_write_text(marker, key)
+
+        seconds = round(time.monotonic() - started, 3)
+        logger.info(f"Hydrated node_modules from snapshot {key} by {method} in {seconds}s")
+        return {"key": key, "method": method, "seconds": seconds}
+
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        """Return snapshot metadata, most recently used first."""
+        snapshots = []
+        if not self.cache_dir.exists():
+            return snapshots
+        for snapshot_dir in self.cache_dir.iterdir():
+            meta = read_json(snapshot_dir / SNAPSHOT_META)
+            if not isinstance(meta, dict):
+                continue
+            last_used = snapshot_dir / LAST_USED
+            meta["last_used"] = (
+                last_used.stat().st_mtime if last_used.exists() else meta["created_at"]
+            )
+            snapshots.append(meta)
+        return sorted(snapshots, key=lambda m: m["last_used"], reverse=True)
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """Remove least recently used snapshots until within the disk budget.
+
+        Args:
+            keep: Snapshot key that must not be evicted (snapshots being
+                built or hydrated are skipped too)
+
+        Returns:
+            Keys of evicted snapshots
+        """
+        snapshots = self.list_snapshots()
+        total = sum(m["size_bytes"] for m in snapshots)
+        evicted = []
+
+        for meta in reversed(snapshots):
+            if total <= self.max_bytes:
+                break
+            if meta["key"] == keep:
+                continue
+            with self._key_lock(meta["key"], wait=False) as locked:
+                if not locked:
+                    logger.info(f"Not evicting dependency snapshot {meta['key']}: in use")
+                    continue
+                shutil.rmtree(self._snapshot_dir(meta["key"]), ignore_errors=True)
+            total -= meta["size_bytes"]
+            evicted.append(meta["key"])
+            logger.info(f"Evicted dependency snapshot {meta['key']}")
+
+        return evicted
+
+
+def get_snapshot_cache() -> SnapshotCache:
+    """Create the snapshot cache from the ``deps`` config section."""
+    config = load_config()
+    settings = config["deps"]
+    return SnapshotCache(
+        cache_dir=Path(config["paths"]["deps_cache"]),
+        max_bytes=settings["max_cache_mb"] * 1024 * 1024,
+        methods=settings["methods"],
+        install_timeout=settings["install_timeout_seconds"],
+    )
+
+
+@recorded("deps", describe=lambda workspace, deadline=None: {})
+def ensure_dependencies(
+    workspace: Path,
+    deadline: Optional[Deadline] = None
+) -> Optional[Dict[str, Any]]:
+    """Hydrate node_modules for a workspace if it has none yet.
+
+    Args:
+        workspace: Checkout containing package-lock.json
+        deadline: Run deadline bounding a snapshot build
+
+    Returns:
+        Hydration report, or None if the workspace has no lockfile
+    """
+    if not (workspace / LOCKFILE).exists():
+        return None
+    return get_snapshot_cache().hydrate(workspace, deadline)
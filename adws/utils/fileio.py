@@ -0,0 +1,92 @@
+"""Crash-safe file writes for ADW artifacts.
+
+Writes go to a temporary file in the target directory, are fsynced, and are
+then renamed over the target, so readers see either the old or the new
+content but never a truncated file. mkstemp creates the temporary file with
+mode 0600; it gets the target's mode (or the umask default for a new file)
+before the rename, so replaced files keep their permissions.
+"""
+import json
+import os
+import stat
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+# Reading the umask means setting it; do it once, at import, before any
+# threads that create files exist
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _file_mode(path: Path) -> int:
+    """Return the mode a write to path should leave: the existing file's, or
+    the default of a newly created file."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def atomic_write_text(path: Path, content: str) -> None:
+    """Atomically replace a file's content.
+
+    Args:
+        path: Target file path (parent directory must exist)
+        content: Text to write
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            os.fchmod(f.fileno(), _file_mode(path))
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+    # Persist the rename itself
+    try:
+        dir_fd = os.open(str(path.parent), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def atomic_write_json(path: Path, data: Any) -> None:
+    """Atomically write data as indented JSON.
+
+    Args:
+        path: Target file path
+        data: JSON-serializable data
+    """
+    atomic_write_text(path, json.dumps(data, indent=2) + "\n")
+
+
+def read_json(path: Path) -> Optional[Any]:
+    """Read a JSON file, treating missing or corrupt files as absent.
+
+    Args:
+        path: File to read
+
+    Returns:
+        Parsed data, or None if the file is missing or not valid JSON
+    """
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
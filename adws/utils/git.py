@@ -0,0 +1,356 @@
+"""Git operations for one workflow run.
+
+A GitSession batches the run's git work into as few subprocesses as
+possible: paths are staged in one ``git add``, the commit SHA is read from
+the ref files in-process instead of forking ``git rev-parse``, and with
+``fold_spec_commit`` the PLAN spec is only staged so that it lands in the
+same commit (and push) as the implementation. Pushing goes through
+``utils.push.PushCoordinator``.
+
+Instead of ``git add .``, a run snapshots ``git status`` (plus a stat
+fingerprint per dirty file) when BUILD starts, and COMMIT stages only the
+files that changed since: changes already present in the shared checkout
+before BUILD stay out of the commit, and git does not re-hash the tree. The
+commit itself takes only those paths (``git commit --only``), so files
+someone staged in the checkout before BUILD stay out of it too.
+
+Every git command runs in its own process group with a timeout
+(``timeouts.git_timeout_seconds``, capped by the run deadline when one is
+passed), so a hung fetch or push is killed instead of blocking the run, and
+the push lock, forever.
+"""
+import logging
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import get_repo_root, load_config
+from .deadline import Deadline, call_timeout
+from .fileio import atomic_write_json, read_json
+from .governor import RESOURCE_GIT, get_governor
+from .process import communicate_tool, interrupt_tool, start_tool
+
+logger = logging.getLogger(__name__)
+
+# Paths per ``git add`` invocation when staging a change set
+ADD_BATCH_SIZE = 500
+
+
+class GitError(Exception):
+    """Raised when git operations fail."""
+    pass
+
+
+def git_dirs(repo_root: Path) -> tuple[Path, Path]:
+    """Return (git dir, common dir), following worktree ``.git`` files."""
+    git_path = repo_root / ".git"
+    if git_path.is_file():
+        content = git_path.read_text().strip()
+        if not content.startswith("gitdir:"):
+            raise GitError(f"Unrecognized .git file: {git_path}")
+        git_dir = Path(content[len("gitdir:"):].strip())
+        if not git_dir.is_absolute():
+            git_dir = (repo_root / git_dir).resolve()
+    else:
+        git_dir = git_path
+
+    common_dir = git_dir
+    commondir_file = git_dir / "commondir"
+    if commondir_file.exists():
+        common_dir = (git_dir / commondir_file.read_text().strip()).resolve()
+    return git_dir, common_dir
+
+
+def read_head_sha(repo_root: Path) -> Optional[str]:
+    """Resolve HEAD to a commit SHA by reading ref files directly.
+
+    Args:
+        repo_root: Repository (or worktree) root
+
+    Returns:
+        Commit SHA, or None if it cannot be resolved without git
+    """
+    try:
+        git_dir, common_dir = git_dirs(repo_root)
+        head = (git_dir / "HEAD").read_text().strip()
+    except (OSError, GitError):
+        return None
+
+    if not head.startswith("ref:"):
+        return head  # Detached HEAD
+
+    ref = head[len("ref:"):].strip()
+    for base in (git_dir, common_dir):
+        ref_file = base / ref
+        if ref_file.exists():
+            return ref_file.read_text().strip()
+
+    packed = common_dir / "packed-refs"
+    if packed.exists():
+        for line in packed.read_text().splitlines():
+            if line.endswith(f" {ref}") and not line.startswith(("#", "^")):
+                return line.split(" ", 1)[0]
+    return None
+
+
+class GitSession:
+    """Git operations of one run against one checkout."""
+
+    def __init__(self, repo_root: Path, fold_spec_commit: bool = False, fsmonitor: bool = False):
+        """Create a session.
+
+        Args:
+            repo_root: Checkout to operate on
+            fold_spec_commit: Stage the PLAN spec instead of committing it, so
+                it is committed together with the implementation
+            fsmonitor: Let ``git status`` use the builtin fsmonitor daemon and
+                the untracked cache instead of scanning the tree
+        """
+        self.repo_root = repo_root
+        self.fold_spec_commit = fold_spec_commit
+        self.fsmonitor = fsmonitor
+        self.pending_spec: Optional[Path] = None
+        self.baseline: Optional[Dict[str, Any]] = None
+
+    def run(
+        self,
+        args: List[str],
+        check: bool = True,
+        timeout: Optional[float] = None,
+        deadline: Optional[Deadline] = None
+    ) -> subprocess.CompletedProcess:
+        """Run a git command in the checkout.
+
+        Args:
+            args: Arguments after ``git``
+            check: Raise GitError on a non-zero exit
+            timeout: Seconds before the command is killed (default:
+                ``timeouts.git_timeout_seconds``)
+            deadline: Run deadline; the command gets at most the time left
+
+        Returns:
+            Completed process with text stdout/stderr
+
+        Raises:
+            GitError: If the command fails and check is set, or times out
+                (whether or not check is set)
+            RunCancelledError: If the run is cancelled or out of time
+        """
+        if timeout is None:
+            timeout = load_config()["timeouts"]["git_timeout_seconds"]
+        command = ["git"] + args
+        name = next((a for a in args if not a.startswith("-") and "=" not in a), args[0])
+        with get_governor().slot(RESOURCE_GIT):
+            timeout = call_timeout(deadline, timeout)
+            process = start_tool(
+                command, deadline=deadline,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, cwd=str(self.repo_root)
+            )
+            try:
+                stdout, stderr = communicate_tool(process, command, timeout=timeout, deadline=deadline)
+            except subprocess.TimeoutExpired as e:
+                raise GitError(f"git {name} timed out after {timeout:.0f}s") from e
+            except BaseException:
+                interrupt_tool(process)
+                raise
+        result = subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+        if check and result.returncode != 0:
+            raise GitError(f"git {name} failed: {result.stderr.strip() or result.stdout.strip()}")
+        return result
+
+    def add(self, paths: List[Path]) -> None:
+        """Stage specific paths in a single ``git add``."""
+        if paths:
+            self.run(["add", "--"] + [str(p) for p in paths])
+
+    def add_all(self) -> None:
+        """Stage every change in the working tree."""
+        self.run(["add", "."])
+
+    def status(self) -> Dict[str, str]:
+        """Return ``git status`` as {path: two-letter status}, untracked files included.
+
+        Paths are relative to the checkout; a staged rename is listed as a
+        deletion and an addition.
+        """
+        options = ["-c", "core.fsmonitor=true", "-c", "core.untrackedCache=true"] if self.fsmonitor else []
+        output = self.run(
+            options + ["status", "--porcelain=v1", "-z", "--untracked-files=all", "--no-renames"]
+        ).stdout
+        entries = output.split("\0")
+        changes = {}
+        i = 0
+        while i < len(entries):
+            entry = entries[i]
+            i += 1
+            if len(entry) < 4:
+                continue
+            code, path = entry[:2], entry[3:]
+            changes[path] = code
+            if code[0] in "RC":
+                i += 1  # Skip the rename/copy source
+        return changes
+
+    def _fingerprint(self, path: str) -> Optional[List[int]]:
+        try:
+            stat = os.lstat(self.repo_root / path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Record the dirty files of the checkout with a stat fingerprint each.
+
+        Returns:
+            {path: [status, fingerprint]}, JSON-serializable; pass it to
+            changed_since later
+        """
+        return {path: [code, self._fingerprint(path)] for path, code in self.status().items()}
+
+    def start_change_set(self) -> Dict[str, Any]:
+        """Snapshot the checkout as the baseline of this run's change set."""
+        self.baseline = self.snapshot()
+        logger.info(f"Change set baseline: {len(self.baseline)} file(s) already dirty")
+        return self.baseline
+
+    def changed_since(self, baseline: Dict[str, Any]) -> List[str]:
+        """Return dirty files that are new or were modified since a snapshot.
+
+        Files that were already dirty and are untouched (same status and
+        fingerprint) are left out.
+        """
+        changed = []
+        for path, code in self.status().items():
+            before = baseline.get(path)
+            if before is None or before != [code, self._fingerprint(path)]:
+                changed.append(path)
+        return sorted(changed)
+
+    def add_changes(self, baseline: Dict[str, Any]) -> List[str]:
+        """Stage only the files changed since a snapshot (deletions included).
+
+        Returns:
+            The staged paths
+        """
+        paths = self.changed_since(baseline)
+        for start in range(0, len(paths), ADD_BATCH_SIZE):
+            self.run(["add", "-A", "--"] + paths[start:start + ADD_BATCH_SIZE])
+        return paths
+
+    def commit(self, message: str, paths: Optional[List[str]] = None) -> Optional[str]:
+        """Commit the index, or only some paths of it.
+
+        Args:
+            message: Commit message
+            paths: Commit only these paths (relative to the checkout, or
+                absolute), leaving anything else staged out of the commit;
+                unchanged paths are ignored (default: the whole index)
+
+        Returns:
+            New HEAD SHA, or None if there was nothing to commit
+        """
+        if paths is None:
+            result = self.run(["commit", "-m", message], check=False)
+        else:
+            changed = self.status()
+            paths = sorted({
+                os.path.relpath(p, self.repo_root) if os.path.isabs(p) else str(p) for p in paths
+            } & set(changed))
+            if not paths:
+                return None
+            # Paths go through a file: a change set can exceed the command line
+            with tempfile.NamedTemporaryFile("w", prefix="adw-pathspec-", suffix=".txt") as pathspec:
+                pathspec.write("\0".join(paths))
+                pathspec.flush()
+                result = self.run(
+                    ["commit", "--only", "-m", message,
+                     f"--pathspec-from-file={pathspec.name}", "--pathspec-file-nul"],
+                    check=False
+                )
+        if result.returncode != 0:
+            if "nothing to commit" in result.stdout + result.stderr:
+                return None
+            raise GitError(f"git commit failed: {result.stderr.strip() or result.stdout.strip()}")
+        self.pending_spec = None
+        return self.head_sha()
+
+    def head_sha(self) -> str:
+        """Return the HEAD SHA, falling back to ``git rev-parse`` if needed."""
+        sha = read_head_sha(self.repo_root)
+        if sha:
+            return sha
+        return self.run(["rev-parse", "HEAD"]).stdout.strip()
+
+    def record_spec(
+        self,
+        spec_path: Path,
+        issue_number: int,
+        replaced: Optional[List[Path]] = None
+    ) -> bool:
+        """Stage the PLAN spec and commit it unless folding is enabled.
+
+        Args:
+            spec_path: Spec file written by PLAN
+            issue_number: GitHub issue number
+            replaced: Older specs of the issue PLAN deleted; their removal
+                is staged with the spec
+
+        Returns:
+            True if the spec was committed, False if it was only staged or
+            unchanged (a reused spec already committed leaves nothing to commit)
+        """
+        self.add([spec_path])
+        if replaced:
+            self.run(["rm", "-q", "--cached", "--ignore-unmatch", "--"] + [str(p) for p in replaced])
+        if self.fold_spec_commit:
+            self.pending_spec = spec_path
+            logger.info("Spec staged; it will be committed with the implementation")
+            return False
+        paths = [str(spec_path)] + [str(p) for p in replaced or []]
+        if self.commit(f"docs: Add spec for issue #{issue_number} (PLAN)", paths=paths) is None:
+            logger.info("Spec unchanged since its last commit, nothing to commit")
+            return False
+        return True
+
+
+def baseline_path(issue_number: int) -> Path:
+    """Return the file keeping an issue's change-set baseline between phases."""
+    return Path(load_config()["paths"]["state"]) / "changes" / f"issue-{issue_number}.json"
+
+
+def save_baseline(issue_number: int, baseline: Dict[str, Any]) -> None:
+    """Persist a change-set baseline, for COMMIT run in another process."""
+    path = baseline_path(issue_number)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_json(path, baseline)
+
+
+def load_baseline(issue_number: int) -> Optional[Dict[str, Any]]:
+    """Load a baseline saved by save_baseline, or None if there is none."""
+    baseline = read_json(baseline_path(issue_number))
+    return baseline if isinstance(baseline, dict) else None
+
+
+def create_git_session(
+    repo_root: Optional[Path] = None,
+    fold_spec_commit: Optional[bool] = None
+) -> GitSession:
+    """Create a git session using the ``git`` config section.
+
+    Args:
+        repo_root: Checkout to operate on (default: get_repo_root())
+        fold_spec_commit: Override ``git.fold_spec_commit``
+
+    Returns:
+        GitSession
+    """
+    settings = load_config()["git"]
+    if fold_spec_commit is None:
+        fold_spec_commit = settings["fold_spec_commit"]
+    return GitSession(
+        repo_root or get_repo_root(),
+        fold_spec_commit=fold_spec_commit,
+        fsmonitor=settings["fsmonitor"]
+    )
@@ -2,7 +2,12 @@
 import json
 import logging
 import subprocess
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from urllib.parse import quote
+
+from .cassette import recorded
+from .deadline import Deadline, call_timeout
+from .governor import RESOURCE_GIT, get_governor
 
 logger = logging.getLogger(__name__)
 
@@ -12,26 +17,36 @@ class GitHubError(Exception):
     pass
 
 
-def run_gh_command(args: list[str]) -> str:
+@recorded("gh", describe=lambda args, timeout=30, deadline=None: {"args": args})
+def run_gh_command(
+    args: list[str],
+    timeout: int = 30,
+    deadline: Optional[Deadline] = None
+) -> str:
     """Run a gh CLI command and return output.
 
     Args:
         args: Command arguments (e.g., ["issue", "view", "123"])
+        timeout: Timeout in seconds
+        deadline: Run deadline; the command gets at most the time left
 
     Returns:
         Command output as string
 
     Raises:
         GitHubError: If command fails
+        RunCancelledError: If the run is cancelled or out of time
     """
+    timeout = call_timeout(deadline, timeout)
     try:
-        result = subprocess.run(
-            ["gh"] + args,
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=30
-        )
+        with get_governor().slot(RESOURCE_GIT):
+            result = subprocess.run(
+                ["gh"] + args,
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=timeout
+            )
         return result.stdout.strip()
     except subprocess.CalledProcessError as e:
         raise GitHubError(f"gh command failed: {e.stderr}") from e
@@ -39,11 +54,12 @@ def run_gh_command(args: list[str]) -> str:
         raise GitHubError(f"gh command timed out: {' '.join(args)}") from e
 
 
-def get_issue(issue_number: int) -> Dict[str, Any]:
+def get_issue(issue_number: int, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
     """Get issue details from GitHub.
 
     Args:
         issue_number: Issue number to fetch
+        deadline: Run deadline bounding the call
 
     Returns:
         Dict with issue data (title, body, labels, etc.)
@@ -55,7 +71,7 @@ def get_issue(issue_number: int) -> Dict[str, Any]:
         output = run_gh_command([
             "issue", "view", str(issue_number),
             "--json", "number,title,body,labels,state,url"
-        ])
+        ], deadline=deadline)
         issue = json.loads(output)
         logger.info(f"Fetched issue #{issue_number}: {issue['title']}")
         return issue
@@ -63,12 +79,61 @@ def get_issue(issue_number: int) -> Dict[str, Any]:
         raise GitHubError(f"Failed to parse issue data: {e}") from e
 
 
-def add_comment(issue_number: int, comment: str) -> None:
+def list_open_issues(
+    repo: str,
+    since: Optional[str] = None,
+    labels: Optional[str] = None,
+    page_size: int = 100,
+    timeout: int = 120
+) -> List[Dict[str, Any]]:
+    """List open issues (not pull requests) in one paginated API call.
+
+    Args:
+        repo: Repository as "owner/name"
+        since: Only issues updated at or after this ISO 8601 timestamp
+        labels: Only issues with all of these comma-separated labels
+        page_size: Issues per page
+        timeout: Timeout in seconds for all pages together
+
+    Returns:
+        Issue dicts shaped like ``get_issue`` results, oldest first
+
+    Raises:
+        GitHubError: If the API call fails
+    """
+    endpoint = (
+        f"repos/{repo}/issues?state=open&sort=created&direction=asc"
+        f"&per_page={page_size}"
+    )
+    if since:
+        endpoint += f"&since={since}"
+    if labels:
+        endpoint += f"&labels={quote(labels)}"
+
+    # --jq runs per page, emitting one compact issue object per line
+    output = run_gh_command([
+        "api", "--paginate", endpoint,
+        "--jq", ".[] | select(.pull_request == null) | "
+                "{number, title, body, state, url: .html_url, labels: [.labels[] | {name}]}"
+    ], timeout=timeout)
+
+    try:
+        issues = [json.loads(line) for line in output.splitlines() if line.strip()]
+    except json.JSONDecodeError as e:
+        raise GitHubError(f"Failed to parse issue list: {e}") from e
+
+    filters = (f" labeled {labels}" if labels else "") + (f" updated since {since}" if since else "")
+    logger.info(f"Listed {len(issues)} open issue(s){filters}")
+    return issues
+
+
+def add_comment(issue_number: int, comment: str, deadline: Optional[Deadline] = None) -> None:
     """Add a comment to an issue.
 
     Args:
         issue_number: Issue number
         comment: Comment text (supports markdown)
+        deadline: Run deadline bounding the call
 
     Raises:
         GitHubError: If comment fails
@@ -77,7 +142,7 @@ def add_comment(issue_number: int, comment: str) -> None:
         run_gh_command([
             "issue", "comment", str(issue_number),
             "--body", comment
-        ])
+        ], deadline=deadline)
         logger.info(f"Added comment to issue #{issue_number}")
     except GitHubError as e:
         logger.error(f"Failed to add comment to issue #{issue_number}: {e}")
@@ -0,0 +1,249 @@
+"""Adaptive admission control for phase work.
+
+Phase work is split into resource classes with separate limits:
+
+- ``model``: Claude CLI calls (I/O bound, rate limited by the provider)
+- ``node``: npm type-check and test runs (CPU and memory heavy)
+- ``git``: git and gh subprocesses (network round trips)
+
+Besides the static per-class limit, ``node`` work is only admitted while the
+machine's load average and free memory are within the configured thresholds.
+This applies to a process's first node job too: load and memory are
+host-wide, so they are how processes sharing a host hold each other back. A
+process with no node job running waits at most ``max_load_wait_seconds`` for
+them, so a host kept busy by others cannot starve it. ``model`` concurrency shrinks after rate-limit or timeout signals reported
+by ``run_claude`` and grows back once calls succeed again.
+
+Slots and back-off are per process. The listener runs each issue in its own
+orchestrator process, so on one host up to ``scheduling.workers`` times each
+limit can be in use; only the load and memory checks for ``node`` work see
+every process, and they lag behind (the load average is a 1-minute mean), so
+jobs starting at the same time can all be admitted. Size the limits for
+that, or run one process with ``orchestrator.py`` batches when a host-wide
+cap matters.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from .config import load_config
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_MODEL = "model"
+RESOURCE_NODE = "node"
+RESOURCE_GIT = "git"
+
+SIGNAL_OK = "ok"
+SIGNAL_RATE_LIMIT = "rate_limit"
+SIGNAL_TIMEOUT = "timeout"
+
+
+def read_load_per_cpu() -> Optional[float]:
+    """Return the 1-minute load average divided by the CPU count.
+
+    Returns:
+        Load per CPU, or None if the platform does not expose it
+    """
+    try:
+        load_1m = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+    return load_1m / (os.cpu_count() or 1)
+
+
+def read_available_memory_mb() -> Optional[float]:
+    """Return available memory in MB from /proc/meminfo.
+
+    Returns:
+        Available memory in MB, or None if it cannot be determined
+    """
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class ResourceGovernor:
+    """Admit phase work per resource class based on limits and live load."""
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        max_load_per_cpu: float,
+        min_free_memory_mb: float,
+        rate_limit_backoff_seconds: float,
+        max_load_wait_seconds: float = 300,
+        poll_interval: float = 1.0
+    ):
+        """Create a governor.
+
+        Args:
+            limits: Max concurrent slots per resource class
+            max_load_per_cpu: Node work waits while load per CPU is above this
+            min_free_memory_mb: Node work waits while free memory is below this
+            rate_limit_backoff_seconds: Model cool-down after a rate-limit signal
+            max_load_wait_seconds: Max wait on load and memory for a node job
+                when none of this process's is running
+            poll_interval: Seconds between re-checks of live load while waiting
+        """
+        self._limits = dict(limits)
+        self._effective = dict(limits)
+        self._active = {name: 0 for name in limits}
+        self._max_load_per_cpu = max_load_per_cpu
+        self._min_free_memory_mb = min_free_memory_mb
+        self._backoff_seconds = rate_limit_backoff_seconds
+        self._max_load_wait_seconds = max_load_wait_seconds
+        self._poll_interval = poll_interval
+        self._cooldown_until = 0.0
+        self._cond = threading.Condition()
+        self._held = threading.local()
+
+    def _check_admission(self, resource: str, waited: float) -> Optional[str]:
+        """Return the reason work cannot be admitted now, or None if it can.
+
+        Must be called with the condition lock held.
+
+        Args:
+            resource: Resource class of the work
+            waited: Seconds the work has waited so far
+        """
+        if self._active[resource] >= self._effective[resource]:
+            return f"{resource} slots exhausted ({self._effective[resource]})"
+
+        if resource == RESOURCE_MODEL and time.monotonic() < self._cooldown_until:
+            return "model rate-limit cool-down"
+
+        # A busy host delays this process's first node job, but not forever
+        starving = self._active[resource] == 0 and waited >= self._max_load_wait_seconds
+        if resource == RESOURCE_NODE and not starving:
+            load = read_load_per_cpu()
+            if load is not None and load > self._max_load_per_cpu:
+                return f"load per CPU {load:.2f} > {self._max_load_per_cpu}"
+            free_mb = read_available_memory_mb()
+            if free_mb is not None and free_mb < self._min_free_memory_mb:
+                return f"free memory {free_mb:.0f}MB < {self._min_free_memory_mb}MB"
+
+        return None
+
+    @contextmanager
+    def slot(self, resource: str) -> Iterator[None]:
+        """Hold a slot of a resource class for the duration of the block.
+
+        Re-entrant per thread: nested requests for a class the thread already
+        holds are admitted immediately.
+
+        Args:
+            resource: One of RESOURCE_MODEL, RESOURCE_NODE, RESOURCE_GIT
+        """
+        if resource not in self._limits:
+            raise ValueError(f"Unknown resource class: {resource}")
+
+        held = getattr(self._held, "counts", None)
+        if held is None:
+            held = self._held.counts = {}
+
+        if held.get(resource):
+            held[resource] += 1
+            try:
+                yield
+            finally:
+                held[resource] -= 1
+            return
+
+        started = time.monotonic()
+        logged = False
+        with self._cond:
+            while True:
+                reason = self._check_admission(resource, time.monotonic() - started)
+                if reason is None:
+                    break
+                if not logged:
+                    logger.info(f"Waiting for {resource} slot: {reason}")
+                    logged = True
+                self._cond.wait(timeout=self._poll_interval)
+            self._active[resource] += 1
+
+        waited = time.monotonic() - started
+        if logged:
+            logger.info(f"Admitted {resource} work after {waited:.1f}s")
+
+        held[resource] = 1
+        try:
+            yield
+        finally:
+            held[resource] = 0
+            with self._cond:
+                self._active[resource] -= 1
+                self._cond.notify_all()
+
+    def record_model_signal(self, signal: str) -> None:
+        """Adjust model concurrency from the outcome of a Claude call.
+
+        Rate limits halve the model limit and start a cool-down, timeouts
+        halve the limit, and successes restore one slot at a time.
+
+        Args:
+            signal: One of SIGNAL_OK, SIGNAL_RATE_LIMIT, SIGNAL_TIMEOUT
+        """
+        with self._cond:
+            current = self._effective[RESOURCE_MODEL]
+            if signal == SIGNAL_OK:
+                if current < self._limits[RESOURCE_MODEL]:
+                    self._effective[RESOURCE_MODEL] = current + 1
+                    logger.info(f"Model concurrency raised to {current + 1}")
+            elif signal in (SIGNAL_RATE_LIMIT, SIGNAL_TIMEOUT):
+                reduced = max(1, current // 2)
+                self._effective[RESOURCE_MODEL] = reduced
+                if signal == SIGNAL_RATE_LIMIT:
+                    self._cooldown_until = time.monotonic() + self._backoff_seconds
+                logger.warning(
+                    f"Model {signal} signal: concurrency {current} -> {reduced}"
+                )
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return current limits and usage per resource class."""
+        with self._cond:
+            return {
+                "active": dict(self._active),
+                "limits": dict(self._effective),
+                "configured_limits": dict(self._limits),
+                "model_cooldown_seconds": max(
+                    0.0, self._cooldown_until - time.monotonic()
+                ),
+                "load_per_cpu": read_load_per_cpu(),
+                "free_memory_mb": read_available_memory_mb(),
+            }
+
+
+_governor: Optional[ResourceGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> ResourceGovernor:
+    """Return the process-wide governor, built from config on first use."""
+    global _governor
+
+    with _governor_lock:
+        if _governor is None:
+            settings = load_config()["concurrency"]
+            _governor = ResourceGovernor(
+                limits={
+                    RESOURCE_MODEL: settings["model_calls"],
+                    RESOURCE_NODE: settings["node_jobs"],
+                    RESOURCE_GIT: settings["git_io"],
+                },
+                max_load_per_cpu=settings["max_load_per_cpu"],
+                min_free_memory_mb=settings["min_free_memory_mb"],
+                rate_limit_backoff_seconds=settings["rate_limit_backoff_seconds"],
+                max_load_wait_seconds=settings["max_load_wait_seconds"],
+            )
+        return _governor
@@ -0,0 +1,95 @@
+"""Issue classification helpers shared by phases and the webhook listener."""
+from typing import Any, Dict
+
+from .config import load_config
+
+# Fields of ``gh issue view --json`` that a run needs; webhook payloads are
+# trimmed to these before being handed to a run
+ISSUE_FIELDS = ("number", "title", "body", "labels", "state", "url")
+
+
+def get_commit_type(issue: Dict[str, Any]) -> str:
+    """Determine conventional commit type from issue labels/title.
+
+    Args:
+        issue: GitHub issue dict
+
+    Returns:
+        Commit type (feat, fix, docs, etc.)
+    """
+    labels = [label["name"].lower() for label in issue.get("labels", [])]
+
+    # Check labels first
+    if "bug" in labels or "fix" in labels:
+        return "fix"
+    if "documentation" in labels or "docs" in labels:
+        return "docs"
+    if "test" in labels or "testing" in labels:
+        return "test"
+    if "refactor" in labels or "refactoring" in labels:
+        return "refactor"
+    if "chore" in labels:
+        return "chore"
+
+    # Check title
+    title_lower = (issue.get("title") or "").lower()
+    if any(word in title_lower for word in ["fix", "bug", "error", "issue"]):
+        return "fix"
+    if any(word in title_lower for word in ["doc", "readme"]):
+        return "docs"
+    if any(word in title_lower for word in ["test"]):
+        return "test"
+    if any(word in title_lower for word in ["refactor", "clean"]):
+        return "refactor"
+
+    # Default to feat for new features
+    return "feat"
+
+
+def issue_from_payload(payload_issue: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a webhook payload's issue object to the fields of ``get_issue``.
+
+    Args:
+        payload_issue: ``issue`` object of an ``issues`` webhook event
+
+    Returns:
+        Issue dict shaped like the result of ``utils.github.get_issue``
+    """
+    issue = {field: payload_issue.get(field) for field in ISSUE_FIELDS}
+    issue["url"] = payload_issue.get("html_url") or issue["url"]
+    issue["labels"] = [
+        {"name": label["name"]} for label in payload_issue.get("labels") or []
+    ]
+    return issue
+
+
+def is_issue_processable(issue: Dict[str, Any]) -> tuple[bool, str]:
+    """Check if issue can be processed by the agent.
+
+    Works on both ``get_issue`` results and webhook payload issues.
+
+    Args:
+        issue: GitHub issue dict
+
+    Returns:
+        Tuple of (processable: bool, reason: str)
+    """
+    # Check if issue is open
+    if (issue.get("state") or "").lower() != "open":
+        return False, "Issue is not open"
+
+    # Check if already being processed
+    labels = [label["name"] for label in issue.get("labels") or []]
+    config = load_config()
+
+    if config["labels"]["processing"] in labels:
+        return False, "Issue is already being processed"
+
+    if config["labels"]["completed"] in labels:
+        return False, "Issue was already completed"
+
+    # Check if issue has enough information
+    if not issue.get("body") or len(issue["body"].strip()) < 10:
+        return False, "Issue body is too short or empty"
+
+    return True, "OK"
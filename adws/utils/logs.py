@@ -0,0 +1,58 @@
+"""Logging setup for ADW entry points.
+
+Entry points call setup_logging() from main() instead of configuring logging
+at import time, so importing a phase module stays cheap and has no side
+effects on the filesystem.
+"""
+import logging
+import logging.handlers
+import queue
+import sys
+from pathlib import Path
+from typing import Optional, TextIO
+
+from .config import load_config
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+
+
+def setup_logging(
+    log_name: str = "workflow.log",
+    stream: Optional[TextIO] = None,
+    non_blocking: bool = False
+) -> None:
+    """Log to <paths.logs>/<log_name> and a console stream.
+
+    Does nothing if the root logger already has handlers.
+
+    Args:
+        log_name: Log file name inside ``paths.logs`` (adws/logs/ under the
+            state root)
+        stream: Console stream (default: stdout)
+        non_blocking: Hand records to a background thread that does the file
+            and console writes, keeping them off request threads
+    """
+    if logging.getLogger().handlers:
+        return
+
+    log_dir = Path(load_config()["paths"]["logs"])
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    handlers = [
+        logging.FileHandler(log_dir / log_name),
+        logging.StreamHandler(stream or sys.stdout)
+    ]
+
+    if non_blocking:
+        formatter = logging.Formatter(LOG_FORMAT)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        records: queue.Queue = queue.Queue(-1)
+        listener = logging.handlers.QueueListener(records, *handlers)
+        listener.start()
+        queue_handler = logging.handlers.QueueHandler(records)
+        # The message is formatted once, by the handlers behind the queue
+        queue_handler.setFormatter(logging.Formatter("%(message)s"))
+        handlers = [queue_handler]
+
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, handlers=handlers)
@@ -0,0 +1,159 @@
+"""Stage-oriented pipeline with bounded queues between stages.
+
+Each stage has its own worker threads and reads from a bounded input queue,
+so a slow downstream stage applies backpressure instead of letting work pile
+up. Items are plain dicts passed from stage to stage; a stage that raises
+marks the item failed and later stages pass it through untouched.
+"""
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of input on a stage queue
+_END = object()
+
+
+class Stage:
+    """A named pipeline step with its own worker count."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], None],
+        workers: int = 1
+    ):
+        """Create a stage.
+
+        Args:
+            name: Stage name used in logs and failure reports
+            func: Called with each item; mutates it in place, raises on failure
+            workers: Number of worker threads for this stage
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+
+
+class Pipeline:
+    """Run items through a sequence of stages concurrently."""
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        queue_size: int = 1,
+        on_item_done: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
+        """Create a pipeline.
+
+        Args:
+            stages: Stages in execution order
+            queue_size: Capacity of each inter-stage queue
+            on_item_done: Called once per item after its last stage or failure
+        """
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.on_item_done = on_item_done
+
+    def run(self, items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Process all items and return them in completion order.
+
+        Failed items carry ``error`` (message) and ``failed_stage`` keys; an
+        item that already has a non-empty ``error`` skips remaining stages.
+
+        Args:
+            items: Item dicts to feed into the first stage
+
+        Returns:
+            The processed items
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        done: queue.Queue = queue.Queue()
+        threads = []
+
+        for index, stage in enumerate(self.stages):
+            inbox = queues[index]
+            outbox = queues[index + 1] if index + 1 < len(self.stages) else done
+            next_workers = (
+                self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+            )
+            remaining = [stage.workers]
+            lock = threading.Lock()
+
+            for worker in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(stage, inbox, outbox, remaining, lock, next_workers),
+                    name=f"pipeline-{stage.name.lower()}-{worker + 1}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        def feed() -> None:
+            for item in items:
+                item.setdefault("queued_at", time.time())
+                queues[0].put(item)
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_END)
+
+        feeder = threading.Thread(target=feed, name="pipeline-feeder", daemon=True)
+        feeder.start()
+
+        results = []
+        while True:
+            item = done.get()
+            if item is _END:
+                break
+            item["finished_at"] = time.time()
+            if self.on_item_done:
+                try:
+                    self.on_item_done(item)
+                except Exception as e:
+                    logger.error(f"Pipeline completion hook failed: {e}", exc_info=True)
+            results.append(item)
+
+        feeder.join()
+        for thread in threads:
+            thread.join()
+
+        return results
+
+    def _work(
+        self,
+        stage: Stage,
+        inbox: queue.Queue,
+        outbox: queue.Queue,
+        remaining: List[int],
+        lock: threading.Lock,
+        next_workers: int
+    ) -> None:
+        while True:
+            item = inbox.get()
+
+            if item is _END:
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                # The last worker of a stage closes the next stage's queue
+                if last:
+                    for _ in range(next_workers):
+                        outbox.put(_END)
+                return
+
+            if item.get("error") is None:
+                started = time.time()
+                try:
+                    stage.func(item)
+                except Exception as e:
+                    item["error"] = str(e)
+                    item["failed_stage"] = stage.name
+                    logger.error(f"Pipeline stage {stage.name} failed: {e}", exc_info=True)
+                item.setdefault("stage_seconds", {})[stage.name] = round(
+                    time.time() - started, 3
+                )
+
+            outbox.put(item)
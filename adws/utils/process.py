@@ -0,0 +1,291 @@
+"""Process-tree aware execution of external tools.
+
+``npm test`` and ``npm run type-check`` start Jest workers and tsc below
+npm; killing only the direct child on a timeout leaves them running. Tools
+are therefore started in their own session (process group): a timeout or a
+cancelled run kills the whole group (SIGTERM, then SIGKILL after
+``processes.kill_grace_seconds``), and group members still alive when the
+tool itself exits are reaped and counted as orphans. Node tool trees can be
+given a niceness, and a memory and CPU-time rlimit per process (applied with
+prlimit, so Linux only). cgroups are not used, as they need privileges the
+workflow does not have.
+"""
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from .config import load_config
+from .deadline import Deadline, RunCancelledError
+
+logger = logging.getLogger(__name__)
+
+# How often a running tool is checked for a cancelled run
+CANCEL_POLL_SECONDS = 0.5
+
+T = TypeVar("T")
+
+# Per-tool counts keyed by the issue of the run that started the tool (None
+# for tools started without a run deadline), so runs sharing this process
+# (pipeline mode) each report their own
+_metrics: Dict[Optional[int], Dict[str, Dict[str, int]]] = {}
+_metrics_lock = threading.Lock()
+
+
+def _record(tool: str, deadline: Optional[Deadline], **counts: int) -> None:
+    issue_number = deadline.issue_number if deadline is not None else None
+    with _metrics_lock:
+        stats = _metrics.setdefault(issue_number, {}).setdefault(tool, {
+            "runs": 0, "timeouts": 0, "cancelled": 0, "killed": 0, "orphans": 0,
+        })
+        for key, value in counts.items():
+            stats[key] += value
+
+
+def process_metrics(issue_number: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+    """Return per-tool counts: runs, timeouts, cancelled, killed (processes
+    killed on timeout or cancel) and orphans (left behind by a tool that
+    exited on its own).
+
+    Args:
+        issue_number: Only count tools of this issue's run (default: every
+            tool started by this process)
+    """
+    with _metrics_lock:
+        if issue_number is not None:
+            return {tool: dict(stats) for tool, stats in _metrics.get(issue_number, {}).items()}
+        totals: Dict[str, Dict[str, int]] = {}
+        for tools in _metrics.values():
+            for tool, stats in tools.items():
+                total = totals.setdefault(tool, dict.fromkeys(stats, 0))
+                for key, value in stats.items():
+                    total[key] += value
+        return totals
+
+
+def release_process_metrics(issue_number: int) -> None:
+    """Drop the counts of a finished issue's run."""
+    with _metrics_lock:
+        _metrics.pop(issue_number, None)
+
+
+def tool_name(command: List[str]) -> str:
+    """Name a command's tool for metrics (e.g. "npm")."""
+    return Path(command[0]).name
+
+
+def apply_limits(pid: int) -> None:
+    """Apply the ``processes`` niceness and rlimits to a started process.
+
+    Processes it starts afterwards (npm's Jest workers, tsc) inherit them.
+    """
+    settings = load_config()["processes"]
+    try:
+        if settings["nice"]:
+            os.setpriority(os.PRIO_PROCESS, pid, settings["nice"])
+        limits = []
+        if settings["max_memory_mb"]:
+            limits.append(("RLIMIT_AS", settings["max_memory_mb"] * 1024 * 1024))
+        if settings["max_cpu_seconds"]:
+            limits.append(("RLIMIT_CPU", settings["max_cpu_seconds"]))
+        if limits:
+            import resource
+            for name, value in limits:
+                resource.prlimit(pid, getattr(resource, name), (value, value))
+    except (AttributeError, OSError) as e:
+        # prlimit is Linux only; the process may also have exited already
+        logger.warning(f"Could not apply process limits to pid {pid}: {e}")
+
+
+def group_members(pgid: int) -> List[int]:
+    """Return the live processes of a process group.
+
+    Reads /proc where available; elsewhere only reports whether the group
+    still has any member (as ``[pgid]``).
+    """
+    proc = Path("/proc")
+    if not proc.is_dir():
+        try:
+            os.killpg(pgid, 0)
+            return [pgid]
+        except (ProcessLookupError, PermissionError):
+            return []
+
+    members = []
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # Fields after the parenthesized command: state, ppid, pgrp, ...
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 2 and int(fields[2]) == pgid and fields[0] != "Z":
+            members.append(int(entry.name))
+    return members
+
+
+def kill_tree(process: subprocess.Popen, grace: Optional[float] = None) -> int:
+    """Kill a tool started by run_tool and everything in its process group.
+
+    Args:
+        process: The tool's Popen (leader of its process group)
+        grace: Seconds between SIGTERM and SIGKILL (default from config)
+
+    Returns:
+        Number of processes that were still alive
+    """
+    if grace is None:
+        grace = load_config()["processes"]["kill_grace_seconds"]
+    pgid = process.pid
+    alive = len(group_members(pgid)) or int(process.poll() is None)
+
+    try:
+        os.killpg(pgid, signal.SIGTERM)
+    except ProcessLookupError:
+        process.wait()
+        return 0
+
+    stop = time.monotonic() + grace
+    while time.monotonic() < stop:
+        process.poll()
+        if not group_members(pgid):
+            break
+        time.sleep(0.1)
+    else:
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    process.wait()
+    return alive
+
+
+def start_tool(
+    command: List[str],
+    limits: bool = False,
+    deadline: Optional[Deadline] = None,
+    **popen_args: Any
+) -> subprocess.Popen:
+    """Start a tool as the leader of a new process group.
+
+    Args:
+        command: Command and arguments
+        limits: Apply the ``processes`` niceness and rlimits
+        deadline: Run deadline; the tool is counted in its issue's metrics
+        **popen_args: Passed to Popen (stdout, stderr, cwd, env, ...)
+
+    Returns:
+        The started Popen
+
+    Raises:
+        FileNotFoundError: If the command does not exist
+    """
+    process = subprocess.Popen(command, start_new_session=True, **popen_args)
+    _record(tool_name(command), deadline, runs=1)
+    if limits:
+        apply_limits(process.pid)
+    return process
+
+
+def _supervise(
+    process: subprocess.Popen,
+    command: List[str],
+    timeout: Optional[float],
+    deadline: Optional[Deadline],
+    wait: Callable[[Optional[float]], T]
+) -> T:
+    """Call wait (process.wait or process.communicate) until the tool exits,
+    killing its tree on timeout or cancellation, and reap processes it left
+    behind."""
+    tool = tool_name(command)
+    expires_at = None if timeout is None else time.monotonic() + timeout
+
+    while True:
+        remaining = None if expires_at is None else max(0.0, expires_at - time.monotonic())
+        wait_for = remaining
+        if deadline is not None:
+            wait_for = CANCEL_POLL_SECONDS if wait_for is None else min(wait_for, CANCEL_POLL_SECONDS)
+        try:
+            result = wait(wait_for)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+
+        if deadline is not None and deadline.cancel_reason is not None:
+            killed = kill_tree(process)
+            _record(tool, deadline, cancelled=1, killed=killed)
+            logger.warning(f"{tool}: run cancelled, killed {killed} process(es)")
+            raise RunCancelledError(f"Run cancelled: {deadline.cancel_reason}")
+        if expires_at is not None and time.monotonic() >= expires_at:
+            killed = kill_tree(process)
+            _record(tool, deadline, timeouts=1, killed=killed)
+            logger.warning(f"{tool}: timed out after {timeout:.0f}s, killed {killed} process(es)")
+            raise subprocess.TimeoutExpired(command, timeout)
+
+    orphans = group_members(process.pid)
+    if orphans:
+        _record(tool, deadline, orphans=len(orphans))
+        logger.warning(f"{tool} exited leaving {len(orphans)} process(es) behind, killing them")
+        kill_tree(process)
+    return result
+
+
+def wait_tool(
+    process: subprocess.Popen,
+    command: List[str],
+    timeout: Optional[float] = None,
+    deadline: Optional[Deadline] = None
+) -> int:
+    """Wait for a tool started by start_tool, killing its tree on timeout or
+    cancellation, and reap processes it left behind.
+
+    Args:
+        process: The tool's Popen
+        command: Its command (for errors and metrics)
+        timeout: Seconds before the tree is killed
+        deadline: Run deadline; a cancelled run kills the tree
+
+    Returns:
+        The tool's exit code
+
+    Raises:
+        subprocess.TimeoutExpired: If the timeout expired (tree killed)
+        RunCancelledError: If the run was cancelled (tree killed)
+    """
+    return _supervise(process, command, timeout, deadline, lambda t: process.wait(timeout=t))
+
+
+def communicate_tool(
+    process: subprocess.Popen,
+    command: List[str],
+    timeout: Optional[float] = None,
+    deadline: Optional[Deadline] = None
+) -> Tuple[Any, Any]:
+    """Like wait_tool, for a tool started with stdout/stderr pipes whose
+    (small) output is read into memory.
+
+    Returns:
+        (stdout, stderr) as Popen.communicate returns them
+
+    Raises:
+        subprocess.TimeoutExpired: If the timeout expired (tree killed)
+        RunCancelledError: If the run was cancelled (tree killed)
+    """
+    try:
+        return _supervise(process, command, timeout, deadline, lambda t: process.communicate(timeout=t))
+    except (subprocess.TimeoutExpired, RunCancelledError):
+        # The tree is dead: drain and close the pipes
+        process.communicate()
+        raise
+
+
+def interrupt_tool(process: subprocess.Popen) -> None:
+    """Kill a tool's tree when waiting for it was interrupted."""
+    if process.poll() is None or group_members(process.pid):
+        kill_tree(process, grace=0)
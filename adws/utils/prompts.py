@@ -1,12 +1,15 @@
 """Prompt template loader and renderer."""
 import logging
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
 from .config import load_config
 
 logger = logging.getLogger(__name__)
 
+# Template path -> (mtime_ns, content), shared by all runs in a process
+_templates: Dict[Path, Tuple[int, str]] = {}
+
 
 class PromptError(Exception):
     """Raised when prompt operations fail."""
@@ -16,6 +19,8 @@ class PromptError(Exception):
 def load_prompt_template(template_name: str) -> str:
     """Load a prompt template from .claude/commands/.
 
+    Templates are cached until their modification time changes.
+
     Args:
         template_name: Template filename without .md extension
 
@@ -31,8 +36,14 @@ def load_prompt_template(template_name: str) -> str:
     if not template_path.exists():
         raise PromptError(f"Prompt template not found: {template_path}")
 
+    mtime_ns = template_path.stat().st_mtime_ns
+    cached = _templates.get(template_path)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+
     with open(template_path, "r") as f:
         content = f.read()
+    _templates[template_path] = (mtime_ns, content)
 
     logger.info(f"Loaded prompt template: {template_name}")
     return content
@@ -0,0 +1,249 @@
+"""Serialized pushes for runs that finish close together.
+
+Runs hand their finished commit to the PushCoordinator instead of pushing
+themselves. Requests arriving while a push is in flight go out together in
+the next ``git push``; pushes from different processes are serialized with a
+lock file in the git directory, so a run whose commit was already pushed by
+another process sharing the checkout finds the remote up to date. A
+non-fast-forward rejection triggers a rebase onto the remote branch and a
+retry, after which each run gets back the SHA its commit has on the remote.
+
+Pushes go to the upstream of the checked-out branch, as a plain ``git push``
+would, unless ``git.push_remote`` and ``git.push_branch`` are both set. A
+push or rebase that hangs is killed after ``timeouts.git_timeout_seconds``
+(see GitSession.run), releasing the lock.
+"""
+import fcntl
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .cassette import recorded
+from .config import load_config
+from .git import GitError, GitSession, git_dirs
+
+logger = logging.getLogger(__name__)
+
+LOCK_FILENAME = "adw-push.lock"
+REJECTION_MARKERS = ("non-fast-forward", "[rejected]", "fetch first")
+
+
+def get_push_target(git: GitSession) -> Tuple[str, str]:
+    """Return the remote and branch a checkout pushes to.
+
+    ``ADW_PUSH_REMOTE``/``ADW_PUSH_BRANCH`` (set for a warm workspace, whose
+    HEAD is detached) come first, then ``git.push_remote``/``git.push_branch``
+    when both are configured, then the upstream of the checked-out branch.
+
+    Args:
+        git: Session of the checkout
+
+    Returns:
+        (remote, branch)
+
+    Raises:
+        GitError: If nothing is configured and the checkout has no upstream
+    """
+    remote = os.environ.get("ADW_PUSH_REMOTE")
+    branch = os.environ.get("ADW_PUSH_BRANCH")
+    if remote and branch:
+        return remote, branch
+    settings = load_config()["git"]
+    if settings.get("push_remote") and settings.get("push_branch"):
+        return settings["push_remote"], settings["push_branch"]
+
+    current = git.run(["symbolic-ref", "--quiet", "--short", "HEAD"], check=False).stdout.strip()
+    if not current:
+        raise GitError("HEAD is detached; set git.push_remote and git.push_branch to push from it")
+    remote = git.run(["config", f"branch.{current}.remote"], check=False).stdout.strip()
+    merge = git.run(["config", f"branch.{current}.merge"], check=False).stdout.strip()
+    if not remote or not merge:
+        raise GitError(f"Branch {current} has no upstream; set one (git branch -u) "
+                       f"or configure git.push_remote and git.push_branch")
+    return remote, merge.removeprefix("refs/heads/")
+
+
+class PushRequest:
+    """One run's commit waiting to be pushed."""
+
+    def __init__(self, issue_number: int, commit_sha: str, commit_message: str):
+        self.issue_number = issue_number
+        self.commit_sha = commit_sha
+        self.commit_message = commit_message
+        self.pushed_sha: Optional[str] = None
+        self.error: Optional[Exception] = None
+        self.done = threading.Event()
+
+
+class PushCoordinator:
+    """Batch and serialize pushes of one checkout's branch."""
+
+    def __init__(self, git: GitSession, max_attempts: int):
+        """Create a coordinator.
+
+        Args:
+            git: Session for the checkout the commits were made in
+            max_attempts: Push attempts (each after a rebase) before failing
+        """
+        self.git = git
+        self.max_attempts = max_attempts
+        self._pending: List[PushRequest] = []
+        self._lock = threading.Lock()
+        self._pushing = False
+
+    @contextmanager
+    def _process_lock(self) -> Iterator[None]:
+        _, common_dir = git_dirs(self.git.repo_root)
+        with open(common_dir / LOCK_FILENAME, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @recorded(
+        "push",
+        describe=lambda self, issue_number, commit_sha, commit_message: {
+            "issue_number": issue_number, "commit_message": commit_message
+        }
+    )
+    def submit(self, issue_number: int, commit_sha: str, commit_message: str) -> str:
+        """Push a finished run's commit, batching with concurrent submitters.
+
+        Args:
+            issue_number: GitHub issue number
+            commit_sha: SHA of the run's commit before pushing
+            commit_message: Commit message (used to find the commit after a rebase)
+
+        Returns:
+            SHA of the run's commit as pushed
+
+        Raises:
+            GitError: If the push fails after all attempts
+        """
+        request = PushRequest(issue_number, commit_sha, commit_message)
+
+        with self._lock:
+            self._pending.append(request)
+            lead = not self._pushing
+            if lead:
+                self._pushing = True
+
+        if lead:
+            self._drain()
+
+        request.done.wait()
+        if request.error:
+            raise request.error
+        return request.pushed_sha
+
+    def _drain(self) -> None:
+        """Push batches until no requests are pending (run by one leader)."""
+        while True:
+            with self._lock:
+                batch = self._pending
+                self._pending = []
+                if not batch:
+                    self._pushing = False
+                    return
+
+            try:
+                shas = self._push_batch(batch)
+                for request in batch:
+                    if request.issue_number in shas:
+                        request.pushed_sha = shas[request.issue_number]
+                    else:
+                        # The pre-rebase SHA does not exist on the remote
+                        logger.error(f"Commit of issue #{request.issue_number} not found after rebasing: "
+                                     f"{request.commit_message}")
+                        request.error = GitError(
+                            f"Pushed, but the commit of issue #{request.issue_number} was not found "
+                            f"after rebasing (dropped as empty or reworded?)"
+                        )
+            except Exception as e:
+                for request in batch:
+                    request.error = e if isinstance(e, GitError) else GitError(str(e))
+            finally:
+                for request in batch:
+                    request.done.set()
+
+    def _push_batch(self, batch: List[PushRequest]) -> Dict[int, str]:
+        issues = ", ".join(f"#{r.issue_number}" for r in batch)
+        logger.info(f"Pushing {len(batch)} commit(s) for {issues}")
+        rebased = False
+
+        with self._process_lock():
+            remote, branch = get_push_target(self.git)
+            for attempt in range(1, self.max_attempts + 1):
+                result = self.git.run(["push", remote, f"HEAD:{branch}"], check=False)
+                if result.returncode == 0:
+                    logger.info(f"Push succeeded (attempt {attempt})")
+                    break
+
+                output = result.stdout + result.stderr
+                if not any(marker in output for marker in REJECTION_MARKERS):
+                    raise GitError(f"git push failed: {output.strip()}")
+
+                if attempt == self.max_attempts:
+                    raise GitError(f"Push still rejected after {attempt} attempts")
+
+                logger.warning("Push rejected as non-fast-forward, rebasing and retrying")
+                try:
+                    rebase = self.git.run(
+                        ["pull", "--rebase", "--autostash", remote, branch],
+                        check=False
+                    )
+                except GitError:
+                    # Timed out: do not leave the checkout mid-rebase
+                    self.git.run(["rebase", "--abort"], check=False)
+                    raise
+                if rebase.returncode != 0:
+                    self.git.run(["rebase", "--abort"], check=False)
+                    raise GitError(f"Rebase onto {remote}/{branch} failed: "
+                                   f"{rebase.stderr.strip() or rebase.stdout.strip()}")
+                rebased = True
+
+        if not rebased:
+            return {r.issue_number: r.commit_sha for r in batch}
+        return self._find_rebased_shas(batch)
+
+    def _find_rebased_shas(self, batch: List[PushRequest]) -> Dict[int, str]:
+        """Map each request to its commit's SHA after a rebase, by message."""
+        log = self.git.run(
+            ["log", "--format=%H%x1f%B%x1e", f"-{max(50, len(batch) * 10)}", "HEAD"]
+        ).stdout
+        shas = {}
+        for record in log.split("\x1e"):
+            if "\x1f" not in record:
+                continue
+            sha, message = record.strip().split("\x1f", 1)
+            for request in batch:
+                if request.issue_number not in shas and message.strip() == request.commit_message.strip():
+                    shas[request.issue_number] = sha
+        return shas
+
+
+_coordinators: Dict[Path, PushCoordinator] = {}
+_coordinators_lock = threading.Lock()
+
+
+def get_push_coordinator(git: GitSession) -> PushCoordinator:
+    """Return the process-wide coordinator for a checkout.
+
+    Args:
+        git: Session whose checkout will be pushed
+
+    Returns:
+        PushCoordinator shared by all runs using that checkout
+    """
+    root = git.repo_root.resolve()
+    with _coordinators_lock:
+        if root not in _coordinators:
+            _coordinators[root] = PushCoordinator(
+                git=GitSession(root),
+                max_attempts=load_config()["git"]["push_max_attempts"],
+            )
+        return _coordinators[root]
@@ -0,0 +1,164 @@
+"""Readiness and admission control for the webhook listener.
+
+``/ready`` reports whether the listener can take more work: queue depth,
+worker saturation, the ingest backlog and whether the tools runs depend on
+(``claude``, ``gh``, ``npm``) can be started. Tool checks run ``<tool>
+--version`` and are cached for ``admission.tool_check_ttl_seconds``; an
+expired result is served while one background check refreshes it, so
+neither ``/ready`` nor ``/webhook`` waits for a subprocess (except for the
+very first check).
+
+``/webhook`` uses the same evaluation to shed ``issues`` events: 429 when the
+queue or the ingest backlog is over its threshold, 503 when a required tool
+is unavailable, both with ``Retry-After``. An opened issue whose event was
+shed is picked up by the reconcile poll.
+"""
+import logging
+import subprocess
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .config import load_config
+
+logger = logging.getLogger(__name__)
+
+
+class ToolChecker:
+    """TTL-cached availability of command-line tools."""
+
+    def __init__(self, tools: List[str], ttl_seconds: float, timeout_seconds: float):
+        """Create a checker.
+
+        Args:
+            tools: Commands to check (e.g. ["claude", "gh", "npm"])
+            ttl_seconds: How long a check result is served before refreshing
+            timeout_seconds: Timeout of one ``--version`` call
+        """
+        self.tools = tools
+        self.ttl_seconds = ttl_seconds
+        self.timeout_seconds = timeout_seconds
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    def _check(self, tool: str) -> Dict[str, Any]:
+        try:
+            result = subprocess.run(
+                [tool, "--version"], capture_output=True, text=True, timeout=self.timeout_seconds
+            )
+        except FileNotFoundError:
+            return {"available": False, "detail": "not found"}
+        except subprocess.TimeoutExpired:
+            return {"available": False, "detail": f"--version timed out after {self.timeout_seconds}s"}
+        except OSError as e:
+            return {"available": False, "detail": str(e)}
+        output = (result.stdout or result.stderr).strip()
+        first_line = output.splitlines()[0] if output else ""
+        return {"available": result.returncode == 0, "detail": first_line}
+
+    def refresh(self, max_age: Optional[float] = None) -> None:
+        """Check every tool now (one refresh at a time).
+
+        Args:
+            max_age: Skip the checks if a refresh that finished meanwhile
+                produced results at most this old
+        """
+        with self._refreshing:
+            with self._lock:
+                checked_at = self._checked_at
+            if max_age is not None and checked_at is not None and time.monotonic() - checked_at < max_age:
+                return
+            results = {}
+            for tool in self.tools:
+                results[tool] = self._check(tool)
+                if not results[tool]["available"]:
+                    logger.warning(f"Tool {tool} unavailable: {results[tool]['detail']}")
+            with self._lock:
+                self._results = results
+                self._checked_at = time.monotonic()
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Return the cached availability per tool.
+
+        An expired cache is refreshed in the background and served meanwhile;
+        only the first call waits for the checks.
+
+        Returns:
+            {tool: {"available", "detail", "age_seconds"}}
+        """
+        with self._lock:
+            checked_at = self._checked_at
+        if checked_at is None:
+            self.refresh(max_age=self.ttl_seconds)
+        elif time.monotonic() - checked_at >= self.ttl_seconds and not self._refreshing.locked():
+            threading.Thread(target=self.refresh, name="tool-check", daemon=True).start()
+
+        with self._lock:
+            age = round(time.monotonic() - self._checked_at, 1)
+            return {tool: {**result, "age_seconds": age} for tool, result in self._results.items()}
+
+
+def evaluate(
+    queue_depth: int,
+    running: int,
+    workers: int,
+    ingest_backlog: int,
+    tools: Dict[str, Dict[str, Any]],
+    settings: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Decide whether the listener should take more work.
+
+    Args:
+        queue_depth: Issues waiting for a worker
+        running: Issues being processed
+        workers: Configured issue workers
+        ingest_backlog: Acknowledged events not yet parsed
+        tools: ToolChecker.status()
+        settings: The ``admission`` config section
+
+    Returns:
+        Dict with "ready", "status_code" (200, 429 or 503), "reasons" and
+        the numbers it was based on
+    """
+    reasons = []
+    unavailable = [tool for tool, result in tools.items() if not result["available"]]
+    if unavailable:
+        reasons.append(f"tools unavailable: {', '.join(unavailable)}")
+
+    overloaded = False
+    max_depth = settings["max_queue_depth"]
+    if max_depth and queue_depth >= max_depth:
+        reasons.append(f"queue depth {queue_depth} >= {max_depth}")
+        overloaded = True
+    max_backlog = settings["max_ingest_backlog"]
+    if max_backlog and ingest_backlog >= max_backlog:
+        reasons.append(f"ingest backlog {ingest_backlog} >= {max_backlog}")
+        overloaded = True
+
+    # A missing tool is not fixed by waiting for the queue to drain
+    status_code = 503 if unavailable else 429 if overloaded else 200
+    return {
+        "ready": status_code == 200,
+        "status_code": status_code,
+        "reasons": reasons,
+        "queue_depth": queue_depth,
+        "ingest_backlog": ingest_backlog,
+        "workers": {
+            "total": workers,
+            "busy": running,
+            "saturation": round(running / workers, 2) if workers else 1.0,
+        },
+        "tools": tools,
+    }
+
+
+def create_tool_checker() -> ToolChecker:
+    """Create the tool checker from the ``admission`` config section."""
+    settings = load_config()["admission"]
+    return ToolChecker(
+        tools=settings["required_tools"],
+        ttl_seconds=settings["tool_check_ttl_seconds"],
+        timeout_seconds=settings["tool_check_timeout_seconds"],
+    )
@@ -0,0 +1,123 @@
+"""Reconciliation of open issues missed by the webhook listener.
+
+One paginated ``gh api`` call lists open issues updated since the last poll;
+those without the processing, completed or needs-review label that pass the
+processability rules are returned for bulk queueing. The cursor is kept in a
+state file, so API usage per poll stays constant however many issues wait.
+The caller advances it only once the issues found were queued or processed:
+issues not updated since would otherwise never be listed again.
+Issues that failed (needs-review) are left for a human, as a re-run would
+fail the same way.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import load_config
+from .fileio import atomic_write_json, read_json
+from .github import list_open_issues
+from .issues import is_issue_processable
+
+logger = logging.getLogger(__name__)
+
+CURSOR_FILENAME = "reconcile.json"
+
+
+def _format_timestamp(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class Reconciler:
+    """Find open issues that no run has picked up."""
+
+    def __init__(
+        self,
+        repo: str,
+        cursor_path: Path,
+        labels: Dict[str, str],
+        overlap_seconds: int,
+        page_size: int
+    ):
+        """Create a reconciler.
+
+        Args:
+            repo: Repository as "owner/name"
+            cursor_path: JSON file holding the ``since`` cursor
+            labels: The ``labels`` config section
+            overlap_seconds: How far before the previous poll the next one
+                starts, to tolerate clock skew with GitHub
+            page_size: Issues per API page
+        """
+        self.repo = repo
+        self.cursor_path = cursor_path
+        self.skip_labels = {labels["processing"], labels["completed"], labels["needs_review"]}
+        self.overlap_seconds = overlap_seconds
+        self.page_size = page_size
+        self._polled_at: Optional[datetime] = None
+
+    def load_cursor(self) -> Optional[str]:
+        """Return the ``since`` timestamp of the next poll, or None for a full scan."""
+        stored = read_json(self.cursor_path)
+        if isinstance(stored, dict) and isinstance(stored.get("since"), str):
+            return stored["since"]
+        return None
+
+    def save_cursor(self, polled_at: datetime) -> None:
+        """Store the cursor for the poll after one started at ``polled_at``."""
+        since = _format_timestamp(polled_at - timedelta(seconds=self.overlap_seconds))
+        self.cursor_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(self.cursor_path, {"since": since, "polled_at": time.time()})
+
+    def find_pending(self, full: bool = False) -> List[Dict[str, Any]]:
+        """List open issues waiting for a run.
+
+        Call advance() once they are queued or processed.
+
+        Args:
+            full: Ignore the cursor and scan all open issues
+
+        Returns:
+            Issue dicts shaped like ``get_issue`` results, oldest first
+
+        Raises:
+            GitHubError: If listing issues fails
+        """
+        polled_at = datetime.now(timezone.utc)
+        since = None if full else self.load_cursor()
+
+        pending = []
+        for issue in list_open_issues(self.repo, since=since, page_size=self.page_size):
+            labels = {label["name"] for label in issue.get("labels") or []}
+            if labels & self.skip_labels:
+                continue
+            processable, reason = is_issue_processable(issue)
+            if not processable:
+                logger.info(f"Reconcile: skipping issue #{issue['number']}: {reason}")
+                continue
+            pending.append(issue)
+
+        self._polled_at = polled_at
+        logger.info(f"Reconcile: {len(pending)} issue(s) waiting for a run")
+        return pending
+
+    def advance(self) -> None:
+        """Move the cursor past the last find_pending poll, once every issue it
+        returned was queued or processed."""
+        if self._polled_at is not None:
+            self.save_cursor(self._polled_at)
+            self._polled_at = None
+
+
+def create_reconciler() -> Reconciler:
+    """Create a reconciler from the ``reconcile`` config section."""
+    config = load_config()
+    settings = config["reconcile"]
+    return Reconciler(
+        repo=config["github"]["repo"],
+        cursor_path=Path(config["paths"]["state"]) / CURSOR_FILENAME,
+        labels=config["labels"],
+        overlap_seconds=settings["overlap_seconds"],
+        page_size=settings["page_size"],
+    )
@@ -0,0 +1,216 @@
+"""Precomputed repository map rendered into BUILD and TEST prompts.
+
+For every TypeScript source under the configured roots the indexer records
+exported symbols, component props and the matching test file. Entries are
+cached per file and recomputed only when the file's content hash changes
+(stat data is checked first so unchanged files are not even read).
+"""
+import hashlib
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import get_repo_root, load_config
+from .fileio import atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+CACHE_FILENAME = "repo_context.json"
+SOURCE_SUFFIXES = (".ts", ".tsx")
+
+EXPORT_RE = re.compile(
+    r"^export\s+(?:default\s+)?(?:async\s+)?"
+    r"(function|const|let|class|interface|type|enum)\s+(\w+)",
+    re.MULTILINE
+)
+DEFAULT_EXPORT_RE = re.compile(r"^export\s+default\s+(\w+)\s*;?\s*$", re.MULTILINE)
+PROPS_RE = re.compile(r"(?:interface|type)\s+(\w+Props)\s*=?\s*\{([^}]*)\}")
+
+
+def _is_test_file(rel_path: str) -> bool:
+    return ".test." in rel_path or ".spec." in rel_path
+
+
+def _subject_of_test(rel_path: str) -> str:
+    return rel_path.replace(".test.", ".").replace(".spec.", ".")
+
+
+def extract_file_info(content: str) -> Dict[str, Any]:
+    """Extract exported symbols and props declarations from a source file.
+
+    Args:
+        content: TypeScript/TSX source
+
+    Returns:
+        Dict with "exports" (["function TaskItem", ...]) and "props"
+        ({"TaskItemProps": "task: Task; onToggle: ..."})
+    """
+    exports = [f"{kind} {name}" for kind, name in EXPORT_RE.findall(content)]
+    exports += [
+        f"default {name}" for name in DEFAULT_EXPORT_RE.findall(content)
+    ]
+
+    props = {}
+    for name, body in PROPS_RE.findall(content):
+        fields = [
+            " ".join(line.strip().rstrip(";,").split())
+            for line in body.splitlines()
+            if line.strip() and not line.strip().startswith(("//", "/*", "*"))
+        ]
+        props[name] = "; ".join(fields)
+
+    return {"exports": exports, "props": props}
+
+
+class RepoContextIndex:
+    """Per-file cached map of the repository's TypeScript sources."""
+
+    def __init__(self, repo_root: Path, roots: List[str], cache_path: Path):
+        """Create an indexer.
+
+        Args:
+            repo_root: Repository root
+            roots: Directories (relative to the root) to index, in render order
+            cache_path: JSON file caching per-file entries
+        """
+        self.repo_root = repo_root
+        self.roots = roots
+        self.cache_path = cache_path
+
+        stored = read_json(cache_path)
+        self._files: Dict[str, Dict[str, Any]] = {}
+        if isinstance(stored, dict) and stored.get("version") == CACHE_VERSION:
+            self._files = stored.get("files", {})
+
+    def _source_files(self) -> List[Path]:
+        files = []
+        for root in self.roots:
+            base = self.repo_root / root
+            if not base.exists():
+                continue
+            files += sorted(
+                p for p in base.rglob("*")
+                if p.suffix in SOURCE_SUFFIXES
+                and "node_modules" not in p.parts
+                and not p.name.endswith(".d.ts")
+            )
+        return files
+
+    def refresh(self) -> int:
+        """Update cached entries for new, changed and deleted files.
+
+        Returns:
+            Number of entries recomputed or removed
+        """
+        changed = 0
+        present = set()
+
+        for path in self._source_files():
+            rel_path = path.relative_to(self.repo_root).as_posix()
+            present.add(rel_path)
+            stat = path.stat()
+            entry = self._files.get(rel_path)
+
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                continue
+
+            content = path.read_text(errors="replace")
+            digest = hashlib.sha256(content.encode()).hexdigest()
+            if entry and entry["hash"] == digest:
+                entry["mtime_ns"] = stat.st_mtime_ns
+                entry["size"] = stat.st_size
+                changed += 1
+                continue
+
+            info = extract_file_info(content)
+            self._files[rel_path] = {
+                "hash": digest,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "exports": info["exports"],
+                "props": info["props"],
+            }
+            changed += 1
+
+        for rel_path in list(self._files):
+            if rel_path not in present:
+                del self._files[rel_path]
+                changed += 1
+
+        if changed:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(self.cache_path, {"version": CACHE_VERSION, "files": self._files})
+            logger.info(f"Repo context updated ({changed} file(s), {len(self._files)} total)")
+
+        return changed
+
+    def render(self, budget_chars: int) -> str:
+        """Render the repo map as a markdown section within a character budget.
+
+        Args:
+            budget_chars: Max length of the rendered section
+
+        Returns:
+            Markdown section, or "" if nothing is indexed
+        """
+        tests = {
+            _subject_of_test(p): p for p in self._files if _is_test_file(p)
+        }
+        lines = []
+        for rel_path, entry in self._files.items():
+            if _is_test_file(rel_path):
+                continue
+            parts = [f"- `{rel_path}`"]
+            if entry["exports"]:
+                parts.append("exports " + ", ".join(entry["exports"]))
+            for name, fields in entry["props"].items():
+                parts.append(f"{name} {{ {fields} }}")
+            parts.append(f"test: `{tests[rel_path]}`" if rel_path in tests else "test: none")
+            lines.append(" — ".join(parts))
+
+        orphan_tests = sorted(
+            p for s, p in tests.items() if s not in self._files
+        )
+        if orphan_tests:
+            lines.append("- other tests: " + ", ".join(f"`{p}`" for p in orphan_tests))
+
+        if not lines:
+            return ""
+
+        header = (
+            "## Repository map (precomputed)\n\n"
+            "Source files with their exports, component props and tests. Use it "
+            "to go straight to the relevant files instead of exploring the tree.\n"
+        )
+        rendered = [header]
+        used = len(header)
+        for line in lines:
+            if used + len(line) + 1 > budget_chars:
+                rendered.append(f"- [... {len(lines) - len(rendered) + 1} more files omitted ...]")
+                break
+            rendered.append(line)
+            used += len(line) + 1
+
+        return "\n".join(rendered)
+
+
+def render_repo_context(repo_root: Optional[Path] = None) -> str:
+    """Refresh the repo map and render it within the configured budget.
+
+    Args:
+        repo_root: Repository root (default: get_repo_root())
+
+    Returns:
+        Markdown section for a prompt, or "" if nothing is indexed
+    """
+    config = load_config()
+    settings = config["repo_context"]
+    index = RepoContextIndex(
+        repo_root=repo_root or get_repo_root(),
+        roots=settings["roots"],
+        cache_path=Path(config["paths"]["state"]) / CACHE_FILENAME,
+    )
+    index.refresh()
+    return index.render(settings["budget_chars"])
@@ -0,0 +1,219 @@
+"""Priority queue with aging and per-class caps for incoming issues.
+
+Issues are ranked by a priority class derived from their conventional
+commit type (``fix`` before ``feat`` before ``docs``/``chore``). Waiting time
+lowers the effective priority value so low-value issues are not starved by a
+steady stream of bug reports, and each class can be capped to a maximum
+number of concurrently running issues.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .config import load_config
+from .issues import get_commit_type
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITY_BY_TYPE = {
+    "fix": 0,
+    "feat": 1,
+    "test": 2,
+    "refactor": 2,
+    "docs": 3,
+    "chore": 3,
+}
+DEFAULT_PRIORITY = 1
+
+
+def queue_entry(issue: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the queue entry of an issue.
+
+    Args:
+        issue: GitHub issue dict (number, title, labels)
+
+    Returns:
+        Dict with "issue_number", "title", "class", "priority",
+        "enqueued_at" and "issue"
+    """
+    commit_type = get_commit_type(issue)
+    return {
+        "issue_number": issue["number"],
+        "title": issue.get("title", ""),
+        "class": commit_type,
+        "priority": PRIORITY_BY_TYPE.get(commit_type, DEFAULT_PRIORITY),
+        "enqueued_at": time.time(),
+        "issue": issue,
+    }
+
+
+def effective_priority(entry: Dict[str, Any], now: float, aging_seconds: float) -> float:
+    """Priority value of a queued entry after aging (lower is served first)."""
+    waited = now - entry["enqueued_at"]
+    return entry["priority"] - waited / aging_seconds
+
+
+class IssueQueue:
+    """Thread-safe priority queue of issues waiting for a worker."""
+
+    def __init__(self, aging_seconds: float, class_caps: Dict[str, int]):
+        """Create a queue.
+
+        Args:
+            aging_seconds: Waiting time that raises an issue by one priority class
+            class_caps: Max concurrently running issues per commit type
+        """
+        self._aging_seconds = aging_seconds
+        self._class_caps = dict(class_caps)
+        self._queued: Dict[int, Dict[str, Any]] = {}
+        self._running: Dict[int, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+
+    def _effective_priority(self, entry: Dict[str, Any], now: float) -> float:
+        return effective_priority(entry, now, self._aging_seconds)
+
+    def _is_capped(self, commit_type: str) -> bool:
+        cap = self._class_caps.get(commit_type)
+        if cap is None:
+            return False
+        running = sum(1 for e in self._running.values() if e["class"] == commit_type)
+        return running >= cap
+
+    def _ordered(self, now: float) -> List[Dict[str, Any]]:
+        return sorted(
+            self._queued.values(),
+            key=lambda e: (self._effective_priority(e, now), e["enqueued_at"])
+        )
+
+    def put(self, issue: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Queue an issue unless it is already queued or running.
+
+        Args:
+            issue: GitHub issue dict (number, title, labels)
+
+        Returns:
+            The queue entry, or None if the issue was a duplicate
+        """
+        entry = queue_entry(issue)
+        issue_number = entry["issue_number"]
+
+        with self._cond:
+            if issue_number in self._queued or issue_number in self._running:
+                logger.info(f"Issue #{issue_number} already queued or running")
+                return None
+            self._queued[issue_number] = entry
+            self._cond.notify_all()
+
+        logger.info(
+            f"Queued issue #{issue_number} (class={entry['class']}, "
+            f"priority={entry['priority']})"
+        )
+        return entry
+
+    def put_many(self, issues: List[Dict[str, Any]]) -> int:
+        """Queue several issues, skipping those already queued or running.
+
+        Args:
+            issues: GitHub issue dicts
+
+        Returns:
+            Number of issues newly queued
+        """
+        return sum(1 for issue in issues if self.put(issue) is not None)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Take the best eligible issue, blocking until one is available.
+
+        Args:
+            timeout: Max seconds to wait (None waits forever)
+
+        Returns:
+            Queue entry, or None on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                for entry in self._ordered(time.time()):
+                    if not self._is_capped(entry["class"]):
+                        del self._queued[entry["issue_number"]]
+                        entry["started_at"] = time.time()
+                        self._running[entry["issue_number"]] = entry
+                        return entry
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                # Aging can reorder entries while we wait, so re-check periodically
+                self._cond.wait(timeout=1.0 if remaining is None else min(1.0, remaining))
+
+    def remove(self, issue_number: int) -> bool:
+        """Drop a queued (not yet running) issue.
+
+        Returns:
+            True if the issue was queued
+        """
+        with self._cond:
+            entry = self._queued.pop(issue_number, None)
+            self._cond.notify_all()
+        if entry is not None:
+            logger.info(f"Removed issue #{issue_number} from the queue")
+        return entry is not None
+
+    def done(self, entry: Dict[str, Any]) -> None:
+        """Mark a running issue as finished, freeing its class slot."""
+        with self._cond:
+            self._running.pop(entry["issue_number"], None)
+            self._cond.notify_all()
+
+    def depth(self) -> int:
+        """Return the number of queued (not yet running) issues."""
+        with self._cond:
+            return len(self._queued)
+
+    def running_count(self) -> int:
+        """Return the number of issues being processed."""
+        with self._cond:
+            return len(self._running)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return queued issues in dispatch order plus running issues."""
+        now = time.time()
+        with self._cond:
+            queued = [
+                {
+                    "issue": e["issue_number"],
+                    "title": e["title"],
+                    "class": e["class"],
+                    "priority": e["priority"],
+                    "effective_priority": round(self._effective_priority(e, now), 3),
+                    "waiting_seconds": round(now - e["enqueued_at"], 1),
+                    "capped": self._is_capped(e["class"]),
+                }
+                for e in self._ordered(now)
+            ]
+            running = [
+                {
+                    "issue": e["issue_number"],
+                    "title": e["title"],
+                    "class": e["class"],
+                    "running_seconds": round(now - e["started_at"], 1),
+                    "worker": e.get("worker"),
+                    "lease_seconds_left": (
+                        round(e["lease_expires_at"] - now, 1) if "lease_expires_at" in e else None
+                    ),
+                }
+                for e in self._running.values()
+            ]
+        return {"queued": queued, "running": running, "caps": dict(self._class_caps)}
+
+
+def create_issue_queue() -> IssueQueue:
+    """Create an issue queue from the ``scheduling`` config section."""
+    settings = load_config()["scheduling"]
+    return IssueQueue(
+        aging_seconds=settings["aging_seconds"],
+        class_caps=settings.get("class_caps") or {},
+    )
@@ -0,0 +1,256 @@
+"""BM25 index over specs/ for retrieving similar past specs.
+
+Per-spec term counts are persisted as JSON next to the workflow state and
+re-indexed only when a spec's content hash changes, so refreshing the index
+costs one hash per spec. The inverted index (term -> spec -> frequency) is
+built in memory from the stored counts.
+"""
+import hashlib
+import logging
+import math
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import load_config
+from .fileio import atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+INDEX_FILENAME = "spec_index.json"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in is it its of on or that the
+    this to was were will with should must can when then than into not no
+""".split())
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms without stopwords or 1-char tokens.
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms
+    """
+    return [
+        term for term in TOKEN_RE.findall(text.lower())
+        if len(term) > 1 and term not in STOPWORDS
+    ]
+
+
+def _count_terms(terms: List[str]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for term in terms:
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+class SpecIndex:
+    """Incrementally maintained BM25 index of spec files."""
+
+    def __init__(self, specs_dir: Path, index_path: Path):
+        """Create an index.
+
+        Args:
+            specs_dir: Directory containing spec markdown files
+            index_path: JSON file persisting per-spec term counts
+        """
+        self.specs_dir = specs_dir
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+
+        stored = read_json(index_path)
+        if isinstance(stored, dict) and stored.get("version") == INDEX_VERSION:
+            self._docs = stored.get("docs", {})
+        self._rebuild_postings()
+
+    def _rebuild_postings(self) -> None:
+        postings: Dict[str, Dict[str, int]] = {}
+        for name, doc in self._docs.items():
+            for term, count in doc["terms"].items():
+                postings.setdefault(term, {})[name] = count
+        self._postings = postings
+
+    def _save(self) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(self.index_path, {"version": INDEX_VERSION, "docs": self._docs})
+
+    def _index_file(self, path: Path) -> bool:
+        content = path.read_text()
+        digest = hashlib.sha256(content.encode()).hexdigest()
+        current = self._docs.get(path.name)
+        if current and current["hash"] == digest:
+            return False
+        terms = tokenize(content)
+        self._docs[path.name] = {
+            "hash": digest,
+            "length": len(terms),
+            "terms": _count_terms(terms),
+        }
+        return True
+
+    def _spec_files(self) -> List[Path]:
+        if not self.specs_dir.exists():
+            return []
+        return sorted(
+            p for p in self.specs_dir.glob("*.md") if p.name.lower() != "readme.md"
+        )
+
+    def refresh(self) -> int:
+        """Re-index new or changed specs and drop deleted ones.
+
+        Returns:
+            Number of specs added, updated or removed
+        """
+        with self._lock:
+            files = self._spec_files()
+            present = {p.name for p in files}
+            changed = sum(1 for p in files if self._index_file(p))
+
+            for name in list(self._docs):
+                if name not in present:
+                    del self._docs[name]
+                    changed += 1
+
+            if changed:
+                self._rebuild_postings()
+                self._save()
+                logger.info(f"Spec index updated ({changed} change(s), {len(self._docs)} specs)")
+            return changed
+
+    def add(self, path: Path) -> None:
+        """Index (or re-index) a single spec file.
+
+        Args:
+            path: Spec file inside the specs directory
+        """
+        with self._lock:
+            if self._index_file(path):
+                self._rebuild_postings()
+                self._save()
+
+    def remove(self, name: str) -> None:
+        """Drop a spec from the index by filename.
+
+        Args:
+            name: Spec filename (e.g. "issue-18-spec.md")
+        """
+        with self._lock:
+            if self._docs.pop(name, None) is not None:
+                self._rebuild_postings()
+                self._save()
+
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        exclude_prefix: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """Rank specs by BM25 relevance to a query.
+
+        Args:
+            query: Free text (e.g. issue title and body)
+            top_k: Max number of results
+            exclude_prefix: Skip specs whose filename starts with this
+
+        Returns:
+            List of (spec filename, score), best first, scores > 0 only
+        """
+        with self._lock:
+            n_docs = len(self._docs)
+            if n_docs == 0:
+                return []
+            avg_length = sum(d["length"] for d in self._docs.values()) / n_docs or 1.0
+
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for name, tf in postings.items():
+                    length = self._docs[name]["length"]
+                    norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_length))
+                    scores[name] = scores.get(name, 0.0) + idf * norm
+
+        ranked = sorted(
+            (
+                (name, score) for name, score in scores.items()
+                if not (exclude_prefix and name.startswith(exclude_prefix))
+            ),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        return ranked[:top_k]
+
+
+_index: Optional[SpecIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_spec_index() -> SpecIndex:
+    """Return the process-wide spec index, refreshed on first use."""
+    global _index
+
+    with _index_lock:
+        if _index is None:
+            paths = load_config()["paths"]
+            _index = SpecIndex(
+                specs_dir=Path(paths["specs"]),
+                index_path=Path(paths["state"]) / INDEX_FILENAME,
+            )
+            _index.refresh()
+        return _index
+
+
+def render_similar_specs(issue_number: int, title: str, body: str) -> str:
+    """Render the most similar existing specs as a prompt reference section.
+
+    Args:
+        issue_number: Issue being planned (its own specs are excluded)
+        title: Issue title
+        body: Issue body
+
+    Returns:
+        Markdown section, or "" if no spec is similar enough
+    """
+    settings = load_config()["spec_index"]
+    index = get_spec_index()
+    matches = index.search(
+        f"{title}\n{body}",
+        settings["top_k"],
+        exclude_prefix=f"issue-{issue_number}-"
+    )
+    if not matches:
+        return ""
+
+    limit = settings["max_chars_per_spec"]
+    sections = [
+        "## Reference: similar past specs",
+        "",
+        "These existing specs cover related features. Follow their structure "
+        "and conventions where they apply; do not copy requirements that are "
+        "not part of this issue.",
+    ]
+    for name, score in matches:
+        path = index.specs_dir / name
+        if not path.exists():
+            continue
+        content = path.read_text()
+        if len(content) > limit:
+            content = content[:limit] + "\n[... truncated ...]"
+        sections += ["", f"### specs/{name}", "", content]
+        logger.info(f"Including similar spec {name} (score {score:.2f})")
+
+    return "\n".join(sections)
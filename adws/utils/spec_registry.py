@@ -0,0 +1,140 @@
+"""Registry of the spec PLAN wrote for each issue.
+
+Each issue maps to its current spec file and a hash of the issue title and
+body the spec was generated from. Re-running PLAN for an issue that has not
+changed reuses the registered spec instead of calling Claude; when the issue
+did change, the new spec replaces the old one (and any other spec of the
+issue left over from earlier runs, e.g. under a previous title) rather than
+being added beside it.
+
+The registry is one JSON file next to the workflow state. Every update
+re-reads it under an exclusive lock on a ``.lock`` file beside it, so runs of
+different issues in separate processes do not drop each other's entries.
+"""
+import fcntl
+import hashlib
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import load_config
+from .fileio import atomic_write_json, read_json
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_VERSION = 1
+REGISTRY_FILENAME = "spec_registry.json"
+
+
+def issue_hash(title: str, body: Optional[str]) -> str:
+    """Hash the issue content a spec is generated from.
+
+    Args:
+        title: Issue title
+        body: Issue body (None for an empty body)
+
+    Returns:
+        Hex SHA-256 of title and body
+    """
+    content = json.dumps([title.strip(), (body or "").strip()])
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def stale_specs(specs_dir: Path, issue_number: int, keep: Path) -> List[Path]:
+    """Return the other spec files of an issue.
+
+    Args:
+        specs_dir: Directory containing spec markdown files
+        issue_number: GitHub issue number
+        keep: The issue's current spec
+
+    Returns:
+        Existing ``issue-<N>-*.md`` files other than keep
+    """
+    if not specs_dir.exists():
+        return []
+    return sorted(
+        path for path in specs_dir.glob(f"issue-{issue_number}-*.md")
+        if path.name != keep.name
+    )
+
+
+class SpecRegistry:
+    """Issue number -> current spec and the issue hash it was written for."""
+
+    def __init__(self, registry_path: Path):
+        """Create a registry.
+
+        Args:
+            registry_path: JSON file persisting the registry
+        """
+        self.registry_path = registry_path
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _process_lock(self) -> Iterator[None]:
+        self.registry_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.registry_path.with_suffix(".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        stored = read_json(self.registry_path)
+        if isinstance(stored, dict) and stored.get("version") == REGISTRY_VERSION:
+            return stored.get("issues", {})
+        return {}
+
+    def lookup(self, issue_number: int, content_hash: str) -> Optional[str]:
+        """Return the issue's spec if it was generated from the same content.
+
+        Args:
+            issue_number: GitHub issue number
+            content_hash: issue_hash of the current title and body
+
+        Returns:
+            Spec filename, or None if the issue is not registered or changed since
+        """
+        with self._lock:
+            entry = self._load().get(str(issue_number))
+        if not entry or entry["hash"] != content_hash:
+            return None
+        return entry["spec"]
+
+    def register(self, issue_number: int, spec_path: Path, content_hash: str) -> None:
+        """Record the spec written for an issue.
+
+        Args:
+            issue_number: GitHub issue number
+            spec_path: Spec file written by PLAN
+            content_hash: issue_hash of the title and body it was written for
+        """
+        with self._lock, self._process_lock():
+            issues = self._load()
+            issues[str(issue_number)] = {
+                "spec": spec_path.name,
+                "hash": content_hash,
+                "updated_at": time.time(),
+            }
+            atomic_write_json(self.registry_path, {"version": REGISTRY_VERSION, "issues": issues})
+
+
+_registry: Optional[SpecRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_spec_registry() -> SpecRegistry:
+    """Return the process-wide spec registry."""
+    global _registry
+
+    with _registry_lock:
+        if _registry is None:
+            paths = load_config()["paths"]
+            _registry = SpecRegistry(Path(paths["state"]) / REGISTRY_FILENAME)
+        return _registry
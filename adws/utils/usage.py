@@ -0,0 +1,127 @@
+"""Token, cost and model-time accounting for one workflow run.
+
+Every Claude call of a run is recorded with the usage the CLI reports in its
+JSON output; totals are kept per phase and for the whole run. A run can be
+given a token budget, checked before each call, so retries stop once a run
+has used up its share instead of burning through ``max_retries`` full calls.
+(The run's wall clock is bounded by its Deadline, see ``deadline.py``.)
+
+``total_tokens`` counts input, output and cache-creation tokens; cache reads
+(cheap, and large for resumed sessions) are reported but not budgeted.
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+
+class BudgetExceededError(Exception):
+    """Raised when a run has used up its token budget."""
+    pass
+
+
+def parse_usage(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract token counts and cost from a CLI JSON result.
+
+    Args:
+        data: Parsed ``claude -p --output-format json`` output
+
+    Returns:
+        Dict with the USAGE_FIELDS token counts, "total_tokens" and "cost_usd"
+    """
+    raw = data.get("usage") or {}
+    usage = {field: int(raw.get(field) or 0) for field in USAGE_FIELDS}
+    usage["total_tokens"] = (
+        usage["input_tokens"] + usage["output_tokens"] + usage["cache_creation_input_tokens"]
+    )
+    usage["cost_usd"] = float(data.get("total_cost_usd") or data.get("cost_usd") or 0.0)
+    return usage
+
+
+def _empty_totals() -> Dict[str, Any]:
+    totals: Dict[str, Any] = {field: 0 for field in USAGE_FIELDS}
+    totals.update({"total_tokens": 0, "cost_usd": 0.0, "model_seconds": 0.0, "calls": 0})
+    return totals
+
+
+class RunUsage:
+    """Usage of one run, with an optional token budget."""
+
+    def __init__(self, max_tokens: int = 0, started_at: Optional[float] = None):
+        """Start accounting for a run.
+
+        Args:
+            max_tokens: Token budget for the run (0 = unlimited)
+            started_at: Run start as a UNIX timestamp (default: now)
+        """
+        self.max_tokens = max_tokens
+        self.started_at = started_at or time.time()
+        self.calls: List[Dict[str, Any]] = []
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.totals = _empty_totals()
+
+    def record(self, phase: str, usage: Dict[str, Any], seconds: float, resumed: bool) -> None:
+        """Add one Claude call to the run's totals.
+
+        Args:
+            phase: Phase that made the call
+            usage: Result of parse_usage (may be empty for plain-text output)
+            seconds: Wall time of the call
+            resumed: Whether the call resumed an existing session
+        """
+        call = {"phase": phase, "resumed": resumed, "seconds": round(seconds, 3)}
+        call.update({key: usage.get(key, 0) for key in (*USAGE_FIELDS, "total_tokens", "cost_usd")})
+        self.calls.append(call)
+
+        for totals in (self.phases.setdefault(phase, _empty_totals()), self.totals):
+            for key in (*USAGE_FIELDS, "total_tokens", "cost_usd"):
+                totals[key] += call[key]
+            totals["model_seconds"] = round(totals["model_seconds"] + call["seconds"], 3)
+            totals["calls"] += 1
+
+        logger.info(
+            f"{phase}: {call['total_tokens']} tokens, ${call['cost_usd']:.4f}, "
+            f"{call['seconds']:.1f}s (run total {self.totals['total_tokens']} tokens)"
+        )
+
+    def check(self) -> None:
+        """Raise if the run has exhausted its token budget.
+
+        Raises:
+            BudgetExceededError: If the token budget is used up
+        """
+        if self.max_tokens and self.totals["total_tokens"] >= self.max_tokens:
+            raise BudgetExceededError(
+                f"Token budget exceeded ({self.totals['total_tokens']} of {self.max_tokens} tokens)"
+            )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for the session file and the run state."""
+        return {
+            "started_at": self.started_at,
+            "budget": {"max_tokens": self.max_tokens},
+            "totals": self.totals,
+            "phases": self.phases,
+            "calls": self.calls,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunUsage":
+        """Restore usage saved with to_dict."""
+        budget = data.get("budget") or {}
+        usage = cls(
+            max_tokens=budget.get("max_tokens", 0),
+            started_at=data.get("started_at"),
+        )
+        usage.calls = data.get("calls") or []
+        usage.phases = data.get("phases") or {}
+        usage.totals = {**_empty_totals(), **(data.get("totals") or {})}
+        return usage
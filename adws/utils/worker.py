@@ -0,0 +1,234 @@
+"""Issue workers: claim issues from a broker and run the orchestrator on them.
+
+Each run is an orchestrator subprocess in this checkout (or in the issue's
+warm workspace, when the listener prepared one). While it runs, a heartbeat
+thread renews the worker's lease every ``broker.heartbeat_seconds``; when a
+heartbeat fails (cancellation was requested, or the lease expired and the
+issue went to another worker) the run gets SIGTERM and stops before its next
+step.
+"""
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .broker import Broker
+from .capture import artifact_path, run_captured
+from .config import load_config
+from .fileio import atomic_write_json
+from .workspace import WarmupManager
+
+logger = logging.getLogger(__name__)
+
+ADWS_DIR = Path(__file__).parent.parent
+
+# Orchestrator processes of issues running in this process, so a run can be cancelled
+_running: Dict[int, subprocess.Popen] = {}
+_running_lock = threading.Lock()
+
+
+def worker_id(index: int) -> str:
+    """Return a worker id unique across hosts: ``host:pid:index``."""
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def is_local_worker(worker: str) -> bool:
+    """Return whether a worker id belongs to this process."""
+    return worker.startswith(f"{socket.gethostname()}:{os.getpid()}:")
+
+
+def terminate_run(issue_number: int) -> bool:
+    """Send SIGTERM to an issue's orchestrator running in this process.
+
+    Returns:
+        True if the issue was running here
+    """
+    with _running_lock:
+        process = _running.get(issue_number)
+    if process is None:
+        return False
+    logger.info(f"Cancelling run for issue #{issue_number} (pid {process.pid})")
+    process.terminate()
+    return True
+
+
+def terminate_all() -> int:
+    """Send SIGTERM to every orchestrator running in this process and return how many."""
+    with _running_lock:
+        issue_numbers = list(_running)
+    return sum(1 for issue_number in issue_numbers if terminate_run(issue_number))
+
+
+def local_runs() -> List[int]:
+    """Return the issue numbers running in this process."""
+    with _running_lock:
+        return list(_running)
+
+
+def run_issue(issue_number: int, issue: Optional[Dict[str, Any]] = None, workspace: Optional[Path] = None) -> bool:
+    """Run the orchestrator for an issue and wait for it.
+
+    Args:
+        issue_number: GitHub issue number
+        issue: Issue data from the webhook payload, handed to the orchestrator
+            so it does not fetch the issue again
+        workspace: Warm workspace prepared for the issue
+
+    Returns:
+        True if the run succeeded
+    """
+    logger.info(f"Processing issue #{issue_number} in background...")
+    issue_file = None
+
+    try:
+        command = [sys.executable, str(ADWS_DIR / "orchestrator.py"), str(issue_number)]
+
+        if issue is not None:
+            issue_file = Path(load_config()["paths"]["state"]) / "payloads" / f"issue-{issue_number}.json"
+            issue_file.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(issue_file, issue)
+            command += ["--issue-file", str(issue_file)]
+
+        if workspace is not None:
+            command += ["--workspace", str(workspace)]
+
+        def register(process: subprocess.Popen) -> None:
+            with _running_lock:
+                _running[issue_number] = process
+
+        # Run orchestrator using the same Python interpreter (from venv);
+        # its output is kept as a run artifact, only the tail in memory
+        try:
+            result = run_captured(
+                command,
+                artifact_path("orchestrator", issue_number),
+                cwd=str(ADWS_DIR.parent),  # Run from repo root
+                merge_stderr=True,
+                on_start=register
+            )
+        finally:
+            with _running_lock:
+                _running.pop(issue_number, None)
+
+        if result.returncode == 0:
+            logger.info(f"Issue #{issue_number} processed successfully")
+            return True
+        tail = "\n".join(result.stdout.splitlines()[-20:])
+        logger.error(
+            f"Issue #{issue_number} processing failed (full output: "
+            f"{result.artifacts.get('stdout', 'none')}):\n{tail}"
+        )
+
+    except Exception as e:
+        logger.error(f"Error processing issue #{issue_number}: {e}", exc_info=True)
+
+    finally:
+        if issue_file is not None:
+            issue_file.unlink(missing_ok=True)
+
+    return False
+
+
+class IssueWorker:
+    """Claims issues from a broker one at a time and runs them under a lease."""
+
+    def __init__(
+        self,
+        broker: Broker,
+        worker_id: str,
+        heartbeat_seconds: float,
+        warmups: Optional[WarmupManager] = None
+    ):
+        """Create a worker.
+
+        Args:
+            broker: Broker to claim issues from
+            worker_id: Unique id of this worker (see worker_id())
+            heartbeat_seconds: Interval of lease renewals
+            warmups: Warm workspaces of this host (the listener's), if any
+        """
+        self.broker = broker
+        self.worker_id = worker_id
+        self.heartbeat_seconds = heartbeat_seconds
+        self.warmups = warmups
+
+    def _heartbeat(self, issue_number: int, finished: threading.Event) -> None:
+        while not finished.wait(self.heartbeat_seconds):
+            try:
+                alive = self.broker.heartbeat(issue_number, self.worker_id)
+            except Exception as e:
+                # A missed renewal is not fatal; the lease outlasts a few of them
+                logger.warning(f"Heartbeat for issue #{issue_number} failed: {e}")
+                continue
+            if not alive:
+                logger.warning(f"Lost the lease on issue #{issue_number} (cancelled or expired), stopping its run")
+                terminate_run(issue_number)
+                return
+
+    def run_once(self, timeout: Optional[float] = None) -> bool:
+        """Claim one issue and run it.
+
+        Args:
+            timeout: Max seconds to wait for an issue (None waits forever)
+
+        Returns:
+            False if no issue was claimed before the timeout
+        """
+        entry = self.broker.claim(self.worker_id, timeout=timeout)
+        if entry is None:
+            return False
+
+        issue_number = entry["issue_number"]
+        logger.info(f"Worker {self.worker_id} claimed issue #{issue_number} (attempt {entry['attempts']})")
+        workspace = self.warmups.path_for(issue_number) if self.warmups is not None else None
+        finished = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(issue_number, finished),
+            name=f"heartbeat-{issue_number}", daemon=True
+        )
+        heartbeat.start()
+        succeeded = False
+        try:
+            succeeded = run_issue(issue_number, entry["issue"], workspace)
+        finally:
+            finished.set()
+            heartbeat.join()
+            if self.warmups is not None:
+                # Handed over or not: the run is over, keep a failed run's tree
+                self.warmups.discard(issue_number, "run finished", keep=not succeeded)
+            self.broker.complete(issue_number, self.worker_id)
+        return True
+
+    def run_forever(self, stop: Optional[threading.Event] = None) -> None:
+        """Claim and run issues until stop is set.
+
+        Args:
+            stop: Event ending the loop after the current run
+        """
+        while stop is None or not stop.is_set():
+            try:
+                self.run_once(timeout=1.0)
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} failed to claim an issue: {e}")
+                time.sleep(1.0)
+
+
+def create_issue_worker(broker: Broker, index: int, warmups: Optional[WarmupManager] = None) -> IssueWorker:
+    """Create a worker with the ``broker.heartbeat_seconds`` setting.
+
+    Args:
+        broker: Broker to claim issues from
+        index: Number of the worker within this process
+        warmups: Warm workspaces of this host, if any
+    """
+    return IssueWorker(
+        broker,
+        worker_id(index),
+        load_config()["broker"]["heartbeat_seconds"],
+        warmups=warmups,
+    )
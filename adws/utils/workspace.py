@@ -0,0 +1,370 @@
+"""Speculative warm-up of a run's workspace.
+
+When the listener receives a plausible ``opened`` event it starts preparing
+a workspace for the issue right away, while the event waits in the queue and
+the orchestrator makes its pre-flight GitHub calls: a detached worktree at
+the latest commit of the push target (see push.get_push_target), node_modules hydrated from the
+dependency snapshot, and one type-check to warm tsc's incremental build
+info. The orchestrator waits for the warm-up once its pre-flight calls are
+done, brings the worktree up to the remote branch again and runs the issue
+in it (``ADW_REPO_ROOT``), keeping logs and state in the listener's checkout
+(``ADW_STATE_ROOT``) and pushing to the same target as the checkout
+(``ADW_PUSH_REMOTE``/``ADW_PUSH_BRANCH``, as the worktree's HEAD is detached). A workspace whose issue is rejected, dequeued or
+finished is removed; workspaces of failed runs are kept for inspection, up
+to ``warmup.keep_failed``.
+
+The listener tracks warm-ups in memory and publishes each one's status in
+``state/workspaces/issue-N.json`` for the orchestrator process.
+"""
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .capture import artifact_path, run_captured
+from .config import get_repo_root, get_state_root, load_config
+from .deadline import Deadline, RunCancelledError, call_timeout
+from .deps import DependencyError, ensure_dependencies
+from .fileio import atomic_write_json, read_json
+from .git import GitError, GitSession
+from .governor import RESOURCE_NODE, get_governor
+from .push import get_push_target
+
+logger = logging.getLogger(__name__)
+
+# Cap on the warm-up type-check (the same as BUILD's)
+TYPE_CHECK_TIMEOUT_SECONDS = 120
+# How often the orchestrator re-reads a warm-up's status
+WAIT_POLL_SECONDS = 0.5
+
+
+def status_path(issue_number: int) -> Path:
+    """Return the file publishing the warm-up status of an issue."""
+    return Path(load_config()["paths"]["state"]) / "workspaces" / f"issue-{issue_number}.json"
+
+
+def update_workspace(path: Path, remote: str, branch: str, deadline: Optional[Deadline] = None) -> str:
+    """Move a workspace to the latest remote branch and re-hydrate if needed.
+
+    Args:
+        path: Worktree to update
+        remote: Remote to fetch
+        branch: Remote branch to check out (detached)
+        deadline: Deadline bounding the fetch and the dependency hydration
+
+    Returns:
+        SHA the workspace is at
+
+    Raises:
+        GitError: If fetching or checking out fails
+        DependencyError: If node_modules cannot be hydrated
+    """
+    git = GitSession(path)
+    git.run(["fetch", "--quiet", remote, branch], deadline=deadline)
+    sha = git.run(["rev-parse", f"{remote}/{branch}"]).stdout.strip()
+    if git.head_sha() != sha:
+        git.run(["checkout", "--quiet", "--detach", sha], deadline=deadline)
+        # Re-hydrates only when the lockfile changed
+        ensure_dependencies(path, deadline=deadline)
+    return sha
+
+
+class WarmWorkspace:
+    """One issue's workspace being prepared or waiting for its run."""
+
+    def __init__(self, issue_number: int, path: Path, timeout: float):
+        self.issue_number = issue_number
+        self.path = path
+        self.deadline = Deadline(timeout, issue_number)
+        self.ready = threading.Event()
+        self.error: Optional[str] = None
+        self.report: Dict[str, Any] = {}
+        self.started_at = time.time()
+
+
+class WarmupManager:
+    """Prepare, hand over and remove warm workspaces (listener side)."""
+
+    def __init__(
+        self,
+        repo_root: Path,
+        directory: Path,
+        enabled: bool,
+        max_workspaces: int,
+        timeout_seconds: float,
+        type_check: bool,
+        keep_failed: int
+    ):
+        """Create a manager.
+
+        Args:
+            repo_root: Checkout the worktrees are added to
+            directory: Directory holding the worktrees (outside the checkout)
+            enabled: When False, start() does nothing
+            max_workspaces: Workspaces being prepared or waiting at once
+            timeout_seconds: A warm-up taking longer is abandoned
+            type_check: Run one type-check to warm tsc
+            keep_failed: Workspaces of failed runs kept for inspection
+        """
+        self.repo_root = repo_root
+        self.directory = directory
+        self.enabled = enabled
+        self.max_workspaces = max_workspaces
+        self.timeout_seconds = timeout_seconds
+        self.type_check = type_check
+        self.keep_failed = keep_failed
+        self._workspaces: Dict[int, WarmWorkspace] = {}
+        self._lock = threading.Lock()
+
+    def _publish(self, workspace: WarmWorkspace, status: str) -> None:
+        path = status_path(workspace.issue_number)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(path, {
+            "issue_number": workspace.issue_number,
+            "path": str(workspace.path),
+            "status": status,
+            "error": workspace.error,
+            "report": workspace.report,
+            "updated_at": time.time(),
+        })
+
+    def start(self, issue_number: int) -> bool:
+        """Start warming a workspace for an issue in the background.
+
+        Args:
+            issue_number: GitHub issue number
+
+        Returns:
+            True if a warm-up was started; False if disabled, at capacity,
+            or the issue already has a workspace
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            if issue_number in self._workspaces:
+                return False
+            if len(self._workspaces) >= self.max_workspaces:
+                logger.info(f"Not warming a workspace for issue #{issue_number}: "
+                            f"{self.max_workspaces} already in use")
+                return False
+            workspace = WarmWorkspace(
+                issue_number, self.directory / f"issue-{issue_number}", self.timeout_seconds
+            )
+            self._workspaces[issue_number] = workspace
+            self._publish(workspace, "preparing")
+
+        threading.Thread(
+            target=self._prepare, args=(workspace,), name=f"warmup-{issue_number}", daemon=True
+        ).start()
+        return True
+
+    def _prepare(self, workspace: WarmWorkspace) -> None:
+        started = time.monotonic()
+        deadline = workspace.deadline
+        try:
+            git = GitSession(self.repo_root)
+            remote, branch = get_push_target(git)
+            workspace.report["remote"] = remote
+            workspace.report["branch"] = branch
+            git.run(["fetch", "--quiet", remote, branch], deadline=deadline)
+            base_sha = git.run(["rev-parse", f"{remote}/{branch}"]).stdout.strip()
+            if workspace.path.exists():
+                self._remove(workspace.path)
+            workspace.path.parent.mkdir(parents=True, exist_ok=True)
+            git.run(["worktree", "add", "--detach", str(workspace.path), base_sha], deadline=deadline)
+            workspace.report["base_sha"] = base_sha
+
+            deadline.check()
+            hydration = ensure_dependencies(workspace.path, deadline=deadline)
+            workspace.report["dependencies"] = hydration["method"] if hydration else None
+
+            if self.type_check and hydration is not None:
+                # Only the build info matters: a failing, slow or missing
+                # type-check leaves the workspace usable
+                try:
+                    with get_governor().slot(RESOURCE_NODE):
+                        result = run_captured(
+                            ["npm", "run", "type-check"],
+                            artifact_path("warmup-type-check", workspace.issue_number),
+                            cwd=str(workspace.path),
+                            timeout=call_timeout(deadline, TYPE_CHECK_TIMEOUT_SECONDS),
+                            deadline=deadline,
+                            limits=True
+                        )
+                    workspace.report["type_check"] = result.returncode == 0
+                except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+                    logger.info(f"Warm-up type-check skipped: {e}")
+                    workspace.report["type_check"] = None
+
+            workspace.report["seconds"] = round(time.monotonic() - started, 2)
+            logger.info(f"Warm workspace for issue #{workspace.issue_number} ready in "
+                        f"{workspace.report['seconds']}s at {base_sha[:8]}")
+        except RunCancelledError as e:
+            workspace.error = str(e)
+        except (GitError, DependencyError, OSError, subprocess.SubprocessError) as e:
+            workspace.error = str(e)
+            logger.warning(f"Warm-up for issue #{workspace.issue_number} failed: {e}")
+
+        with self._lock:
+            discarded = self._workspaces.get(workspace.issue_number) is not workspace
+            if not discarded:
+                self._publish(workspace, "failed" if workspace.error else "ready")
+                if workspace.error:
+                    del self._workspaces[workspace.issue_number]
+            workspace.ready.set()
+        if discarded or workspace.error:
+            self._remove(workspace.path)
+
+    def path_for(self, issue_number: int) -> Optional[Path]:
+        """Return the workspace of an issue, if one is being prepared or ready."""
+        with self._lock:
+            workspace = self._workspaces.get(issue_number)
+        return workspace.path if workspace else None
+
+    def discard(self, issue_number: int, reason: str, keep: bool = False) -> None:
+        """Stop tracking an issue's workspace and remove it.
+
+        A warm-up still in progress is cancelled and removes its workspace
+        itself.
+
+        Args:
+            issue_number: GitHub issue number
+            reason: Why (for the log)
+            keep: Leave the worktree in place (e.g. after a failed run);
+                only the newest ``keep_failed`` are kept
+        """
+        with self._lock:
+            workspace = self._workspaces.pop(issue_number, None)
+            if workspace is None:
+                return
+            finished = workspace.ready.is_set()
+        status_path(issue_number).unlink(missing_ok=True)
+
+        if not finished:
+            logger.info(f"Cancelling warm-up for issue #{issue_number}: {reason}")
+            workspace.deadline.cancel(reason)
+        elif keep:
+            logger.info(f"Keeping workspace of issue #{issue_number} ({reason}): {workspace.path}")
+            self.prune()
+        else:
+            logger.info(f"Removing workspace of issue #{issue_number}: {reason}")
+            self._remove(workspace.path)
+
+    def _remove(self, path: Path) -> None:
+        git = GitSession(self.repo_root)
+        git.run(["worktree", "remove", "--force", str(path)], check=False)
+        shutil.rmtree(path, ignore_errors=True)
+        git.run(["worktree", "prune"], check=False)
+
+    def prune(self) -> int:
+        """Remove untracked workspaces beyond the newest ``keep_failed``.
+
+        Returns:
+            Number of workspaces removed
+        """
+        if not self.directory.exists():
+            return 0
+        with self._lock:
+            active = {w.path for w in self._workspaces.values()}
+        leftover = sorted(
+            (p for p in self.directory.glob("issue-*") if p.is_dir() and p not in active),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True
+        )
+        for path in leftover[self.keep_failed:]:
+            self._remove(path)
+        return max(0, len(leftover) - self.keep_failed)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return the tracked workspaces and their state."""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    "issue": w.issue_number,
+                    "path": str(w.path),
+                    "status": "ready" if w.ready.is_set() else "preparing",
+                    "age_seconds": round(now - w.started_at, 1),
+                    **w.report,
+                }
+                for w in self._workspaces.values()
+            ]
+
+
+def create_warmup_manager() -> WarmupManager:
+    """Create the warm-up manager from the ``warmup`` config section."""
+    config = load_config()
+    settings = config["warmup"]
+    return WarmupManager(
+        repo_root=get_repo_root(),
+        directory=Path(config["paths"]["workspaces"]).resolve(),
+        enabled=settings["enabled"],
+        max_workspaces=settings["max_workspaces"],
+        timeout_seconds=settings["timeout_seconds"],
+        type_check=settings["type_check"],
+        keep_failed=settings["keep_failed"],
+    )
+
+
+def adopt_workspace(
+    issue_number: int,
+    path: Path,
+    deadline: Optional[Deadline] = None
+) -> Optional[Path]:
+    """Wait for the listener's warm-up of an issue and run in it (orchestrator side).
+
+    On success this process's repo root becomes the workspace
+    (``ADW_REPO_ROOT``) while logs and state stay where they were
+    (``ADW_STATE_ROOT``) and pushes go where the checkout's would
+    (``ADW_PUSH_REMOTE``/``ADW_PUSH_BRANCH``).
+
+    Args:
+        issue_number: GitHub issue number
+        path: Workspace the listener is preparing
+        deadline: Run deadline; waiting does not outlast it
+
+    Returns:
+        The workspace, or None if the warm-up failed, was discarded or took
+        longer than ``warmup.wait_seconds`` (the run uses its checkout as before)
+
+    Raises:
+        RunCancelledError: If the run is cancelled while waiting
+    """
+    config = load_config()
+    stop = time.monotonic() + config["warmup"]["wait_seconds"]
+    status_file = status_path(issue_number)
+
+    while True:
+        status = read_json(status_file)
+        state = status.get("status") if isinstance(status, dict) else None
+        if state == "ready" and Path(status["path"]) == path:
+            break
+        if state != "preparing":
+            error = status.get("error") if isinstance(status, dict) else None
+            logger.warning(f"No warm workspace ({error or 'warm-up discarded'}), using the checkout")
+            return None
+        if time.monotonic() >= stop:
+            logger.warning(f"Warm-up not done after {config['warmup']['wait_seconds']}s, using the checkout")
+            return None
+        if deadline is not None:
+            deadline.check()
+        time.sleep(WAIT_POLL_SECONDS)
+
+    try:
+        remote, branch = status["report"]["remote"], status["report"]["branch"]
+        sha = update_workspace(path, remote, branch, deadline)
+    except (GitError, DependencyError) as e:
+        logger.warning(f"Could not update warm workspace, using the checkout: {e}")
+        return None
+
+    os.environ["ADW_STATE_ROOT"] = str(get_state_root())
+    os.environ["ADW_REPO_ROOT"] = str(path)
+    os.environ["ADW_PUSH_REMOTE"] = remote
+    os.environ["ADW_PUSH_BRANCH"] = branch
+    logger.info(f"Running in warm workspace {path} at {sha[:8]} "
+                f"(warmed in {status['report'].get('seconds')}s)")
+    return path
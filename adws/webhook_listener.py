@@ -2,32 +2,34 @@
 """Webhook listener for GitHub issue events."""
 import hmac
 import hashlib
+import json
 import os
-import subprocess
+import queue
 import sys
 import threading
+import time
 import logging
 from pathlib import Path
 
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
 
+from utils.config import load_config
+from utils.issues import is_issue_processable, issue_from_payload
+from utils.logs import setup_logging
+from utils.readiness import create_tool_checker, evaluate
+from utils.reconcile import create_reconciler
+from utils.broker import create_broker
+from utils.worker import create_issue_worker, is_local_worker, local_runs, terminate_run
+from utils.workspace import create_warmup_manager
+
+logger = logging.getLogger(__name__)
+
 # Load environment variables from .env file
 env_path = Path(__file__).parent / ".env"
 if env_path.exists():
     load_dotenv(env_path)
-    logging.info(f"Loaded environment from {env_path}")
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler(Path(__file__).parent / "logs" / "webhook.log"),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+    logger.info(f"Loaded environment from {env_path}")
 
 app = Flask(__name__)
 
@@ -37,6 +39,27 @@ SECRET = os.environ.get('GITHUB_WEBHOOK_SECRET', '').encode()
 if not SECRET:
     logger.warning("GITHUB_WEBHOOK_SECRET not set - webhook signature verification disabled")
 
+# Bearer token required by /admin endpoints; without it they are disabled
+ADMIN_TOKEN = os.environ.get('ADW_ADMIN_TOKEN', '')
+
+if not ADMIN_TOKEN:
+    logger.warning("ADW_ADMIN_TOKEN not set - /admin endpoints disabled")
+
+# Issues waiting for a worker, ordered by priority class and age; with the
+# sqlite backend shared with worker.py processes on other hosts
+issue_queue = create_broker()
+
+# Workspaces warmed for opened issues while they wait for a worker
+warm_workspaces = create_warmup_manager()
+
+# Acknowledged but not yet parsed events: (event type, delivery id, raw body)
+ingest_queue = queue.Queue(maxsize=load_config()["ingress"]["max_pending_events"])
+
+# Cached availability of the tools runs need, for /ready and load shedding
+tool_checker = create_tool_checker()
+admission = load_config()["admission"]
+worker_count = load_config()["scheduling"]["workers"]
+
 
 def verify_signature(payload_body: bytes, signature_header: str) -> bool:
     """Verify GitHub webhook signature.
@@ -80,97 +103,207 @@ def verify_signature(payload_body: bytes, signature_header: str) -> bool:
     return is_valid
 
 
-def process_issue_in_background(issue_number: int) -> None:
-    """Run orchestrator for an issue in background.
+def worker_loop(index: int) -> None:
+    """Claim issues from the broker and process them one at a time."""
+    create_issue_worker(issue_queue, index, warmups=warm_workspaces).run_forever()
 
-    Args:
-        issue_number: GitHub issue number
+
+def lease_loop(interval: float) -> None:
+    """Re-queue issues of workers that stopped renewing their lease and drop
+    warm workspaces of issues that are neither queued nor running here."""
+    while True:
+        time.sleep(interval)
+        try:
+            issue_queue.requeue_expired()
+            for item in warm_workspaces.snapshot():
+                location = issue_queue.locate(item["issue"])
+                # Finished or claimed on another host (a new workspace may
+                # not be queued yet, so only look at older ones)
+                if location is None and item["age_seconds"] > interval:
+                    warm_workspaces.discard(item["issue"], "issue no longer queued")
+                elif location and location["state"] == "running" and not is_local_worker(location["worker"]):
+                    warm_workspaces.discard(item["issue"], f"claimed by {location['worker']}")
+        except Exception as e:
+            logger.error(f"Lease maintenance failed: {e}")
+
+
+def reconcile_loop(interval: int) -> None:
+    """Periodically queue open issues that no webhook delivery brought in.
+
+    The first poll after startup scans all open issues, since issues queued
+    before a restart were lost with the in-memory queue.
     """
-    logger.info(f"Processing issue #{issue_number} in background...")
+    reconciler = create_reconciler()
+    full = True
+    while True:
+        try:
+            queued = issue_queue.put_many(reconciler.find_pending(full=full))
+            # Only now: issues a failed put_many left out are listed again
+            reconciler.advance()
+            if queued:
+                logger.info(f"Reconcile queued {queued} missed issue(s)")
+            full = False
+        except Exception as e:
+            logger.error(f"Reconcile poll failed: {e}")
+        time.sleep(interval)
+
+
+def current_load() -> dict:
+    """Evaluate queue depth, worker saturation, ingest backlog and tools."""
+    return evaluate(
+        queue_depth=issue_queue.depth(),
+        running=len(local_runs()),
+        workers=worker_count,
+        ingest_backlog=ingest_queue.qsize(),
+        tools=tool_checker.status(),
+        settings=admission
+    )
+
+
+def retry_after() -> dict:
+    """Headers telling a shed client when to retry."""
+    return {'Retry-After': str(admission["retry_after_seconds"])}
+
+
+def start_workers() -> None:
+    """Start the ingest thread, the configured number of queue workers and
+    the reconcile poller."""
+    # Workspaces left over from a previous listener
+    warm_workspaces.prune()
+
+    threading.Thread(target=ingest_loop, name="ingest", daemon=True).start()
+    # First tool check off the request path
+    threading.Thread(target=tool_checker.refresh, name="tool-check", daemon=True).start()
+
+    interval = load_config()["reconcile"]["interval_seconds"]
+    if interval > 0:
+        threading.Thread(
+            target=reconcile_loop, args=(interval,), name="reconcile", daemon=True
+        ).start()
+
+    threading.Thread(
+        target=lease_loop, args=(load_config()["broker"]["heartbeat_seconds"],),
+        name="leases", daemon=True
+    ).start()
+
+    for i in range(worker_count):
+        threading.Thread(
+            target=worker_loop,
+            args=(i + 1,),
+            name=f"issue-worker-{i + 1}",
+            daemon=True
+        ).start()
+    logger.info(f"Started {worker_count} issue worker(s)")
+
+
+def is_admin_request() -> bool:
+    """Check the admin bearer token; with none configured, refuse every request.
+
+    The listener is reachable by GitHub, so the admin endpoints fail closed
+    rather than letting anyone cancel runs.
+    """
+    if not ADMIN_TOKEN:
+        return False
+    expected = f"Bearer {ADMIN_TOKEN}"
+    return hmac.compare_digest(request.headers.get('Authorization', ''), expected)
 
-    try:
-        # Get absolute path to orchestrator
-        orchestrator_path = Path(__file__).parent / "orchestrator.py"
 
-        # Run orchestrator using the same Python interpreter (from venv)
-        result = subprocess.run(
-            [sys.executable, str(orchestrator_path), str(issue_number)],
-            capture_output=True,
-            text=True,
-            cwd=str(Path(__file__).parent.parent)  # Run from repo root
-        )
+def handle_issue_event(payload: dict) -> None:
+    """Queue newly opened, processable issues from a parsed ``issues`` event.
 
-        if result.returncode == 0:
-            logger.info(f"Issue #{issue_number} processed successfully")
-        else:
-            logger.error(f"Issue #{issue_number} processing failed: {result.stderr}")
+    The processability rules run on the payload here, so rejected issues
+    never reach a worker and the run does not need to fetch the issue.
 
-    except Exception as e:
-        logger.error(f"Error processing issue #{issue_number}: {e}", exc_info=True)
+    Args:
+        payload: Parsed webhook payload
+    """
+    action = payload.get('action')
+    issue = payload.get('issue') or {}
+    issue_number = issue.get('number')
+
+    logger.info(f"Issue event: action={action}, number={issue_number}")
+
+    # Process only newly opened issues
+    if action != 'opened' or not issue_number:
+        logger.info(f"Ignoring issue action: {action}")
+        return
+
+    logger.info(f"New issue #{issue_number}: {issue.get('title')}")
+
+    issue = issue_from_payload(issue)
+    processable, reason = is_issue_processable(issue)
+    if not processable:
+        logger.info(f"Skipping issue #{issue_number}: {reason}")
+        return
+
+    # Start preparing its workspace while it waits, then queue it by
+    # priority class
+    warming = warm_workspaces.start(issue_number)
+    if issue_queue.put(issue) is None and warming:
+        warm_workspaces.discard(issue_number, "issue already queued or running")
+
+
+def ingest_loop() -> None:
+    """Parse acknowledged events off the request path and route them."""
+    while True:
+        event_type, delivery, body = ingest_queue.get()
+        try:
+            payload = json.loads(body)
+            if not isinstance(payload, dict) or not payload:
+                logger.error(f"Empty or invalid webhook payload (delivery {delivery})")
+                continue
+            logger.info(f"Received webhook: {event_type} (delivery {delivery})")
+            handle_issue_event(payload)
+        except ValueError as e:
+            logger.error(f"Malformed webhook JSON (delivery {delivery}): {e}")
+        except Exception as e:
+            logger.error(f"Error handling delivery {delivery}: {e}", exc_info=True)
 
 
 @app.route('/webhook', methods=['POST'])
 def webhook():
-    """Handle GitHub webhook events."""
+    """Handle GitHub webhook events.
+
+    Only the signature and headers are checked here; the payload is parsed
+    and routed by the ingest thread after the 202 has been sent.
+    """
+    body = request.get_data()
+
     # Verify signature
     signature = request.headers.get('X-Hub-Signature-256')
 
-    if not verify_signature(request.data, signature):
+    if not verify_signature(body, signature):
         logger.error("Webhook signature verification failed")
         return jsonify({'error': 'Invalid signature'}), 401
 
-    # Parse payload
-    payload = request.json
-
-    if not payload:
+    if not body:
         logger.error("Empty webhook payload")
         return jsonify({'error': 'Empty payload'}), 400
 
-    # Log event type
+    # Ignore other event types without reading the payload
     event_type = request.headers.get('X-GitHub-Event')
-    logger.info(f"Received webhook: {event_type}")
-
-    # Handle issue events
-    if event_type == 'issues':
-        action = payload.get('action')
-        issue = payload.get('issue', {})
-        issue_number = issue.get('number')
-
-        logger.info(f"Issue event: action={action}, number={issue_number}")
-
-        # Process only newly opened issues
-        if action == 'opened' and issue_number:
-            logger.info(f"New issue #{issue_number}: {issue.get('title')}")
-
-            # Start processing in background thread
-            thread = threading.Thread(
-                target=process_issue_in_background,
-                args=(issue_number,),
-                daemon=True
-            )
-            thread.start()
-
-            return jsonify({
-                'status': 'processing',
-                'issue': issue_number,
-                'message': f'Issue #{issue_number} queued for processing'
-            }), 202
-
-        else:
-            logger.info(f"Ignoring issue action: {action}")
-            return jsonify({
-                'status': 'ignored',
-                'reason': f'Action "{action}" is not processed'
-            }), 200
-
-    # Ignore other event types
-    else:
-        logger.info(f"Ignoring event type: {event_type}")
+    if event_type != 'issues':
         return jsonify({
             'status': 'ignored',
             'reason': f'Event type "{event_type}" is not processed'
         }), 200
 
+    delivery = request.headers.get('X-GitHub-Delivery', '')
+
+    # Shed load instead of queueing work this box cannot get to
+    load = current_load()
+    if not load['ready']:
+        logger.warning(f"Shedding delivery {delivery} ({load['status_code']}): {'; '.join(load['reasons'])}")
+        return jsonify({'error': 'Not accepting work', 'reasons': load['reasons']}), load['status_code'], retry_after()
+
+    try:
+        ingest_queue.put_nowait((event_type, delivery, body))
+    except queue.Full:
+        logger.error("Ingest queue full, rejecting webhook")
+        return jsonify({'error': 'Ingest queue full'}), 503, retry_after()
+
+    return jsonify({'status': 'accepted', 'delivery': delivery}), 202
+
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -178,8 +311,58 @@ def health():
     return jsonify({'status': 'ok'}), 200
 
 
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 when taking work, else 429/503 with the reasons.
+
+    Reports queue depth, worker saturation, ingest backlog and the cached
+    availability of the tools runs need.
+    """
+    load = current_load()
+    headers = {} if load['ready'] else retry_after()
+    return jsonify(load), load['status_code'], headers
+
+
+@app.route('/admin/queue', methods=['GET'])
+def admin_queue():
+    """Show queued issues in dispatch order, running issues and warm workspaces."""
+    if not is_admin_request():
+        return jsonify({'error': 'Unauthorized'}), 401
+    return jsonify({**issue_queue.snapshot(), 'warm_workspaces': warm_workspaces.snapshot()}), 200
+
+
+@app.route('/admin/runs/<int:issue_number>/cancel', methods=['POST'])
+def admin_cancel_run(issue_number: int):
+    """Drop a queued issue, or cancel its running run.
+
+    A running orchestrator gets SIGTERM: it stops before its next step and
+    reports the run as cancelled on the issue. A run on another host's
+    worker gets it when that worker's next heartbeat fails.
+    """
+    if not is_admin_request():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if issue_queue.remove(issue_number):
+        threading.Thread(
+            target=warm_workspaces.discard, args=(issue_number, "dequeued"), daemon=True
+        ).start()
+        return jsonify({'status': 'dequeued', 'issue': issue_number}), 200
+
+    if terminate_run(issue_number):
+        return jsonify({'status': 'cancelling', 'issue': issue_number}), 202
+
+    # Running on another worker: it stops the run at its next heartbeat
+    if issue_queue.request_cancel(issue_number):
+        location = issue_queue.locate(issue_number) or {}
+        logger.info(f"Requested cancellation of issue #{issue_number} on {location.get('worker')}")
+        return jsonify({'status': 'cancelling', 'issue': issue_number, 'worker': location.get('worker')}), 202
+
+    return jsonify({'error': f'Issue #{issue_number} is not queued or running'}), 404
+
+
 def main():
     """Start webhook listener."""
+    setup_logging("webhook.log", stream=sys.stderr, non_blocking=True)
     port = int(os.environ.get('WEBHOOK_PORT', '5555'))
 
     logger.info("=" * 60)
@@ -191,7 +374,18 @@ def main():
     logger.info("Waiting for webhook events...")
     logger.info("=" * 60)
 
-    app.run(host='0.0.0.0', port=port, debug=False)
+    start_workers()
+
+    try:
+        from waitress import serve
+    except ImportError:
+        logger.warning("waitress not installed, falling back to Flask development server")
+        app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
+        return
+
+    threads = load_config()["ingress"]["server_threads"]
+    logger.info(f"Serving with waitress ({threads} threads)")
+    serve(app, host='0.0.0.0', port=port, threads=threads)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Worker process: claim issues from the shared broker and run them here."""
+import argparse
+import logging
+import signal
+import sys
+import threading
+
+from utils.broker import MemoryBroker, create_broker
+from utils.logs import setup_logging
+from utils.worker import create_issue_worker, terminate_all
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Run issues claimed from the broker shared with the webhook listener"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Issues run concurrently by this process (default: 1)"
+    )
+    args = parser.parse_args()
+    setup_logging("worker.log", stream=sys.stderr)
+
+    broker = create_broker()
+    if isinstance(broker, MemoryBroker):
+        print("❌ broker.backend is memory: only the listener's own workers can claim its issues",
+              file=sys.stderr)
+        sys.exit(1)
+
+    stop = threading.Event()
+
+    def handle(signum, frame):
+        # First signal drains (no new claims, running issues finish);
+        # a second one cancels the runs, which report it on their issues
+        if not stop.is_set():
+            logger.info(f"Received {signal.Signals(signum).name}, finishing running issues")
+            stop.set()
+        else:
+            logger.warning(f"Received {signal.Signals(signum).name} again, cancelling {terminate_all()} run(s)")
+
+    signal.signal(signal.SIGTERM, handle)
+    signal.signal(signal.SIGINT, handle)
+
+    threads = []
+    for i in range(args.workers):
+        worker = create_issue_worker(broker, i + 1)
+        thread = threading.Thread(target=worker.run_forever, args=(stop,), name=f"issue-worker-{i + 1}")
+        thread.start()
+        threads.append(thread)
+    logger.info(f"Started {args.workers} issue worker(s) on {broker.path}")
+
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=1.0)
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()